@@ -0,0 +1,179 @@
+"""
+end-to-end throughput benchmark of wp-md against a local fake Wordpress.
+
+Runs the download, upload and check-links scenarios for every combination of
+corpus size and concurrency, each in a fresh process, and reports the posts per
+second, the requests per post and the peak resident memory:
+
+    python -m benchmarks.throughput --sizes 50,200 --concurrency 1,4 --latency 0.02
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from tests.fake_wordpress import FakeWordpress
+
+SCENARIOS = ["download", "upload", "check-links"]
+
+
+def peak_rss_mb() -> float:
+    """
+    returns the peak resident memory of the process in MiB.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macos bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def write_blogs(directory: Path, count: int, paragraphs: int) -> list[Path]:
+    blogs = []
+    for i in range(count):
+        path = directory.joinpath(f"blog-{i}")
+        path.mkdir(parents=True)
+        body = "\n\n".join(
+            f"Paragraph {p} of blog {i}, with a [link](/page-{p}/) to another page."
+            for p in range(paragraphs)
+        )
+        path.joinpath("index.md").write_text(
+            "---\n"
+            f"title: Blog {i}\n"
+            "author: Jane Doe\n"
+            f"slug: blog-{i}\n"
+            "date: 2023-01-01 10:00:00+00:00\n"
+            "status: draft\n"
+            "categories:\n- categories-1\n"
+            "tags:\n- tags-2\n"
+            "---\n\n"
+            f"## Blog {i}\n\n{body}\n"
+        )
+        blogs.append(path)
+    return blogs
+
+
+def run_scenario(scenario: str, url: str, size: int, concurrency: int, work: str) -> dict:
+    """
+    runs the `scenario` against the fake Wordpress at `url`, in the current process.
+    """
+    from click.testing import CliRunner
+
+    from wordpress_markdown_blog_loader import check_links, download
+    from wordpress_markdown_blog_loader.api import Wordpress, WordpressEndpoint
+    from wordpress_markdown_blog_loader.blog import Blog
+    from wordpress_markdown_blog_loader.upload import upsert_post
+
+    logging.getLogger().setLevel(logging.WARNING)
+    work = Path(work)
+    os.environ["WP_MD_CACHE_DIR"] = str(work.joinpath("cache"))
+    os.environ["WP_APP_PASSWORD_LOCALHOST"] = "password"
+    os.chdir(work)
+
+    if scenario == "upload":
+        blogs = [Blog.load(p.joinpath("index.md")) for p in write_blogs(work, size, 10)]
+        endpoint = WordpressEndpoint(
+            host="localhost",
+            api_host="localhost",
+            url=url,
+            username="admin",
+            password="password",
+        )
+        started = time.monotonic()
+        wordpress = Wordpress(endpoint=endpoint, concurrency=concurrency)
+        wordpress.prefetch_taxonomies()
+        existing = wordpress.get_posts_by_slugs([b.slug for b in blogs])
+        for blog in blogs:
+            upsert_post(wordpress, blog, existing)
+    else:
+        command, args = {
+            "download": (download.command, ["--directory", str(work.joinpath("out"))]),
+            "check-links": (check_links.command, []),
+        }[scenario]
+        work.joinpath("out").mkdir()
+        started = time.monotonic()
+        result = CliRunner().invoke(
+            command, ["--host", "localhost", "--concurrency", str(concurrency), *args]
+        )
+        if result.exit_code != 0:
+            raise RuntimeError(f"{scenario} failed: {result.output}") from result.exception
+
+    return {"seconds": time.monotonic() - started, "peak_rss_mb": peak_rss_mb()}
+
+
+def _child(queue, *args):
+    try:
+        queue.put(run_scenario(*args))
+    except BaseException as error:
+        queue.put({"error": repr(error)})
+
+
+def benchmark(
+    scenario: str, size: int, concurrency: int, latency: float, error_rate: float
+) -> dict:
+    with FakeWordpress(
+        posts=size if scenario != "upload" else 0,
+        latency=latency,
+        error_rate=error_rate,
+    ) as fake, tempfile.TemporaryDirectory() as work:
+        fake.write_config(Path(work))
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        process = context.Process(
+            target=_child, args=(queue, scenario, fake.url, size, concurrency, work)
+        )
+        process.start()
+        result = queue.get()
+        process.join()
+        requests = fake.requests
+
+    if "error" in result:
+        raise RuntimeError(f"{scenario} failed: {result['error']}")
+    return {
+        "scenario": scenario,
+        "posts": size,
+        "concurrency": concurrency,
+        "seconds": round(result["seconds"], 3),
+        "posts_per_second": round(size / result["seconds"], 2),
+        "requests_per_post": round(requests / size, 2),
+        "peak_rss_mb": round(result["peak_rss_mb"], 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--sizes", default="20,100", help="comma separated post counts")
+    parser.add_argument("--concurrency", default="1,4", help="comma separated levels")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="of GET requests")
+    parser.add_argument("--json", help="writes the results as json to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(
+        f"{'scenario':<12} {'posts':>6} {'conc':>5} {'seconds':>8} "
+        f"{'posts/s':>8} {'req/post':>9} {'rss MiB':>8}"
+    )
+    for scenario in args.scenarios.split(","):
+        for size in map(int, args.sizes.split(",")):
+            for concurrency in map(int, args.concurrency.split(",")):
+                r = benchmark(scenario, size, concurrency, args.latency, args.error_rate)
+                results.append(r)
+                print(
+                    f"{r['scenario']:<12} {r['posts']:>6} {r['concurrency']:>5} "
+                    f"{r['seconds']:>8} {r['posts_per_second']:>8} "
+                    f"{r['requests_per_post']:>9} {r['peak_rss_mb']:>8}",
+                    flush=True,
+                )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
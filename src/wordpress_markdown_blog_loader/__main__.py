@@ -1,17 +1,50 @@
 import logging
 import os
+import sys
 import click
 from wordpress_markdown_blog_loader import upload, download, new, check_links
+from wordpress_markdown_blog_loader.api import WordpressError
+from wordpress_markdown_blog_loader.metrics import Metrics, add_hook
 
 
-@click.group()
-def main():
+class Group(click.Group):
+    """
+    reports a failed Wordpress API call of any command as an error, instead of a stack trace.
+    """
+
+    def invoke(self, ctx):
+        try:
+            return super().invoke(ctx)
+        except WordpressError as error:
+            logging.error(error)
+            sys.exit(1)
+
+
+@click.group(cls=Group)
+@click.option(
+    "--metrics-json",
+    type=click.Path(dir_okay=False, writable=True),
+    envvar="WP_MD_METRICS_JSON",
+    help="writes a summary of the Wordpress API requests as json to this file",
+)
+@click.option(
+    "--metrics-prometheus",
+    type=click.Path(dir_okay=False, writable=True),
+    envvar="WP_MD_METRICS_PROMETHEUS",
+    help="writes the Wordpress API request metrics as Prometheus textfile to this file",
+)
+@click.pass_context
+def main(ctx: click.Context, metrics_json: str, metrics_prometheus: str):
     """
     Wordpress CLI
     """
     logging.basicConfig(
         level=os.getenv("LOG_LEVEL", "INFO"), format="%(levelname)s: %(message)s"
     )
+    if metrics_json or metrics_prometheus:
+        metrics = Metrics()
+        add_hook(metrics)
+        ctx.call_on_close(lambda: metrics.write(metrics_json, metrics_prometheus))
 
 
 @main.group()
@@ -1,20 +1,52 @@
 import configparser
+import hashlib
+import itertools
+import json
 import logging
 import mimetypes
+import mmap
 import os
 import re
+import random
 import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from functools import cache, lru_cache
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from os.path import expanduser
 from pathlib import Path
-from typing import List, Dict, Iterator
+from typing import Callable, List, Dict, Iterable, Iterator, Tuple
 from typing import Optional, Union
 from urllib.parse import urlparse, ParseResult
 
 import pytz
 import requests
 
+from wordpress_markdown_blog_loader.cache import (
+    JsonCache,
+    cache_directory,
+    file_digest,
+    read_json,
+    write_json,
+)
+from wordpress_markdown_blog_loader.cassette import RecordingAdapter, ReplayAdapter
+from wordpress_markdown_blog_loader.http_cache import CachingAdapter
+from wordpress_markdown_blog_loader import metrics
+from wordpress_markdown_blog_loader.json_stream import iter_json_array
+from wordpress_markdown_blog_loader.metrics import RequestEvent, RequestHook
+from wordpress_markdown_blog_loader.media_index import MediaIndex
+from wordpress_markdown_blog_loader.records import (
+    POST_CONTENT_FIELDS,
+    POST_RECORD_FIELDS,
+    MediumRecord,
+    PostRecord,
+    UserRecord,
+)
+
 
 def get_default_host() -> Optional[str]:
     """
@@ -86,7 +118,7 @@ class WordpressEndpoint:
 
         self.host = host
         self.api_host = config.get(host, "api_host", fallback=self.host)
-        self.url = f"https://{self.api_host}/wp-json/wp/v2"
+        self.url = config.get(host, "url", fallback=f"https://{self.api_host}/wp-json/wp/v2")
 
         self.username = config.get(host, "username")
         self.password = get_password(host)
@@ -162,8 +194,8 @@ class Medium(dict):
         return self.get("guid").get("rendered")
 
     @property
-    def link(self) -> str:
-        return self["link"]
+    def link(self) -> Optional[str]:
+        return self.get("link")
 
     @property
     def slug(self) -> str:
@@ -173,6 +205,10 @@ class Medium(dict):
     def title(self) -> Optional[str]:
         return self.get("title", {}).get("rendered")
 
+    @property
+    def filesize(self) -> Optional[int]:
+        return self.get("media_details", {}).get("filesize")
+
 
 class Post(dict):
     def __init__(self, p):
@@ -260,6 +296,10 @@ class Post(dict):
         self["date"] = new_date
         self["date_gmt"] = new_date.astimezone(pytz.timezone("utc"))
 
+    @property
+    def modified_gmt(self) -> Optional[str]:
+        return self.get("modified_gmt")
+
     @property
     def status(self):
         return self["status"]
@@ -292,21 +332,368 @@ class Post(dict):
         self["permalink_template"] = template
 
 
-class PermissionDenied(Exception):
-    def __init__(self, msg):
+class WordpressError(Exception):
+    def __init__(self, msg, status_code: Optional[int] = None):
         super().__init__(msg)
+        self.status_code = status_code
+
+
+@contextmanager
+def _mapped(file, size: int):
+    """
+    memory-maps the `file` for reading. An empty file cannot be mapped, and is
+    returned as is.
+    """
+    if size == 0:
+        yield file
+        return
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        yield content
+
+
+class PermissionDenied(WordpressError):
+    def __init__(self, msg, status_code: Optional[int] = None):
+        super().__init__(msg, status_code)
+
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+DEFAULT_RETRIES = 5
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+SLUG_BATCH_SIZE = 50
+BATCH_SIZE = 25
+
+# the taxonomies of a blog
+TAXONOMIES = (
+    "categories",
+    "tags",
+    "capabilities",
+    "industries_taxonomy",
+    "partners_taxonomy",
+)
+
+# bounds and targets of the adaptive page size of list queries
+MIN_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 100
+TARGET_PAGE_BYTES = 2 * 1024 * 1024
+TARGET_PAGE_SECONDS = 2.0
+
+# fields of a post needed to identify and update it
+POST_REFERENCE_FIELDS = ["id", "slug", "generated_slug", "link", "_links"]
+# fields of a medium needed to refer to it
+MEDIUM_REFERENCE_FIELDS = [
+    "id", "slug", "link", "guid", "title", "source_url", "mime_type", "media_details"
+]
+# fields of a medium kept in the media index
+MEDIA_INDEX_FIELDS = [
+    "id", "slug", "title", "guid", "source_url", "modified_gmt", "media_details.filesize"
+]
+
+# the authors resolved by get_unique_user_by_name, shared by all instances
+_authors: Dict[tuple, "User"] = {}
+_authors_lock = threading.Lock()
+
+# properties of a medium recorded in the media manifest
+_MANIFEST_FIELDS = ("id", "slug", "link", "guid", "title", "source_url", "mime_type")
+
+
+class _HostPace(object):
+    __slots__ = ("interval", "next_slot", "not_before")
+
+    def __init__(self):
+        self.interval = 0.0
+        self.next_slot = 0.0
+        self.not_before = 0.0
+
+
+class RequestScheduler(object):
+    """
+    paces and retries the requests to Wordpress.
+
+    Requests are spaced per host by an interval, which is doubled every time the
+    host signals it is overloaded and shrinks gradually while requests succeed. A
+    Retry-After header pauses all requests to the host. Failed requests are retried
+    with jittered exponential backoff: throttled requests (429) always, server errors
+    and connection failures only for idempotent methods.
+    """
+
+    RETRY_STATUS = {429, 502, 503, 504}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+    MIN_INTERVAL = 0.05
+    MAX_INTERVAL = 10.0
+
+    def __init__(
+        self, retries: int = DEFAULT_RETRIES, backoff: float = 0.5, max_backoff: float = 60.0
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._hosts: Dict[str, _HostPace] = {}
+        self._lock = threading.Lock()
+
+    def _pace(self, host: str) -> _HostPace:
+        if host not in self._hosts:
+            self._hosts[host] = _HostPace()
+        return self._hosts[host]
+
+    def reserve(self, host: str) -> float:
+        """
+        reserves the next slot for a request to `host`, and returns the number of
+        seconds until it starts.
+        """
+        with self._lock:
+            pace = self._pace(host)
+            now = time.monotonic()
+            start = max(now, pace.next_slot, pace.not_before)
+            pace.next_slot = start + pace.interval
+        return start - now
+
+    def acquire(self, host: str):
+        """
+        waits until the next request to `host` may be sent.
+        """
+        if (delay := self.reserve(host)) > 0:
+            time.sleep(delay)
+
+    def succeeded(self, host: str):
+        with self._lock:
+            pace = self._pace(host)
+            pace.interval = pace.interval * 0.9 if pace.interval > self.MIN_INTERVAL else 0.0
+
+    def throttled(self, host: str, delay: float):
+        with self._lock:
+            pace = self._pace(host)
+            pace.interval = min(max(pace.interval * 2, self.MIN_INTERVAL), self.MAX_INTERVAL)
+            pace.not_before = max(pace.not_before, time.monotonic() + delay)
+
+    def should_retry(self, method: str, status_code: Optional[int], attempt: int) -> bool:
+        """
+        >>> RequestScheduler().should_retry("POST", 429, 0)
+        True
+        >>> RequestScheduler().should_retry("POST", 503, 0)
+        False
+        >>> RequestScheduler().should_retry("GET", None, 0)
+        True
+        >>> RequestScheduler(retries=2).should_retry("GET", 503, 2)
+        False
+        """
+        if attempt >= self.retries:
+            return False
+        if status_code == 429:
+            return True
+        if status_code is not None and status_code not in self.RETRY_STATUS:
+            return False
+        return method.upper() in self.IDEMPOTENT_METHODS
+
+    def delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        returns the delay before the next attempt: the Retry-After of the response,
+        or a random delay up to the exponential backoff.
+        """
+        if response is not None and (retry_after := response.headers.get("Retry-After")):
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                try:
+                    at = parsedate_to_datetime(retry_after)
+                    return min(max(at.timestamp() - time.time(), 0.0), self.max_backoff)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+def _body_size(response: requests.Response, stream: bool) -> Optional[int]:
+    """
+    returns the size of the body of the `response`, if it was read or announced. The
+    body of a `stream`ed response is not read yet.
+    """
+    if not stream:
+        return len(response.content)
+    if length := response.headers.get("Content-Length"):
+        return int(length) if length.isdigit() else None
+    return None
+
+
+def _fire_when_read(
+    response: requests.Response, event: RequestEvent, hooks: List[RequestHook]
+):
+    """
+    fires the `event` of the streamed `response` once its body has been read or the
+    response is closed, with the number of bytes read. A streamed list page or
+    medium is often chunked or compressed, without a usable Content-Length.
+    """
+    iter_content, close = response.iter_content, response.close
+    event.bytes = 0
+    fired = False
+
+    def fire():
+        nonlocal fired
+        if not fired:
+            fired = True
+            metrics.fire(event, hooks)
+
+    def counted(*args, **kwargs) -> Iterator[bytes]:
+        try:
+            for chunk in iter_content(*args, **kwargs):
+                event.bytes += len(chunk)
+                yield chunk
+        finally:
+            fire()
+
+    def closing():
+        try:
+            close()
+        finally:
+            fire()
+
+    response.iter_content = counted
+    response.close = closing
+
+
+class WordpressSession(requests.Session):
+    """
+    requests session which sends all requests through the `scheduler`. Every
+    attempt of a request is reported to the `request_hooks` and the hooks
+    registered in `metrics`; a streamed response once its body has been read.
+    """
+
+    def __init__(
+        self, scheduler: RequestScheduler, request_hooks: List[RequestHook] = None
+    ):
+        super().__init__()
+        self.scheduler = scheduler
+        self.request_hooks = list(request_hooks or [])
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        host = urlparse(url).netloc
+        stream = bool(kwargs.get("stream"))
+        attempt = 0
+        while True:
+            self.scheduler.acquire(host)
+            started = time.monotonic()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                metrics.fire(
+                    RequestEvent(
+                        method,
+                        url,
+                        None,
+                        time.monotonic() - started,
+                        attempt=attempt,
+                        error=type(error).__name__,
+                    ),
+                    self.request_hooks,
+                )
+                if not self.scheduler.should_retry(method, None, attempt):
+                    raise
+                delay = self.scheduler.delay(attempt)
+                logging.warning("%s %s failed, %s. retrying in %.1fs", method, url, error, delay)
+            else:
+                event = RequestEvent(
+                    method,
+                    url,
+                    response.status_code,
+                    time.monotonic() - started,
+                    _body_size(response, stream),
+                    attempt,
+                )
+                retry = response.status_code in self.scheduler.RETRY_STATUS and (
+                    self.scheduler.should_retry(method, response.status_code, attempt)
+                )
+                if retry or not stream:
+                    metrics.fire(event, self.request_hooks)
+                else:
+                    _fire_when_read(response, event, self.request_hooks)
+                if response.status_code not in self.scheduler.RETRY_STATUS:
+                    self.scheduler.succeeded(host)
+                    return response
+                if not retry:
+                    return response
+                delay = self.scheduler.delay(attempt, response)
+                logging.warning(
+                    "%s %s returned %s, retrying in %.1fs",
+                    method,
+                    url,
+                    response.status_code,
+                    delay,
+                )
+                response.close()
+
+            self.scheduler.throttled(host, delay)
+            if hasattr(data := kwargs.get("data"), "seek"):
+                data.seek(0)
+            attempt += 1
 
 
 class Wordpress(object):
-    def __init__(self, host: Optional[str] = None):
-        self.endpoint = WordpressEndpoint.load(host)
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        refresh_cache: bool = False,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        http_cache: bool = False,
+        retries: int = DEFAULT_RETRIES,
+        pool_size: Optional[int] = None,
+        persist_authors: bool = False,
+        use_media_index: bool = False,
+        request_hooks: Optional[List[RequestHook]] = None,
+        endpoint: Optional[WordpressEndpoint] = None,
+        record: Optional[Path] = None,
+        replay: Optional[Path] = None,
+    ):
+        self.endpoint = endpoint if endpoint else WordpressEndpoint.load(host)
         self.app_version = os.getenv("APP_VERSION", "0.0.0")
+        self.concurrency = max(1, concurrency)
+        self.refresh_cache = refresh_cache
+        self.cache_ttl = cache_ttl
         self._media: List[Medium] = {}
+        self._taxonomies: Dict[str, Dict[str, int]] = {}
+        self._taxonomies_by_id: Dict[str, Dict[int, str]] = {}
+        self._refreshed: set[str] = set()
+        self._page_sizes: Dict[tuple, int] = {}
+        self.media_manifest = JsonCache(cache_directory(self.endpoint.host, "media.json"))
+        self.use_media_index = use_media_index
+        self._media_index: Optional[MediaIndex] = None
+        self._media_index_lock = threading.Lock()
+        self.author_cache = (
+            JsonCache(cache_directory(self.endpoint.host, "authors.json"))
+            if persist_authors
+            else None
+        )
         self.headers = {
             "accept": "application/json",
             "User-Agent": "wordpress-blog-uploader/" + self.app_version,
         }
-        self.session = requests.Session()
+        self.session = WordpressSession(RequestScheduler(retries), request_hooks)
+
+        # keep a connection per worker, instead of discarding them when the pool is
+        # full. The worker pools are nested: the taxonomies and the batches of slugs
+        # are read concurrently, each with `concurrency` page workers, and media are
+        # downloaded while the pages of posts are streamed.
+        self.pool_size = pool_size or max(
+            max(self.concurrency, len(TAXONOMIES)) * self.concurrency,
+            requests.adapters.DEFAULT_POOLSIZE,
+        )
+        record = record or os.getenv("WP_MD_RECORD")
+        replay = replay or os.getenv("WP_MD_REPLAY")
+        if record and replay:
+            raise ValueError("cannot both record to and replay from a cassette")
+        # the http cache and the cassettes only match pages of the same size on
+        # every run, and adapted page sizes depend on the timing of the responses
+        self.adapt_page_size = not (http_cache or record or replay)
+        if replay:
+            adapter = ReplayAdapter(replay)
+        else:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.pool_size)
+        if record:
+            adapter = RecordingAdapter(adapter, record)
+        if http_cache:
+            adapter = CachingAdapter(adapter, cache_directory(self.endpoint.host, "http"))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
     @property
     def auth(self) -> (str, str):
@@ -322,33 +709,193 @@ class Wordpress(object):
     def is_host_for(self, url: Union[str, ParseResult]) -> bool:
         return self.endpoint.is_host_for(url)
 
-    def get_all(self, resource: str, query: dict = None) -> Iterator[dict]:
+    def get_range(
+        self, resource: str, params: dict, offset: int, per_page: int, stream=False
+    ) -> requests.Response:
+        response = self.session.get(
+            f"{self.url}/{resource}",
+            params=params | {"offset": str(offset), "per_page": str(per_page)},
+            auth=self.auth,
+            headers=self.headers,
+            stream=stream,
+        )
+        if response.status_code != 200:
+            msg = f"failed to get all {resource}: {response.status_code}, {response.text}"
+            if response.status_code in [401, 403]:
+                raise PermissionDenied(msg, response.status_code)
+            raise WordpressError(msg, response.status_code)
+        return response
+
+    def page_size(self, key: tuple) -> int:
+        """
+        returns the number of objects to request per page for the list query `key`.
+        """
+        return self._page_sizes.get(key, MAX_PAGE_SIZE)
+
+    def _observe_page(self, key: tuple, count: int, length: int, seconds: float):
+        """
+        adapts the page size of the list query `key` to the `length` and duration in
+        `seconds` of a page of `count` objects, so that a page stays below
+        TARGET_PAGE_BYTES and TARGET_PAGE_SECONDS. With `adapt_page_size` off, all
+        pages have MAX_PAGE_SIZE objects.
+        """
+        if count == 0 or not self.adapt_page_size:
+            return
+        size = MAX_PAGE_SIZE
+        if length:
+            size = min(size, int(count * TARGET_PAGE_BYTES / length))
+        if seconds:
+            size = min(size, int(count * TARGET_PAGE_SECONDS / seconds))
+        # smooth out single slow responses
+        size = (self.page_size(key) + size) // 2
+        self._page_sizes[key] = max(MIN_PAGE_SIZE, min(MAX_PAGE_SIZE, size))
+
+    def _get_objects(
+        self, resource: str, params: dict, offset: int, per_page: int, key: tuple
+    ) -> (requests.Response, list):
+        response = self.get_range(resource, params, offset, per_page)
+        objects = response.json()
+        seconds = response.elapsed.total_seconds() if response.elapsed else 0
+        self._observe_page(key, len(objects), len(response.content), seconds)
+        return response, objects
+
+    def _open_objects(
+        self, resource: str, params: dict, offset: int, per_page: int, key: tuple
+    ) -> (requests.Response, Iterator[dict]):
+        response = self.get_range(resource, params, offset, per_page, stream=True)
+        return response, self._stream_objects(
+            response, resource, params, offset, per_page, key
+        )
+
+    def _stream_objects(
+        self,
+        response: requests.Response,
+        resource: str,
+        params: dict,
+        offset: int,
+        per_page: int,
+        key: tuple,
+    ) -> Iterator[dict]:
+        """
+        yields the objects of the list `response` of the page at `offset` while they
+        are decoded from the stream.
+
+        An opened response may wait a while before it is read, and the connection
+        may be dropped in the meantime. If reading fails, the rest of the page is
+        requested again from the offset of the first object not yet returned.
+
+        The page size is adapted to the time to the last byte of the page: the time
+        to the response headers and the time spent reading the stream, but not the
+        time the response waited or the caller spent on the objects.
+        """
+        length, count, seconds = 0, 0, 0.0
+
+        def chunks(response: requests.Response) -> Iterator[bytes]:
+            nonlocal length, seconds
+            if response.elapsed:
+                seconds += response.elapsed.total_seconds()
+            content = response.iter_content(STREAM_CHUNK_SIZE)
+            while True:
+                started = time.monotonic()
+                chunk = next(content, None)
+                seconds += time.monotonic() - started
+                if chunk is None:
+                    return
+                length += len(chunk)
+                yield chunk
+
+        attempt = 0
+        try:
+            while True:
+                try:
+                    for o in iter_json_array(chunks(response)):
+                        count += 1
+                        yield o
+                    break
+                except (
+                    requests.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError,
+                ) as error:
+                    response.close()
+                    if count >= per_page:
+                        break
+                    if attempt >= self.session.scheduler.retries:
+                        raise
+                    delay = self.session.scheduler.delay(attempt)
+                    logging.warning(
+                        "reading %s at offset %d failed, %s. retrying in %.1fs",
+                        resource,
+                        offset + count,
+                        error,
+                        delay,
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+                    response = self.get_range(
+                        resource, params, offset + count, per_page - count, stream=True
+                    )
+        finally:
+            response.close()
+        self._observe_page(key, count, length, seconds)
+
+    def get_all(
+        self,
+        resource: str,
+        query: dict = None,
+        fields: Optional[List[str]] = None,
+        incremental: bool = False,
+    ) -> Iterator[dict]:
+        """
+        returns all objects of the `resource`, with only the `fields` if specified.
+
+        The first page is read to determine the total number of objects, the
+        remaining pages are fetched concurrently by at most `concurrency` workers.
+        Objects are returned in order. Pages are requested by offset, so that the
+        page size can follow the observed size and latency of the responses.
+
+        In `incremental` mode, objects are decoded from the response stream and
+        returned as soon as they are complete, instead of after the whole page has
+        been read. The workers only wait for the responses of the next pages, which
+        are read in order. A page of which the connection fails while it is read is
+        requested again from the first object not yet returned.
+        """
         params = query.copy() if query else {}
-        params["per_page"] = "100"
-        page = 1
-        total_pages = 1
-        while page <= total_pages:
-            params["page"] = str(page)
-            response = self.session.get(
-                f"{self.url}/{resource}",
-                auth=self.auth,
-                params=params,
-                headers=self.headers,
-            )
-            if response.status_code == 200:
-                for object in response.json():
-                    yield object
-                total_pages = int(response.headers["X-WP-TotalPages"])
-                page = page + 1
-            else:
-                msg = f"failed to get all {resource}: {response.status_code}, {response.text}"
-                if response.status_code in [401, 403]:
-                    raise PermissionDenied(msg)
-                else:
-                    print(msg)
-                    exit(1)
+        if fields:
+            params["_fields"] = ",".join(fields)
+        key = (resource, params.get("_fields"), params.get("context"))
+        fetch = self._open_objects if incremental else self._get_objects
+
+        per_page = self.page_size(key)
+        response, objects = fetch(resource, params, 0, per_page, key)
+        total = int(response.headers.get("X-WP-Total", 0))
+        yield from objects
+        offset = per_page
+        if offset >= total:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        pending = deque()
+
+        def submit():
+            nonlocal offset
+            per_page = self.page_size(key)
+            pending.append(executor.submit(fetch, resource, params, offset, per_page, key))
+            offset += per_page
 
-        return None
+        try:
+            while offset < total and len(pending) < self.concurrency:
+                submit()
+            while pending:
+                _, objects = pending.popleft().result()
+                if offset < total:
+                    submit()
+                yield from objects
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            # release the connections of responses which were opened, but not read
+            for future in pending:
+                if not future.cancelled() and not future.exception():
+                    future.result()[0].close()
 
     def users(self, query: dict = None) -> List["User"]:
         return list(map(lambda u: User(u), self.get_all("users", query)))
@@ -356,10 +903,60 @@ class Wordpress(object):
     def get_user_by_id(self, resource_id: int) -> "User":
         return User(self.get("users", resource_id))
 
+    def _author_key(
+        self, name: str, email: Optional[str], author_id: Optional[str]
+    ) -> tuple:
+        return (self.endpoint.host, name, (email or "").lower(), author_id or "")
+
     def get_unique_user_by_name(
         self, name: str, email: Optional[str], author_id: Optional[str]
     ) -> "User":
+        """
+        returns the user `name`, disambiguated by `author_id` or `email`. Resolved
+        users are remembered in the process and, if `persist_authors` is set, in the
+        local cache of the host.
+        """
+        key = self._author_key(name, email, author_id)
+        with _authors_lock:
+            user = _authors.get(key)
+        if user:
+            return user
+
+        if self.author_cache and not self.refresh_cache:
+            if recorded := self.author_cache.get(json.dumps(key)):
+                user = User(recorded)
+                with _authors_lock:
+                    _authors[key] = user
+                return user
+
+        try:
+            user = self._resolve_unique_user_by_name(name, email, author_id)
+        except (ValueError, WordpressError):
+            self.forget_author(name, email, author_id)
+            raise
+
+        with _authors_lock:
+            _authors[key] = user
+        if self.author_cache:
+            self.author_cache.put(
+                json.dumps(key), {"id": user.id, "name": user.name, "slug": user.slug}
+            )
+        return user
+
+    def forget_author(self, name: str, email: Optional[str], author_id: Optional[str]):
+        """
+        removes the user resolved for the author from the caches, ie. when a post
+        could not be written with it.
+        """
+        key = self._author_key(name, email, author_id)
+        with _authors_lock:
+            _authors.pop(key, None)
+        if self.author_cache:
+            self.author_cache.remove(json.dumps(key))
 
+    def _resolve_unique_user_by_name(
+        self, name: str, email: Optional[str], author_id: Optional[str]
+    ) -> "User":
         user = self.get_user_by_id("me")
         if user and user.name == name:
             return user
@@ -407,91 +1004,259 @@ class Wordpress(object):
                 f"Multiple authors named '{name}' found. (possible: {candidates})."
             )
 
-    def posts(self, query: dict = None) -> Iterator["Post"]:
-        for p in self.get_all("posts", query):
+    def posts(
+        self,
+        query: dict = None,
+        fields: Optional[List[str]] = None,
+        incremental: bool = False,
+    ) -> Iterator["Post"]:
+        for p in self.get_all("posts", query, fields, incremental):
             yield Post(p)
 
-    def get_post_by_slug(self, slug: str) -> Optional["Post"]:
-        return next(
-            filter(
-                lambda p: p.slug == slug,
-                (
-                    map(
-                        lambda u: Post(u),
-                        self.get_all(
-                            "posts", {"status": "draft,publish,pending", "slug": slug}
-                        ),
-                    )
-                ),
-            ),
-            None,
-        )
+    def post_records(
+        self, query: dict = None, lazy_content: bool = False, incremental: bool = False
+    ) -> Iterator[PostRecord]:
+        """
+        returns the posts as compact records, with only the fields used by wp-md.
+        With `lazy_content`, the content and excerpt are not listed, but read per
+        post on first use. With `incremental`, the posts are decoded from the
+        response stream, see `get_all`.
+        """
+        fields = POST_RECORD_FIELDS + ([] if lazy_content else POST_CONTENT_FIELDS)
+        loader = None
+        if lazy_content:
+            params = {"context": query["context"]} if query and "context" in query else {}
+
+            def loader(post_id: int) -> Optional[dict]:
+                return self.get("posts", post_id, params, POST_CONTENT_FIELDS)
+
+        for p in self.get_all("posts", query, fields, incremental):
+            yield PostRecord(p, loader)
+
+    def media_records(self, query: dict = None) -> Iterator[MediumRecord]:
+        for m in self.get_all("media", query, MEDIUM_REFERENCE_FIELDS):
+            yield MediumRecord(m)
+
+    def user_records(self, query: dict = None) -> Iterator[UserRecord]:
+        for u in self.get_all("users", query, ["id", "name", "slug", "email"]):
+            yield UserRecord(u)
 
-    def media(self) -> List[Medium]:
+    def get_post_by_slug(
+        self, slug: str, fields: Optional[List[str]] = POST_REFERENCE_FIELDS
+    ) -> Optional["Post"]:
+        return self.get_posts_by_slugs([slug], fields).get(slug)
+
+    def get_posts_by_slugs(
+        self, slugs: List[str], fields: Optional[List[str]] = POST_REFERENCE_FIELDS
+    ) -> Dict[str, "Post"]:
+        """
+        returns the posts with one of the `slugs`, by slug. The slugs are passed as a
+        list in the `slug` parameter, so that many slugs are resolved in a few
+        requests, which are made concurrently. By default, only the fields needed to
+        refer to the posts are returned, pass `fields=None` for complete posts.
+        """
+        wanted = sorted(set(filter(None, slugs)))
+        if not wanted:
+            return {}
+
+        def get_batch(batch: List[str]) -> List[Post]:
+            query = {"status": "draft,publish,pending", "slug": ",".join(batch)}
+            return [Post(p) for p in self.get_all("posts", query, fields)]
+
+        batches = [
+            wanted[i : i + SLUG_BATCH_SIZE] for i in range(0, len(wanted), SLUG_BATCH_SIZE)
+        ]
+        wanted_slugs = set(wanted)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            posts = itertools.chain.from_iterable(executor.map(get_batch, batches))
+            return {p.slug: p for p in posts if p.slug in wanted_slugs}
+
+    def media(self, fields: Optional[List[str]] = None) -> List[Medium]:
+        if fields:
+            return [Medium(m) for m in self.get_all("media", fields=fields)]
         if not self._media:
             self._media = [Medium(m) for m in self.get_all("media")]
         return self._media
 
+    def taxonomy(self, name: str, refresh: bool = False) -> Dict[str, int]:
+        """
+        returns the slug to id map of the taxonomy `name`, ie. categories or tags.
+
+        The map is read from the local cache, unless it is older than `cache_ttl`
+        seconds or a `refresh` is requested.
+        """
+        if name in self._taxonomies and not refresh:
+            return self._taxonomies[name]
+
+        path = cache_directory(self.endpoint.host, "taxonomies", f"{name}.json")
+        slugs = None
+        if not (refresh or self.refresh_cache):
+            slugs = read_json(path, self.cache_ttl)
+
+        if not isinstance(slugs, dict):
+            slugs = {c["slug"]: c["id"] for c in self.get_all(name)}
+            write_json(path, slugs)
+            self._refreshed.add(name)
+
+        self._taxonomies[name] = slugs
+        self._taxonomies_by_id[name] = {id: slug for slug, id in slugs.items()}
+        return slugs
+
+    def prefetch_taxonomies(self, names: Iterable[str] = TAXONOMIES):
+        """
+        reads the taxonomies `names` concurrently, so that their latency is paid
+        once. Taxonomies which were read before are not read again.
+        """
+        missing = [name for name in names if name not in self._taxonomies]
+        if len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                list(executor.map(self.taxonomy, missing))
+        else:
+            for name in missing:
+                self.taxonomy(name)
+
+    def taxonomy_by_id(self, name: str) -> Dict[int, str]:
+        """
+        returns the id to slug map of the taxonomy `name`.
+        """
+        self.taxonomy(name)
+        return self._taxonomies_by_id[name]
+
+    def get_taxonomy_id(self, name: str, slug: str) -> Optional[int]:
+        """
+        returns the id of the `slug` in the taxonomy `name`. If the slug is unknown
+        and the taxonomy was read from the cache, the taxonomy is fetched once more.
+        """
+        if slug not in self.taxonomy(name) and name not in self._refreshed:
+            self.taxonomy(name, refresh=True)
+        return self.taxonomy(name).get(slug)
+
+    def get_taxonomy_slug(self, name: str, id: int) -> str:
+        """
+        returns the slug of the term `id` in the taxonomy `name`. If the id is unknown
+        and the taxonomy was read from the cache, the taxonomy is fetched once more.
+        """
+        if id not in self.taxonomy_by_id(name) and name not in self._refreshed:
+            self.taxonomy(name, refresh=True)
+        return self.taxonomy_by_id(name)[id]
+
     @property
-    @cache
     def categories(self) -> Dict[str, int]:
-        return {c["slug"]: c["id"] for c in self.get_all("categories")}
+        return self.taxonomy("categories")
 
     @property
-    @cache
     def categories_by_id(self) -> Dict[int, str]:
-        return {id: slug for slug, id in self.categories.items()}
+        return self.taxonomy_by_id("categories")
 
     @property
-    @cache
     def industries_taxonomy(self) -> Dict[str, int]:
-        return {c["slug"]: c["id"] for c in self.get_all("industries_taxonomy")}
+        return self.taxonomy("industries_taxonomy")
 
     @property
-    @cache
-    def industries_taxonomy_by_id(self) -> Dict[str, int]:
-        return {id: slug for slug, id in self.industries_taxonomy.items()}
+    def industries_taxonomy_by_id(self) -> Dict[int, str]:
+        return self.taxonomy_by_id("industries_taxonomy")
 
     @property
-    @cache
     def partners_taxonomy(self) -> Dict[str, int]:
-        return {c["slug"]: c["id"] for c in self.get_all("partners_taxonomy")}
+        return self.taxonomy("partners_taxonomy")
 
     @property
-    @cache
-    def partners_taxonomy_by_id(self) -> Dict[str, int]:
-        return {id: slug for slug, id in self.partners_taxonomy.items()}
+    def partners_taxonomy_by_id(self) -> Dict[int, str]:
+        return self.taxonomy_by_id("partners_taxonomy")
 
     @property
-    @cache
     def capabilities(self) -> Dict[str, int]:
-        return {c["slug"]: c["id"] for c in self.get_all("capabilities")}
+        return self.taxonomy("capabilities")
 
     @property
-    @cache
-    def capabilities_by_id(self) -> Dict[str, int]:
-        return {id: slug for slug, id in self.capabilities.items()}
+    def capabilities_by_id(self) -> Dict[int, str]:
+        return self.taxonomy_by_id("capabilities")
 
     @property
-    @cache
     def tags(self) -> Dict[str, int]:
-        return {c["slug"]: c["id"] for c in self.get_all("tags")}
+        return self.taxonomy("tags")
 
     @property
-    @cache
     def tags_by_id(self) -> Dict[int, str]:
-        return {id: slug for slug, id in self.tags.items()}
+        return self.taxonomy_by_id("tags")
+
+    @property
+    def media_index(self) -> Optional[MediaIndex]:
+        """
+        the local index of the media library, or None if it is not used. On first
+        use, the index is brought up to date with the media modified since the
+        previous update, and once per `cache_ttl` the deleted media are dropped.
+        """
+        if not self.use_media_index:
+            return None
+        with self._media_index_lock:
+            if self._media_index is None:
+                path = cache_directory(self.endpoint.host, "media-index.json")
+                if self.refresh_cache and path.exists():
+                    path.unlink()
+                self._media_index = MediaIndex(path)
+                self.update_media_index(self._media_index)
+                if not self._media_index.reconciled_within(self.cache_ttl):
+                    self.reconcile_media_index(self._media_index)
+            return self._media_index
+
+    def update_media_index(self, index: MediaIndex):
+        """
+        reads the media modified since the last update into the `index`.
+        """
+        query = {}
+        if modified_after := index.modified_after():
+            query["modified_after"] = modified_after
+        index.update(
+            self.get_all("media", query, MEDIA_INDEX_FIELDS), complete=not modified_after
+        )
+        logging.debug("media index of %s has %d media", self.endpoint.host, len(index))
+
+    def reconcile_media_index(self, index: MediaIndex):
+        """
+        drops the media which were deleted on the server from the `index`, by
+        listing the ids of all media.
+        """
+        index.retain(m["id"] for m in self.get_all("media", fields=["id"]))
+        logging.debug("media index of %s has %d media", self.endpoint.host, len(index))
+
+    def _is_indexed(self, medium: dict) -> bool:
+        """
+        returns False if the media index is used and does not hold the `medium`, as
+        it was deleted on the server since it was recorded.
+        """
+        index = self.media_index
+        return index is None or index.get(medium.get("id")) is not None
+
+    def _index_medium(self, medium: Optional[Medium]):
+        if medium and (index := self.media_index) is not None:
+            index.add(medium)
+
+    def _forget_medium(self, medium: Medium):
+        if (index := self.media_index) is not None:
+            index.remove(medium.medium_id)
+
+    def search_for_image_by_slug(self, slug, use_index: bool = True) -> Optional[Medium]:
+        """
+        returns the medium with the `slug` or title. The medium is looked up in the
+        media index, unless `use_index` is False, and searched on the server if it is
+        not in the index.
+        """
+        if use_index and (index := self.media_index) is not None:
+            if medium := index.find_by_slug(slug):
+                return Medium(medium)
 
-    def search_for_image_by_slug(self, slug) -> Optional[Medium]:
         response = self.session.get(
             f"{self.url}/media",
             auth=self.auth,
             headers=self.headers,
-            params={"search": slug},
+            params={"search": slug, "_fields": ",".join(MEDIA_INDEX_FIELDS)},
         )
         if response.status_code == 200:
             matches = map(lambda i: Medium(i), response.json())
-            return next(filter(lambda i: slug in [i.slug, i.title], matches), None)
+            medium = next(filter(lambda i: slug in [i.slug, i.title], matches), None)
+            self._index_medium(medium)
+            return medium
         else:
             return None
 
@@ -502,24 +1267,170 @@ class Wordpress(object):
         assert response.status_code == 200, f"status code {response.status_code}"
         return response.content
 
-    def upload_media(self, slug: str, path: Path) -> Medium:
-        old_content = []
-
-        with open(path, "rb") as file:
-            content = file.read()
+    def download_media(self, url: str, path: Path):
+        """
+        downloads the medium at `url` to `path`.
 
-        stored_image = self.search_for_image_by_slug(slug)
-        if stored_image:
-            response = self.session.get(
-                stored_image.url,
-                headers={"User-Agent": self.headers["User-Agent"]},
-                stream=True,
-                auth=self.auth,
+        The medium is streamed in chunks to a partial file next to `path`, which is
+        renamed to `path` when complete. If the transfer fails, it is resumed from the
+        end of the partial file with a Range request. The If-Range validator ensures
+        that a medium changed in the meantime is downloaded from the start, and a
+        partial file which the server cannot resume (416) is discarded.
+        """
+        path = Path(path)
+        partial = path.with_name(path.name + ".part")
+        validator_path = path.with_name(path.name + ".part.validator")
+        os.makedirs(path.parent, exist_ok=True)
+
+        attempt = 0
+        while True:
+            offset = partial.stat().st_size if partial.exists() else 0
+            headers = self.headers.copy()
+            if offset and validator_path.exists():
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator_path.read_text()
+            try:
+                with self.session.get(
+                    url, headers=headers, stream=True, auth=self.auth
+                ) as response:
+                    if response.status_code == 416 and "Range" in headers:
+                        # the partial file is complete or longer than the medium
+                        logging.info("restarting the download of %s", url)
+                        partial.unlink(missing_ok=True)
+                        validator_path.unlink(missing_ok=True)
+                        continue
+                    if response.status_code not in [200, 206]:
+                        raise WordpressError(
+                            f"failed to get {url}: {response.status_code}",
+                            response.status_code,
+                        )
+                    if response.status_code == 200:
+                        validator = response.headers.get(
+                            "ETag", response.headers.get("Last-Modified")
+                        )
+                        if validator:
+                            validator_path.write_text(validator)
+                        else:
+                            validator_path.unlink(missing_ok=True)
+
+                    mode = "ab" if response.status_code == 206 else "wb"
+                    with open(partial, mode) as file:
+                        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            file.write(chunk)
+                break
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as error:
+                if attempt >= self.session.scheduler.retries:
+                    raise
+                delay = self.session.scheduler.delay(attempt)
+                logging.warning("download of %s failed, %s. resuming in %.1fs", url, error, delay)
+                time.sleep(delay)
+                attempt += 1
+
+        os.replace(partial, path)
+        validator_path.unlink(missing_ok=True)
+
+    def get_media_digest(self, url: str) -> str:
+        """
+        returns the sha256 hex digest of the medium at `url`, without keeping it in memory.
+        """
+        response = self.session.get(
+            url,
+            headers={"User-Agent": self.headers["User-Agent"]},
+            stream=True,
+            auth=self.auth,
+        )
+        if response.status_code != 200:
+            raise WordpressError(
+                f"failed to get {url}: {response.status_code}", response.status_code
             )
-            assert response.status_code == 200
-            old_content = response.content
+        digest = hashlib.sha256()
+        for chunk in response.iter_content(1024 * 1024):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def post_media(self, slug: str, path: Path) -> Medium:
+        """
+        uploads the file `path` as a new medium `slug`.
 
-        if old_content != content:
+        The file is memory-mapped and streamed to Wordpress, so the memory use is
+        bounded whatever the size of the file. The REST API has no resumable uploads:
+        when the connection fails, the upload is retried from a rewound mapping, unless
+        Wordpress turns out to have stored the complete file already.
+        """
+        filename = f"{slug}{path.suffix}"
+        logging.info("uploading image as %s", filename)
+
+        headers = self.headers | {
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Type": mimetypes.guess_type(path)[0],
+        }
+        size = path.stat().st_size
+        with open(path, "rb") as file, _mapped(file, size) as content:
+            attempt = 0
+            while True:
+                try:
+                    response = self.session.post(
+                        f"{self.url}/media/",
+                        data=content,
+                        auth=self.auth,
+                        headers=headers,
+                        params={
+                            "slug": slug,
+                            "title": slug,
+                        },
+                    )
+                    break
+                except requests.ConnectionError as error:
+                    stored_image = self.search_for_image_by_slug(slug, use_index=False)
+                    if stored_image and stored_image.filesize == size:
+                        logging.info("upload of %s completed before the connection failed", filename)
+                        return stored_image
+                    if attempt >= self.session.scheduler.retries:
+                        raise
+                    delay = self.session.scheduler.delay(attempt)
+                    logging.warning("upload of %s failed, %s. retrying in %.1fs", filename, error, delay)
+                    time.sleep(delay)
+                    content.seek(0)
+                    attempt += 1
+
+        if response.status_code not in [200, 201]:
+            raise WordpressError(response.text, response.status_code)
+        return Medium(response.json())
+
+    def upload_media(self, slug: str, path: Path) -> Medium:
+        """
+        uploads the file `path` as medium `slug`, replacing the stored medium if the
+        content is different.
+
+        The sha256 digest of every uploaded medium is recorded in a per-host manifest,
+        so that an unchanged file is recognized without transferring anything. Without
+        a manifest entry, the digest of the stored medium is determined by downloading it.
+        If the media index is used, a recorded medium which is not in the index is
+        looked up again.
+        """
+        digest = file_digest(path)
+        recorded = self.media_manifest.get(slug)
+        if (
+            recorded
+            and recorded.get("sha256") == digest
+            and not self.refresh_cache
+            and self._is_indexed(recorded["medium"])
+        ):
+            self._media[slug] = Medium(recorded["medium"])
+            return self._media[slug]
+
+        stored_image = self.search_for_image_by_slug(slug)
+        try:
+            stored_digest = stored_image and self.get_media_digest(stored_image.url)
+        except WordpressError as error:
+            if error.status_code != 404:
+                raise
+            # the medium was deleted on the server since it was indexed
+            self._forget_medium(stored_image)
+            stored_image = self.search_for_image_by_slug(slug, use_index=False)
+            stored_digest = stored_image and self.get_media_digest(stored_image.url)
+
+        if not stored_image or stored_digest != digest:
             if stored_image:
                 logging.info(
                     "force delete existing image under slug %s, id %s",
@@ -533,51 +1444,102 @@ class Wordpress(object):
                     params={"force": 1},
                 )
                 if delete_response.status_code not in [200, 201, 202]:
-                    raise Exception(delete_response.text)
-
-            filename = f"{slug}{path.suffix}"
-            print(f"INFO: uploading image as {filename}")
-
-            headers = self.headers | {
-                "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Type": mimetypes.guess_type(path)[0],
-            }
-
-            response = self.session.post(
-                f"{self.url}/media/",
-                data=content,
-                auth=self.auth,
-                headers=headers,
-                params={
-                    "slug": slug,
-                    "title": slug,
-                },
-            )
-            if response.status_code not in [200, 201]:
-                raise Exception(response.text)
+                    raise WordpressError(delete_response.text, delete_response.status_code)
+                self._forget_medium(stored_image)
 
-            stored_image = Medium(response.json())
+            stored_image = self.post_media(slug, path)
             self.session.patch(
                 f"{self.url}/media/{stored_image.medium_id}",
             )
-
+            self._index_medium(stored_image)
+
+        self.media_manifest.put(
+            slug,
+            {
+                "sha256": digest,
+                "medium": {k: v for k, v in stored_image.items() if k in _MANIFEST_FIELDS},
+            },
+        )
         self._media[slug] = stored_image
         return self._media[slug]
 
+    def _for_each_file(
+        self, action: str, function: Callable, files: Dict[object, Tuple[str, Path]]
+    ) -> Tuple[Dict[object, object], Dict[object, Exception]]:
+        """
+        calls `function` with the (name, path) of each of the `files` with
+        `concurrency` workers, and returns the results and the errors by key. A
+        failing call does not stop the others.
+        """
+        results, errors = {}, {}
+        if not files:
+            return results, errors
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(files))) as executor:
+            futures = {
+                key: executor.submit(function, name, path)
+                for key, (name, path) in files.items()
+            }
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as error:
+                    logging.error("failed to %s %s, %s", action, files[key][1], error)
+                    errors[key] = error
+        return results, errors
+
+    def upload_media_files(
+        self, files: Dict[object, Tuple[str, Path]]
+    ) -> Tuple[Dict[object, Medium], Dict[object, Exception]]:
+        """
+        uploads the `files`, a (slug, path) per key, with `concurrency` workers.
+
+        Returns the uploaded media and the errors of the files which failed, by key.
+        """
+        return self._for_each_file("upload", self.upload_media, files)
+
+    def download_media_files(
+        self, files: Dict[object, Tuple[str, Path]]
+    ) -> Tuple[Dict[object, Path], Dict[object, Exception]]:
+        """
+        downloads the `files`, a (url, path) per key, with `concurrency` workers.
+
+        Returns the paths of the downloaded files and the errors of the files which
+        failed, by key.
+        """
+
+        def download(url: str, path: Path) -> Path:
+            self.download_media(url, path)
+            return path
+
+        return self._for_each_file("download", download, files)
+
     def find_image_by_link(self, link: Union[str, ParseResult]) -> Optional[Medium]:
+        """
+        returns the medium at the `link`. The medium is looked up in the media index,
+        and searched on the server if it is not in the index.
+        """
         url = link if isinstance(link, ParseResult) else urlparse(link)
         stem = Path(url.path).stem
 
         if not (self.is_host_for(link) and url.path.startswith("/wp-content/uploads/")):
             return None
 
-        return next(
+        if (index := self.media_index) is not None:
+            if medium := index.find_by_url(url.geturl()):
+                return Medium(medium)
+
+        medium = next(
             filter(
                 lambda m: url.geturl() == m.url,
-                map(lambda m: Medium(m), self.get_all("media", {"search": stem})),
+                map(
+                    lambda m: Medium(m),
+                    self.get_all("media", {"search": stem}, MEDIA_INDEX_FIELDS),
+                ),
             ),
             None,
         )
+        self._index_medium(medium)
+        return medium
 
     def update_post(self, guid: str, properties: dict):
         response = self.session.patch(
@@ -587,7 +1549,7 @@ class Wordpress(object):
             headers=self.headers,
         )
         if response.status_code not in [200, 201]:
-            raise Exception(response.text)
+            raise WordpressError(response.text, response.status_code)
         return Post(response.json())
 
     def create_post(self, properties: dict) -> "Post":
@@ -598,10 +1560,28 @@ class Wordpress(object):
             headers=self.headers,
         )
         if response.status_code not in [200, 201]:
-            raise Exception(response.text)
+            raise WordpressError(response.text, response.status_code)
         return Post(response.json())
 
-    def get_resource_by_url(self, url: str, params: dict = {}) -> Optional[dict]:
+    @property
+    def api_root(self) -> str:
+        return self.url.rsplit("/wp/v2", 1)[0]
+
+    @property
+    def batch_url(self) -> str:
+        return self.api_root + "/batch/v1"
+
+    def batch(self, size: int = BATCH_SIZE) -> "BatchWriter":
+        """
+        returns a writer which sends post creates and updates in batches.
+        """
+        return BatchWriter(self, size)
+
+    def get_resource_by_url(
+        self, url: str, params: dict = {}, fields: Optional[List[str]] = None
+    ) -> Optional[dict]:
+        if fields:
+            params = params | {"_fields": ",".join(fields)}
         response = self.session.get(
             self.normalize_url(url), auth=self.auth, headers=self.headers, params=params
         )
@@ -610,19 +1590,25 @@ class Wordpress(object):
         elif response.status_code == 404:
             return None
         else:
-            raise Exception(response.text)
+            raise WordpressError(response.text, response.status_code)
 
-    def get(self, resource, resource_id, params: dict = {}) -> Optional[dict]:
-        return self.get_resource_by_url(f"{self.url}/{resource}/{resource_id}", params)
+    def get(
+        self, resource, resource_id, params: dict = {}, fields: Optional[List[str]] = None
+    ) -> Optional[dict]:
+        return self.get_resource_by_url(
+            f"{self.url}/{resource}/{resource_id}", params, fields
+        )
 
     def connect(self):
-        global categories
-
-        categories = {c["slug"]: c["id"] for c in self.get_all("categories")}
+        """
+        nothing is requested until it is needed. Use `prefetch_taxonomies` to read
+        the taxonomies upfront.
+        """
+        pass
 
     def get_category_id_by_name(self, category: str) -> str:
-        if category in self.categories:
-            return self.categories[category]
+        if (id := self.get_taxonomy_id("categories", category)) is not None:
+            return id
 
         raise ValueError(
             "invalid category '{}' try one of\n {}".format(
@@ -631,8 +1617,8 @@ class Wordpress(object):
         )
 
     def get_industry_by_name(self, slug: str) -> str:
-        if slug in self.industries_taxonomy:
-            return self.industries_taxonomy[slug]
+        if (id := self.get_taxonomy_id("industries_taxonomy", slug)) is not None:
+            return id
 
         raise ValueError(
             "invalid industry '{}' try one of\n {}".format(
@@ -641,8 +1627,8 @@ class Wordpress(object):
         )
 
     def get_partner_by_name(self, slug: str) -> str:
-        if slug in self.partners_taxonomy:
-            return self.partners_taxonomy[slug]
+        if (id := self.get_taxonomy_id("partners_taxonomy", slug)) is not None:
+            return id
 
         raise ValueError(
             "invalid partner '{}' try one of\n {}".format(
@@ -651,8 +1637,8 @@ class Wordpress(object):
         )
 
     def get_capability_by_name(self, slug: str) -> str:
-        if slug in self.capabilities:
-            return self.capabilities[slug]
+        if (id := self.get_taxonomy_id("capabilities", slug)) is not None:
+            return id
 
         raise ValueError(
             "invalid capability '{}' try one of\n {}".format(
@@ -661,11 +1647,124 @@ class Wordpress(object):
         )
 
     def get_tag_id_by_name(self, tag: str) -> str:
-        if tag in self.tags:
-            return self.tags[tag]
+        if (id := self.get_taxonomy_id("tags", tag)) is not None:
+            return id
 
         raise ValueError(
             "invalid tag '{}' try one of\n {}".format(
                 tag, ",\n ".join(self.tags.keys())
             )
         )
+
+
+class BatchItem(object):
+    """
+    a write queued in a BatchWriter. After the flush, it holds the resulting `post`
+    or the `error`.
+    """
+
+    __slots__ = ("method", "path", "body", "post", "error")
+
+    def __init__(self, method: str, path: str, body: dict):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.post: Optional[Post] = None
+        self.error: Optional[WordpressError] = None
+
+    @property
+    def done(self) -> bool:
+        return self.post is not None or self.error is not None
+
+
+class BatchWriter(object):
+    """
+    queues post creates and updates, and sends them to the Wordpress /batch/v1
+    endpoint, at most `size` per request. Each sub-response is mapped back to its
+    item. If the endpoint is not available (Wordpress < 5.6), the writes are sent
+    one by one.
+
+        with wordpress.batch() as batch:
+            items = [batch.update_post(p.guid, {"status": "publish"}) for p in posts]
+        failed = [i for i in items if i.error]
+    """
+
+    def __init__(self, wordpress: Wordpress, size: int = BATCH_SIZE):
+        self.wordpress = wordpress
+        self.size = size
+        self.pending: List[BatchItem] = []
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def _queue(self, item: BatchItem) -> BatchItem:
+        self.pending.append(item)
+        if len(self.pending) >= self.size:
+            self.flush()
+        return item
+
+    def create_post(self, properties: dict) -> BatchItem:
+        return self._queue(BatchItem("POST", "/wp/v2/posts", properties))
+
+    def update_post(self, guid: str, properties: dict) -> BatchItem:
+        path = urlparse(guid).path.split("/wp-json", 1)[-1]
+        return self._queue(BatchItem("POST", path, properties))
+
+    def flush(self) -> List[BatchItem]:
+        """
+        sends all queued writes, and returns the items.
+        """
+        items, self.pending = self.pending, []
+        for i in range(0, len(items), self.size):
+            self._send(items[i : i + self.size])
+        return items
+
+    def _send(self, items: List[BatchItem]):
+        wp = self.wordpress
+        response = wp.session.post(
+            wp.batch_url,
+            json={
+                "validation": "normal",
+                "requests": [
+                    {"method": i.method, "path": i.path, "body": i.body} for i in items
+                ],
+            },
+            auth=wp.auth,
+            headers=wp.headers,
+        )
+        if response.status_code == 404:
+            logging.warning("batch endpoint not available, sending writes one by one")
+            for item in items:
+                self._send_single(item)
+            return
+        if response.status_code not in [200, 207]:
+            raise WordpressError(response.text, response.status_code)
+
+        responses = response.json().get("responses", [])
+        for item, result in itertools.zip_longest(items, responses):
+            if item is None:
+                break
+            if result is None:
+                item.error = WordpressError("no response in batch")
+                continue
+            status, body = result.get("status"), result.get("body", {})
+            if status in [200, 201]:
+                item.post = Post(body)
+            else:
+                item.error = WordpressError(
+                    body.get("message", body) if isinstance(body, dict) else body, status
+                )
+
+    def _send_single(self, item: BatchItem):
+        wp = self.wordpress
+        try:
+            if item.path == "/wp/v2/posts":
+                item.post = wp.create_post(item.body)
+            else:
+                item.post = wp.update_post(wp.api_root + item.path, item.body)
+        except WordpressError as error:
+            item.error = error
@@ -0,0 +1,487 @@
+import asyncio
+import base64
+import hashlib
+import json
+import itertools
+import logging
+import mimetypes
+import os
+from collections import deque
+from contextlib import aclosing, nullcontext
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError as error:  # pragma: no cover
+    raise ImportError(
+        "AsyncWordpress requires aiohttp, install wordpress-markdown-blog-loader[async]"
+    ) from error
+
+from wordpress_markdown_blog_loader.api import (
+    _MANIFEST_FIELDS,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RETRIES,
+    MAX_PAGE_SIZE,
+    POST_REFERENCE_FIELDS,
+    TAXONOMIES,
+    Medium,
+    PermissionDenied,
+    Post,
+    RequestScheduler,
+    User,
+    WordpressEndpoint,
+    WordpressError,
+)
+from wordpress_markdown_blog_loader.cache import JsonCache, cache_directory, file_digest
+
+DEFAULT_POOL_SIZE = 100
+
+
+class AsyncWordpress(object):
+    """
+    asyncio client for the Wordpress REST API, with the same surface as `Wordpress`.
+
+    All requests share a connection pool of at most `pool_size` connections, and at
+    most `concurrency` requests are in flight per host. Requests are paced and
+    retried by the same RequestScheduler as those of `Wordpress`, and media are
+    uploaded the same way: streamed from the file, and compared by the sha256
+    digests in the per-host media manifest. Use it as an async context manager:
+
+        async with AsyncWordpress("xebia.com") as wp:
+            async for post in wp.posts():
+                ...
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = DEFAULT_RETRIES,
+        refresh_cache: bool = False,
+    ):
+        self.endpoint = WordpressEndpoint.load(host)
+        self.app_version = os.getenv("APP_VERSION", "0.0.0")
+        self.concurrency = max(1, concurrency)
+        self.pool_size = max(self.concurrency, pool_size)
+        self.headers = {
+            "accept": "application/json",
+            "User-Agent": "wordpress-blog-uploader/" + self.app_version,
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.scheduler = RequestScheduler(retries)
+        self.refresh_cache = refresh_cache
+        self.media_manifest = JsonCache(cache_directory(self.endpoint.host, "media.json"))
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._taxonomies: Dict[str, Dict[str, int]] = {}
+        self._media: Dict[str, Medium] = {}
+
+    async def __aenter__(self) -> "AsyncWordpress":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if not self._session:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size, limit_per_host=self.concurrency
+                ),
+                headers=self.headers | {"Authorization": self.authorization},
+            )
+        return self._session
+
+    @property
+    def authorization(self) -> str:
+        credentials = f"{self.endpoint.username}:{self.endpoint.password}"
+        return "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+
+    @property
+    def url(self) -> str:
+        return self.endpoint.url
+
+    def normalize_url(self, url: str) -> str:
+        return self.endpoint.normalize_url(url)
+
+    def is_host_for(self, url) -> bool:
+        return self.endpoint.is_host_for(url)
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[host]
+
+    async def request(self, method: str, url: str, **kwargs) -> (int, dict, bytes):
+        """
+        performs the request, limiting the number of concurrent requests to the host,
+        and returns the status, headers and body of the response.
+        """
+        return await self._send(method, url, aiohttp.ClientResponse.read, **kwargs)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        read: Callable[[aiohttp.ClientResponse], Awaitable],
+        **kwargs,
+    ):
+        """
+        performs the request through the scheduler, and returns the status, headers
+        and the result of `read` of the response. A Path as `data` is streamed from
+        the file, which is opened again for every attempt.
+        """
+        host = urlparse(url).netloc
+        data = kwargs.pop("data", None)
+        attempt = 0
+        while True:
+            if (delay := self.scheduler.reserve(host)) > 0:
+                await asyncio.sleep(delay)
+            try:
+                async with self._semaphore(url):
+                    with open(data, "rb") if isinstance(data, Path) else nullcontext() as file:
+                        async with self.session.request(
+                            method, url, data=file or data, **kwargs
+                        ) as response:
+                            status, headers = response.status, response.headers
+                            retry = status in self.scheduler.RETRY_STATUS and (
+                                self.scheduler.should_retry(method, status, attempt)
+                            )
+                            if not retry:
+                                if status not in self.scheduler.RETRY_STATUS:
+                                    self.scheduler.succeeded(host)
+                                return status, headers, await read(response)
+                            delay = self.scheduler.delay(attempt, response)
+                logging.warning(
+                    "%s %s returned %s, retrying in %.1fs", method, url, status, delay
+                )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                if not self.scheduler.should_retry(method, None, attempt):
+                    raise
+                delay = self.scheduler.delay(attempt)
+                logging.warning("%s %s failed, %s. retrying in %.1fs", method, url, error, delay)
+            self.scheduler.throttled(host, delay)
+            attempt += 1
+
+    async def get_page(self, resource: str, params: dict, page: int) -> (list, dict):
+        status, headers, body = await self.request(
+            "GET", f"{self.url}/{resource}", params=params | {"page": str(page)}
+        )
+        if status != 200:
+            msg = f"failed to get all {resource}: {status}, {body.decode('utf-8', 'replace')}"
+            if status in [401, 403]:
+                raise PermissionDenied(msg, status)
+            raise WordpressError(msg, status)
+        return _json(body), headers
+
+    async def get_all(
+        self, resource: str, query: dict = None, fields: Optional[List[str]] = None
+    ) -> AsyncIterator[dict]:
+        """
+        yields all objects of the `resource` in page order, with only the `fields` if
+        specified. After the first page, the remaining pages are requested
+        concurrently.
+        """
+        params = query.copy() if query else {}
+        params["per_page"] = str(MAX_PAGE_SIZE)
+        if fields:
+            params["_fields"] = ",".join(fields)
+
+        objects, headers = await self.get_page(resource, params, 1)
+        for o in objects:
+            yield o
+
+        total_pages = int(headers.get("X-WP-TotalPages", 1))
+        pages = iter(range(2, total_pages + 1))
+        pending = deque(
+            asyncio.ensure_future(self.get_page(resource, params, page))
+            for page in itertools.islice(pages, self.concurrency)
+        )
+        try:
+            while pending:
+                objects, _ = await pending.popleft()
+                if (page := next(pages, None)) is not None:
+                    pending.append(
+                        asyncio.ensure_future(self.get_page(resource, params, page))
+                    )
+                for o in objects:
+                    yield o
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def users(self, query: dict = None) -> List[User]:
+        return [User(u) async for u in self.get_all("users", query)]
+
+    async def get_user_by_id(self, resource_id) -> User:
+        return User(await self.get("users", resource_id))
+
+    async def get_unique_user_by_name(
+        self, name: str, email: Optional[str], author_id: Optional[str]
+    ) -> User:
+        user = await self.get_user_by_id("me")
+        if user and user.name == name:
+            return user
+
+        try:
+            users = await self.users({"search": name, "context": "edit"})
+        except PermissionDenied:
+            logging.warning("Permission denied to read user email addresses")
+            users = await self.users({"search": name})
+
+        if len(users) == 0:
+            raise ValueError(f"author '{name}' not found on {self.endpoint.host}")
+        elif len(users) == 1:
+            return users[0]
+
+        for u in users:
+            if (author_id and u.slug == author_id) or (
+                not author_id and email and u.email and u.email.lower() == email.lower()
+            ):
+                return u
+
+        candidates = ", ".join(["{} / {}".format(u.slug, u.email) for u in users])
+        if author_id:
+            raise ValueError(
+                f"Multiple authors named '{name}' found, none with author id {author_id} (possible: {candidates})."
+            )
+        elif email:
+            raise ValueError(
+                f"Multiple authors named '{name}' found, but none with email {email}. (possible: {candidates})."
+            )
+        else:
+            raise ValueError(
+                f"Multiple authors named '{name}' found. (possible: {candidates})."
+            )
+
+    async def posts(
+        self, query: dict = None, fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Post]:
+        async for p in self.get_all("posts", query, fields):
+            yield Post(p)
+
+    async def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        query = {"status": "draft,publish,pending", "slug": slug}
+        async with aclosing(self.posts(query, POST_REFERENCE_FIELDS)) as posts:
+            async for p in posts:
+                if p.slug == slug:
+                    return p
+        return None
+
+    async def get_resource_by_url(self, url: str, params: dict = {}) -> Optional[dict]:
+        status, _, body = await self.request(
+            "GET", self.normalize_url(url), params=params
+        )
+        if status == 200:
+            return _json(body)
+        elif status == 404:
+            return None
+        raise WordpressError(body.decode("utf-8", "replace"), status)
+
+    async def get(self, resource, resource_id, params: dict = {}) -> Optional[dict]:
+        return await self.get_resource_by_url(
+            f"{self.url}/{resource}/{resource_id}", params
+        )
+
+    async def update_post(self, guid: str, properties: dict) -> Post:
+        status, _, body = await self.request(
+            "PATCH", self.normalize_url(guid), json=properties
+        )
+        if status not in [200, 201]:
+            raise WordpressError(body.decode("utf-8", "replace"), status)
+        return Post(_json(body))
+
+    async def create_post(self, properties: dict) -> Post:
+        status, _, body = await self.request(
+            "POST", f"{self.url}/posts", json=properties
+        )
+        if status not in [200, 201]:
+            raise WordpressError(body.decode("utf-8", "replace"), status)
+        return Post(_json(body))
+
+    async def search_for_image_by_slug(self, slug) -> Optional[Medium]:
+        status, _, body = await self.request(
+            "GET", f"{self.url}/media", params={"search": slug}
+        )
+        if status != 200:
+            return None
+        matches = map(lambda i: Medium(i), _json(body))
+        return next(filter(lambda i: slug in [i.slug, i.title], matches), None)
+
+    async def get_media(self, url: str) -> bytes:
+        status, _, body = await self.request("GET", url)
+        assert status == 200, f"status code {status}"
+        return body
+
+    async def get_media_digest(self, url: str) -> str:
+        """
+        returns the sha256 hex digest of the medium at `url`, without keeping it in memory.
+        """
+
+        async def digest(response: aiohttp.ClientResponse) -> Optional[str]:
+            if response.status != 200:
+                return None
+            result = hashlib.sha256()
+            async for chunk in response.content.iter_chunked(1024 * 1024):
+                result.update(chunk)
+            return result.hexdigest()
+
+        status, _, result = await self._send("GET", url, digest)
+        if status != 200:
+            raise WordpressError(f"failed to get {url}: {status}", status)
+        return result
+
+    async def post_media(self, slug: str, path: Path) -> Medium:
+        """
+        uploads the file `path` as a new medium `slug`, streamed from the file. When
+        the connection fails, the upload is retried, unless Wordpress turns out to
+        have stored the complete file already.
+        """
+        filename = f"{slug}{path.suffix}"
+        logging.info("uploading image as %s", filename)
+        size = path.stat().st_size
+        attempt = 0
+        while True:
+            try:
+                status, _, body = await self.request(
+                    "POST",
+                    f"{self.url}/media/",
+                    data=Path(path),
+                    headers={
+                        "Content-Disposition": f'attachment; filename="{filename}"',
+                        "Content-Type": mimetypes.guess_type(path)[0],
+                    },
+                    params={"slug": slug, "title": slug},
+                )
+                break
+            except aiohttp.ClientConnectionError as error:
+                stored_image = await self.search_for_image_by_slug(slug)
+                if stored_image and stored_image.filesize == size:
+                    logging.info("upload of %s completed before the connection failed", filename)
+                    return stored_image
+                if attempt >= self.scheduler.retries:
+                    raise
+                delay = self.scheduler.delay(attempt)
+                logging.warning("upload of %s failed, %s. retrying in %.1fs", filename, error, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+        if status not in [200, 201]:
+            raise WordpressError(body.decode("utf-8", "replace"), status)
+        return Medium(_json(body))
+
+    async def upload_media(self, slug: str, path: Path) -> Medium:
+        """
+        uploads the file `path` as medium `slug`, replacing the stored medium if the
+        content is different. Like `Wordpress.upload_media`, an unchanged file is
+        recognized by the digest in the media manifest without transferring anything.
+        """
+        path = Path(path)
+        digest = await asyncio.to_thread(file_digest, path)
+        recorded = self.media_manifest.get(slug)
+        if recorded and recorded.get("sha256") == digest and not self.refresh_cache:
+            self._media[slug] = Medium(recorded["medium"])
+            return self._media[slug]
+
+        stored_image = await self.search_for_image_by_slug(slug)
+        try:
+            stored_digest = stored_image and await self.get_media_digest(stored_image.url)
+        except WordpressError as error:
+            if error.status_code != 404:
+                raise
+            stored_image, stored_digest = None, None
+
+        if not stored_image or stored_digest != digest:
+            if stored_image:
+                logging.info(
+                    "force delete existing image under slug %s, id %s",
+                    slug,
+                    stored_image.medium_id,
+                )
+                status, _, body = await self.request(
+                    "DELETE",
+                    f"{self.url}/media/{stored_image.medium_id}",
+                    params={"force": "1"},
+                )
+                if status not in [200, 201, 202]:
+                    raise WordpressError(body.decode("utf-8", "replace"), status)
+
+            stored_image = await self.post_media(slug, path)
+
+        self.media_manifest.put(
+            slug,
+            {
+                "sha256": digest,
+                "medium": {k: v for k, v in stored_image.items() if k in _MANIFEST_FIELDS},
+            },
+        )
+        self._media[slug] = stored_image
+        return stored_image
+
+    async def taxonomy(self, name: str) -> Dict[str, int]:
+        """
+        returns the slug to id map of the taxonomy `name`, ie. categories or tags.
+        """
+        if name not in self._taxonomies:
+            self._taxonomies[name] = {
+                c["slug"]: c["id"] async for c in self.get_all(name)
+            }
+        return self._taxonomies[name]
+
+    async def prefetch_taxonomies(self, names: Iterable[str] = TAXONOMIES):
+        """
+        reads the taxonomies `names` concurrently.
+        """
+        await asyncio.gather(*(self.taxonomy(name) for name in names))
+
+    async def categories(self) -> Dict[str, int]:
+        return await self.taxonomy("categories")
+
+    async def tags(self) -> Dict[str, int]:
+        return await self.taxonomy("tags")
+
+    async def capabilities(self) -> Dict[str, int]:
+        return await self.taxonomy("capabilities")
+
+    async def industries_taxonomy(self) -> Dict[str, int]:
+        return await self.taxonomy("industries_taxonomy")
+
+    async def partners_taxonomy(self) -> Dict[str, int]:
+        return await self.taxonomy("partners_taxonomy")
+
+    async def _get_id_by_name(self, taxonomy: str, kind: str, slug: str) -> int:
+        slugs = await self.taxonomy(taxonomy)
+        if slug in slugs:
+            return slugs[slug]
+
+        raise ValueError(
+            "invalid {} '{}' try one of\n {}".format(kind, slug, ",\n ".join(slugs.keys()))
+        )
+
+    async def get_category_id_by_name(self, category: str) -> int:
+        return await self._get_id_by_name("categories", "category", category)
+
+    async def get_industry_by_name(self, slug: str) -> int:
+        return await self._get_id_by_name("industries_taxonomy", "industry", slug)
+
+    async def get_partner_by_name(self, slug: str) -> int:
+        return await self._get_id_by_name("partners_taxonomy", "partner", slug)
+
+    async def get_capability_by_name(self, slug: str) -> int:
+        return await self._get_id_by_name("capabilities", "capability", slug)
+
+    async def get_tag_id_by_name(self, tag: str) -> int:
+        return await self._get_id_by_name("tags", "tag", tag)
+
+
+def _json(body: bytes):
+    return json.loads(body)
@@ -3,7 +3,7 @@ import os
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 from urllib.parse import urlparse, ParseResult
 
 import bs4
@@ -16,11 +16,9 @@ from binx_og_image_generator.generator import Blog as ImageGeneratorBlog
 from markdown import markdown
 
 from wordpress_markdown_blog_loader.api import Post, Medium
-from wordpress_markdown_blog_loader import html_to_gutenberg
+from wordpress_markdown_blog_loader import markdown_to_gutenberg
 from wordpress_markdown_blog_loader.api import Wordpress, WordpressEndpoint
-from wordpress_markdown_blog_loader.remove_newlines import (
-    remove_newlines_from_paragraphs,
-)
+from wordpress_markdown_blog_loader.render_cache import render_cache, render_key
 
 
 class Blog(object):
@@ -30,6 +28,8 @@ class Blog(object):
         self.blog: frontmatter.Post = frontmatter.Post(content="")
         self.uploaded_images: dict[str, Media] = {}
         self.uploaded_audio: dict[str, Medium] = {}
+        self.uploaded_banner: Optional[Medium] = None
+        self.uploaded_og_banner: Optional[Medium] = None
         self.markdown_image_pattern = re.compile(
             r'\!\[(?P<alt_text>[^]]*)\]\((?P<url>.*?)(?P<caption>\s*"[^"]*?")?\)'
         )
@@ -302,6 +302,15 @@ class Blog(object):
 
     @property
     def rendered(self):
+        key = render_key(
+            self.title,
+            self.content,
+            {name: image.url for name, image in self.uploaded_images.items()},
+            {name: audio.url for name, audio in self.uploaded_audio.items()},
+        )
+        return render_cache().render(key, self._render)
+
+    def _render(self) -> str:
         def replace_references(match: re.Match):
             image = self.uploaded_images.get(match.group("url"))
             if image:
@@ -316,7 +325,7 @@ class Blog(object):
             audio = self.uploaded_audio.get(url)
             src = audio.url if audio else url
             # raw block-level HTML; python-markdown passes it through untouched,
-            # and html_to_gutenberg turns it into a wp:audio block.
+            # and markdown_to_gutenberg turns it into a wp:audio block.
             return (
                 f'<figure class="wp-block-audio">'
                 f'<audio controls src="{src}"></audio></figure>'
@@ -324,12 +333,7 @@ class Blog(object):
 
         content = self.markdown_image_pattern.sub(replace_references, self.content)
         content = self.audio_directive_pattern.sub(replace_audio_directive, content)
-        html = markdown(
-            content, extensions=["fenced_code", "attr_list", "tables", "footnotes"],
-        )
-
-        html = remove_newlines_from_paragraphs(html)
-        return html_to_gutenberg.convert(self.title, html)
+        return markdown_to_gutenberg.render(self.title, content)
 
     @property
     def local_image_references(self) -> set[str]:
@@ -373,19 +377,39 @@ class Blog(object):
     ):
         url = urlparse(url) if isinstance(url, str) else url
         logging.info("downloading %s as %s", url.geturl(), path.name)
-        raw = wordpress.get_media(url.geturl())
-        os.makedirs(path.parent, exist_ok=True)
-        with open(path, "wb") as file:
-            file.write(raw)
+        wordpress.download_media(url.geturl(), path)
+
+    def download_media_files(
+        self, wordpress: Wordpress, files: dict[object, tuple[str, Path]]
+    ) -> dict[object, Path]:
+        """
+        downloads the `files`, a (url, path) per key, concurrently. Returns the paths
+        of the files which were downloaded by key; the failures are logged.
+        """
+        for url, path in files.values():
+            logging.info("downloading %s as %s", url, path.name)
+        paths, _ = wordpress.download_media_files(files)
+        return paths
 
     def download_remote_images(self, wp: Wordpress, slug: str = ""):
-        self.downloaded_images: dict[str, Path] = {}
-        for url in self.remote_image_references(wp.endpoint):
+        """
+        downloads the remote images concurrently, and replaces their references by
+        the local paths once all downloads are finished. A reference of which the
+        image failed to download is kept. Images with the same name at different urls
+        are stored as name-2, name-3 and so on.
+        """
+        paths, files = {}, {}
+        for url in sorted(self.remote_image_references(wp.endpoint), key=ParseResult.geturl):
             name = Path(url.path).name.removeprefix(slug)
             name = name.removeprefix(slug)
-            path = Path("images").joinpath(name)
-            self.download_media(url, wp, Path(self.dir).joinpath(path))
-            self.downloaded_images[url.geturl()] = path
+            path, number = Path("images").joinpath(name), 1
+            while path in paths.values():
+                number += 1
+                path = Path("images").joinpath(f"{Path(name).stem}-{number}{Path(name).suffix}")
+            paths[url.geturl()] = path
+            files[url.geturl()] = (url.geturl(), Path(self.dir).joinpath(paths[url.geturl()]))
+        downloaded = self.download_media_files(wp, files)
+        self.downloaded_images: dict[str, Path] = {url: paths[url] for url in downloaded}
 
         def replace_remote_image_references(match: re.Match):
             url = match.group("url")
@@ -401,17 +425,6 @@ class Blog(object):
             replace_remote_image_references, self.content
         )
 
-    def upload_local_images(self, wp: Wordpress):
-        self.uploaded_images = {}
-        for filename in self.local_image_references:
-            path = Path(self.dir).joinpath(filename)
-            if not path.exists():
-                logging.warning("%s does not exist", path)
-                continue
-
-            slug = self.slug + "-" + re.sub(r"[/\.\\]+", "-", path.stem.strip("-"))
-            self.uploaded_images[filename] = wp.upload_media(slug, path)
-
     @property
     def local_audio_references(self) -> set[str]:
         """
@@ -432,21 +445,73 @@ class Blog(object):
             )
         )
 
+    def _media_slug(self, path: Path) -> str:
+        return self.slug + "-" + re.sub(r"[/\.\\]+", "-", path.stem.strip("-"))
+
+    def upload_local_images(self, wp: Wordpress):
+        self.upload_local_media(wp, ["image"])
+
     def upload_local_audio(self, wp: Wordpress):
-        self.uploaded_audio = {}
-        for filename in self.local_audio_references:
-            path = Path(self.dir).joinpath(filename)
-            if not path.exists():
-                logging.warning("%s does not exist", path)
-                continue
+        self.upload_local_media(wp, ["audio"])
+
+    def upload_local_media(
+        self, wp: Wordpress, kinds: Iterable[str] = ("image", "audio", "og-banner", "banner")
+    ):
+        """
+        uploads the local images and audio files, the banner and the og banner of the
+        blog concurrently, or only the media of the `kinds`. A file which fails to
+        upload does not stop the others, and all failures are reported in a single
+        ValueError afterwards. Different files which would be uploaded with the same
+        slug, like foo.png and foo.jpg, raise a ValueError before anything is uploaded.
+        """
+        kinds = set(kinds)
+        files = {}
+        for kind, references in [
+            ("image", self.local_image_references if "image" in kinds else []),
+            ("audio", self.local_audio_references if "audio" in kinds else []),
+        ]:
+            for filename in references:
+                path = Path(self.dir).joinpath(filename)
+                if not path.exists():
+                    logging.warning("%s does not exist", path)
+                    continue
+                files[(kind, filename)] = (self._media_slug(path), path)
+        if self.og_image and "og-banner" in kinds:
+            files[("og-banner", None)] = (f"{self.slug}-og-banner", self.og_image_path)
+        if self.image and "banner" in kinds:
+            files[("banner", None)] = (f"{self.slug}-banner", self.image_path)
+
+        paths_by_slug = {}
+        for slug, path in files.values():
+            paths_by_slug.setdefault(slug, set()).add(Path(path).resolve())
+        duplicates = {slug: paths for slug, paths in paths_by_slug.items() if len(paths) > 1}
+        if duplicates:
+            raise ValueError(
+                f"media of {self.dir} with the same slug: "
+                + ", ".join(
+                    f"{slug}: {', '.join(sorted(map(str, paths)))}"
+                    for slug, paths in duplicates.items()
+                )
+            )
 
-            slug = self.slug + "-" + re.sub(r"[/\.\\]+", "-", path.stem.strip("-"))
-            self.uploaded_audio[filename] = wp.upload_media(slug, path)
+        media, errors = wp.upload_media_files(files)
+        if "image" in kinds:
+            self.uploaded_images = {f: m for (k, f), m in media.items() if k == "image"}
+        if "audio" in kinds:
+            self.uploaded_audio = {f: m for (k, f), m in media.items() if k == "audio"}
+        if "og-banner" in kinds:
+            self.uploaded_og_banner = media.get(("og-banner", None))
+        if "banner" in kinds:
+            self.uploaded_banner = media.get(("banner", None))
+        if errors:
+            raise ValueError(
+                f"failed to upload {len(errors)} media of {self.dir}: "
+                + ", ".join(f"{files[key][1]}: {error}" for key, error in errors.items())
+            )
 
     def to_wordpress(self, wp: Wordpress) -> dict:
         author = wp.get_unique_user_by_name(self.author, self.email, self.author_id)
-        self.upload_local_images(wp)
-        self.upload_local_audio(wp)
+        self.upload_local_media(wp)
         result = {
             "title": self.title,
             "slug": self.slug,
@@ -507,12 +572,12 @@ class Blog(object):
         blog.title = post.title
         blog.author = wordpress.get_user_by_id(post.author).name
         blog.guid = post.guid
-        blog.categories = [wordpress.categories_by_id[c] for c in post.categories]
-        blog.industries = [wordpress.industries_taxonomy_by_id[c] for c in post.industries_taxonomy]
-        blog.partners = [wordpress.partners_taxonomy_by_id[c] for c in post.partners_taxonomy]
-        blog.capabilities = [wordpress.capabilities_by_id[c] for c in post.capabilities]
+        blog.categories = [wordpress.get_taxonomy_slug("categories", c) for c in post.categories]
+        blog.industries = [wordpress.get_taxonomy_slug("industries_taxonomy", c) for c in post.industries_taxonomy]
+        blog.partners = [wordpress.get_taxonomy_slug("partners_taxonomy", c) for c in post.partners_taxonomy]
+        blog.capabilities = [wordpress.get_taxonomy_slug("capabilities", c) for c in post.capabilities]
         if post.tags:
-            blog.tags = [wordpress.tags_by_id[t] for t in post.tags]
+            blog.tags = [wordpress.get_taxonomy_slug("tags", t) for t in post.tags]
         blog.date = post.date
         blog.slug = post.slug
         blog.status = post.status
@@ -532,6 +597,8 @@ class Blog(object):
         if post.og_description:
             blog.og_description = post.og_description
 
+        # the images are referenced once they are downloaded
+        files, images = {}, {}
         if post.featured_media:
             if "acf" not in post:
                 logging.warning(
@@ -540,9 +607,10 @@ class Blog(object):
             featured_media: Medium = Medium(wordpress.get("media", post.featured_media))
             url = urlparse(featured_media.url)
 
-            if not blog.image:
-                blog.image = os.path.join("images", "banner" + Path(url.path).suffix)
-            blog.download_media(url.geturl(), wordpress, path=blog.image_path)
+            images["image"] = blog.image or os.path.join(
+                "images", "banner" + Path(url.path).suffix
+            )
+            files["image"] = (url.geturl(), Path(blog.dir).joinpath(images["image"]))
         else:
             featured_media: Medium = None
 
@@ -552,11 +620,19 @@ class Blog(object):
         if og_image and not (
             featured_media and og_image.geturl() == featured_media.url
         ):
-            if not blog.og_image:
-                blog.og_image = os.path.join(
-                    "images", "og-banner" + Path(og_image.path).suffix
-                )
-            blog.download_media(og_image.geturl(), wordpress, blog.og_image_path)
+            images["og_image"] = blog.og_image or os.path.join(
+                "images", "og-banner" + Path(og_image.path).suffix
+            )
+            files["og_image"] = (
+                og_image.geturl(),
+                Path(blog.dir).joinpath(images["og_image"]),
+            )
+
+        downloaded = blog.download_media_files(wordpress, files)
+        if "image" in downloaded:
+            blog.image = images["image"]
+        if "og_image" in downloaded:
+            blog.og_image = images["og_image"]
 
         if post.excerpt:
             blog.excerpt = markdownify.markdownify(
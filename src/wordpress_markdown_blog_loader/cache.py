@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from os.path import expanduser
+from pathlib import Path
+from typing import Optional
+
+
+def cache_directory(*parts: str, root: Optional[str] = None) -> Path:
+    """
+    returns the local cache directory of wp-md, or the subdirectory `parts` of it.
+
+    The cache is stored in $WP_MD_CACHE_DIR, defaulting to wordpress-markdown-blog-loader
+    in $XDG_CACHE_HOME or ~/.cache.
+
+    >>> cache_directory("xebia.com", "media", root="/tmp/wp-md").as_posix()
+    '/tmp/wp-md/xebia.com/media'
+    """
+    if not root:
+        root = os.getenv("WP_MD_CACHE_DIR")
+    if not root:
+        root = os.path.join(
+            os.getenv("XDG_CACHE_HOME", expanduser("~/.cache")),
+            "wordpress-markdown-blog-loader",
+        )
+    return Path(root).joinpath(*parts)
+
+
+def read_json(path: Path, ttl: Optional[float] = None) -> Optional[object]:
+    """
+    returns the json content of `path`, or None if the file does not exist, is
+    unreadable or was written more than `ttl` seconds ago.
+    """
+    try:
+        if ttl is not None and time.time() - path.stat().st_mtime > ttl:
+            return None
+        with open(path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as error:
+        logging.debug("ignoring cache file %s, %s", path, error)
+        return None
+
+
+def write_json(path: Path, content: object):
+    """
+    writes the `content` as json to `path`. The file is replaced atomically, so that
+    concurrent readers never see a partially written file.
+    """
+    write_text(path, json.dumps(content))
+
+
+def write_text(path: Path, text: str):
+    """
+    writes the `text` to `path`, replacing the file atomically.
+    """
+    os.makedirs(path.parent, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(text)
+        os.replace(name, path)
+    except BaseException:
+        os.unlink(name)
+        raise
+
+
+def file_digest(path: Path) -> str:
+    """
+    returns the sha256 hex digest of the file `path`, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JsonCache(object):
+    """
+    a json object stored in `path`, which is read on first use and written on
+    every change. It may be shared by threads.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._content: Optional[dict] = None
+        self._lock = threading.RLock()
+
+    @property
+    def content(self) -> dict:
+        with self._lock:
+            if self._content is None:
+                content = read_json(self.path)
+                self._content = content if isinstance(content, dict) else {}
+            return self._content
+
+    def get(self, key: str, default=None):
+        return self.content.get(key, default)
+
+    def put(self, key: str, value):
+        with self._lock:
+            self.content[key] = value
+            write_json(self.path, self.content)
+
+    def remove(self, key: str):
+        with self._lock:
+            if self.content.pop(key, None) is not None:
+                write_json(self.path, self.content)
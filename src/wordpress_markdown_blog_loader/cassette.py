@@ -0,0 +1,140 @@
+import base64
+import gzip
+import io
+import json
+import logging
+import threading
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict
+
+import requests
+from requests.adapters import BaseAdapter
+
+from wordpress_markdown_blog_loader.stored_response import stored_headers, stored_response
+
+
+class NoRecordedResponse(requests.RequestException):
+    """
+    the cassette has no response for the request.
+    """
+
+
+def _key(method: str, url: str) -> str:
+    return f"{method.upper()} {url}"
+
+
+def _response(
+    request: requests.PreparedRequest, entry: dict, adapter: BaseAdapter
+) -> requests.Response:
+    if "body_base64" in entry:
+        body = base64.b64decode(entry["body_base64"])
+    else:
+        body = entry.get("body", "").encode("utf-8")
+    return stored_response(
+        request,
+        adapter,
+        entry["status"],
+        entry.get("reason"),
+        entry["headers"],
+        io.BytesIO(body),
+        len(body),
+    )
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    transport adapter which appends every request and its response, including the
+    headers and the body, to the gzipped json lines cassette at `path`. The entries
+    are flushed one by one, so a cassette of an interrupted run is still readable.
+
+    The response is read completely before it is returned.
+    """
+
+    def __init__(self, adapter: BaseAdapter, path: Path):
+        super().__init__()
+        self.adapter = adapter
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self.path, "wb")
+        self._lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = self.adapter.send(request, **kwargs)
+        try:
+            body = response.content
+        finally:
+            response.close()
+
+        entry = {
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": stored_headers(response),
+        }
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_base64"] = base64.b64encode(body).decode("ascii")
+
+        line = json.dumps(entry, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self._file.flush(zlib.Z_SYNC_FLUSH)
+        return _response(request, entry, self)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    transport adapter which answers the requests from the cassette at `path`,
+    without network access. Repeated requests for the same method and url are
+    answered in the recorded order, and the last recorded response is repeated once
+    they are exhausted. A request which was not recorded raises NoRecordedResponse.
+    """
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = Path(path)
+        self._responses: Dict[str, Deque[dict]] = {}
+        self._lock = threading.Lock()
+        for entry in read_cassette(self.path):
+            self._responses.setdefault(_key(entry["method"], entry["url"]), deque()).append(
+                entry
+            )
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = _key(request.method, request.url)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise NoRecordedResponse(f"no recorded response for {key}", request=request)
+            entry = responses.popleft() if len(responses) > 1 else responses[0]
+        return _response(request, entry, self)
+
+    def close(self):
+        pass
+
+
+def read_cassette(path: Path) -> list:
+    """
+    returns the entries of the cassette at `path`. An incomplete last entry of an
+    interrupted recording is ignored.
+    """
+    entries = []
+    with gzip.open(path, "rb") as file:
+        try:
+            for line in file:
+                if line.endswith(b"\n"):
+                    entries.append(json.loads(line))
+        except EOFError:
+            logging.debug("cassette %s ends before the end of stream marker", path)
+    return entries
+
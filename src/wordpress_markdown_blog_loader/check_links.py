@@ -27,7 +27,10 @@ import logging
 
 import click
 
-from wordpress_markdown_blog_loader.api import Wordpress, Post
+from wordpress_markdown_blog_loader.api import Wordpress, Post, DEFAULT_CONCURRENCY
+
+# the fields of a post needed to check its links
+CHECKED_FIELDS = ["id", "link", "content"]
 
 
 @click.command(name="check-links")
@@ -38,16 +41,29 @@ from wordpress_markdown_blog_loader.api import Wordpress, Post
     nargs=1,
     help="wordpress host to check blog post links of",
 )
+@click.option(
+    "--concurrency",
+    type=int,
+    default=DEFAULT_CONCURRENCY,
+    show_default=True,
+    help="maximum number of pages fetched in parallel",
+)
+@click.option(
+    "--http-cache",
+    is_flag=True,
+    default=False,
+    help="caches responses locally and only transfers what changed since the last run",
+)
 @click.argument(
     "post-id",
     type=int,
     nargs=-1,
 )
-def command(host: str, post_id: tuple[str]):
+def command(host: str, post_id: tuple[str], concurrency: int, http_cache: bool):
     """
     check for broken links in WordPress posts
     """
-    wordpress = Wordpress(host)
+    wordpress = Wordpress(host, concurrency=concurrency, http_cache=http_cache)
     wordpress.connect()
 
     if post_id:
@@ -55,7 +71,10 @@ def command(host: str, post_id: tuple[str]):
             map(
                 lambda p: Post(p) if p else None,
                 map(
-                    lambda p: wordpress.get("posts", p, ({"context": "edit"})), post_id
+                    lambda p: wordpress.get(
+                        "posts", p, {"context": "edit"}, fields=CHECKED_FIELDS
+                    ),
+                    post_id,
                 ),
             )
         )
@@ -65,7 +84,9 @@ def command(host: str, post_id: tuple[str]):
                 logging.error("post with id %d was not found", post_id[i])
                 exit(1)
     else:
-        posts = wordpress.posts({"context": "edit"})
+        posts = wordpress.posts(
+            {"context": "edit"}, fields=CHECKED_FIELDS, incremental=True
+        )
 
     for post in posts:
         broken_links = check_links(post.content)
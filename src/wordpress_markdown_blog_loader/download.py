@@ -4,8 +4,10 @@ from pathlib import Path
 
 import click
 
-from wordpress_markdown_blog_loader.api import Wordpress, Post
+from wordpress_markdown_blog_loader.api import Wordpress, DEFAULT_CONCURRENCY
 from wordpress_markdown_blog_loader.blog import Blog
+from wordpress_markdown_blog_loader.records import PostRecord
+from wordpress_markdown_blog_loader.sync_state import SyncState
 
 
 @click.command(name="download")
@@ -19,25 +21,67 @@ from wordpress_markdown_blog_loader.blog import Blog
     nargs=1,
     help="to download to",
 )
+@click.option(
+    "--concurrency",
+    type=int,
+    default=DEFAULT_CONCURRENCY,
+    show_default=True,
+    help="maximum number of pages fetched in parallel",
+)
+@click.option(
+    "--refresh-cache",
+    is_flag=True,
+    default=False,
+    help="refetches the locally cached categories, tags and other taxonomies",
+)
+@click.option(
+    "--http-cache",
+    is_flag=True,
+    default=False,
+    help="caches responses locally and only transfers what changed since the last run",
+)
+@click.option(
+    "--full",
+    is_flag=True,
+    default=False,
+    help="downloads and converts all posts, instead of those modified since the last download",
+)
 @click.argument(
     "post-id",
     type=int,
     nargs=-1,
 )
-def command(host: str, directory: str, post_id: tuple[str]):
+def command(
+    host: str,
+    directory: str,
+    post_id: tuple[str],
+    concurrency: int,
+    refresh_cache: bool,
+    http_cache: bool,
+    full: bool,
+):
     """
     WordPress posts as markdown.
 
     Reads all the posts from a Wordpress installation and writes each post as frontmatter
     document. If posts id's are specified, the selected posts are downloaded.
+
+    The modification time of the downloaded posts is recorded in the directory, so
+    that subsequent downloads only read and convert the posts which changed.
     """
-    wordpress = Wordpress(host)
+    wordpress = Wordpress(
+        host,
+        concurrency=concurrency,
+        refresh_cache=refresh_cache,
+        http_cache=http_cache,
+    )
     wordpress.connect()
+    state = SyncState(Path(directory), wordpress.endpoint.host)
 
     if post_id:
         posts = list(
             map(
-                lambda p: Post(p) if p else None,
+                lambda p: PostRecord(p) if p else None,
                 map(
                     lambda p: wordpress.get("posts", p, ({"context": "edit"})), post_id
                 ),
@@ -49,19 +93,43 @@ def command(host: str, directory: str, post_id: tuple[str]):
                 logging.error("post with id %d was not found", post_id[i])
                 exit(1)
     else:
-        posts = wordpress.posts({"context": "edit"})
+        query = {"context": "edit"}
+        if not full and (modified_after := state.modified_after()):
+            logging.info("downloading posts modified after %s", modified_after)
+            query["modified_after"] = modified_after
+        posts = wordpress.post_records(query, incremental=True)
 
-    for post in posts:
-        blog = Blog.from_wordpress(post, directory, wordpress)
-        blog.download_remote_images(wordpress, f"{blog.slug}-" if blog.slug else "")
-        logging.info("writing %s", blog.path)
-        blog.remove_empty_lines()
-        blog.save()
+    incremental = not (full or post_id)
+    latest = None
+    try:
+        for post in posts:
+            if incremental and state.is_unchanged(post.post_id, post.modified_gmt):
+                logging.debug("post %s is unchanged", post.link)
+            else:
+                blog = download_post(post, directory, wordpress)
+                state.synced(post.post_id, post.modified_gmt, blog.path)
+            latest = max(filter(None, [latest, post.modified_gmt]), default=None)
+
+        # only a complete listing moves the watermark
+        if not post_id:
+            state.advance(latest)
+    finally:
+        state.save()
 
-        with open(f"{blog.dir}/index.html", "w") as file:
-            file.write(post.content)
 
-        if "</span>" in blog.content:
-            os.replace(blog.path, Path(blog.dir).joinpath("index.prespan.md"))
-            blog.remove_span_tags()
-            blog.save()
+def download_post(post: PostRecord, directory: str, wordpress: Wordpress) -> Blog:
+    wordpress.prefetch_taxonomies()
+    blog = Blog.from_wordpress(post, directory, wordpress)
+    blog.download_remote_images(wordpress, f"{blog.slug}-" if blog.slug else "")
+    logging.info("writing %s", blog.path)
+    blog.remove_empty_lines()
+    blog.save()
+
+    with open(f"{blog.dir}/index.html", "w") as file:
+        file.write(post.content)
+
+    if "</span>" in blog.content:
+        os.replace(blog.path, Path(blog.dir).joinpath("index.prespan.md"))
+        blog.remove_span_tags()
+        blog.save()
+    return blog
@@ -0,0 +1,355 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from bs4.builder import HTMLParserTreeBuilder
+from bs4.dammit import EntitySubstitution
+
+from wordpress_markdown_blog_loader.html_to_gutenberg import QUOTE_CLASS
+
+# the html.parser conventions of BeautifulSoup, which the output must match
+_BUILDER = HTMLParserTreeBuilder()
+_VOID_ELEMENTS = _BUILDER.empty_element_tags
+_LIST_ATTRIBUTES = _BUILDER.cdata_list_attributes
+_PRESERVE_WHITESPACE = _BUILDER.preserve_whitespace_tags
+_CDATA_CONTAINING = {"script", "style"}
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+_NON_WHITESPACE = re.compile(r"\S+")
+_NUMERIC_REFERENCE = re.compile(r"^([xX][0-9a-fA-F]+|[0-9]+)(.*)$", re.DOTALL)
+_REPLACEMENT_CHARACTER = "\ufffd"
+
+# the prefix and suffix of the serialized strings, by kind
+_STRINGS = {
+    "text": ("", ""),
+    "comment": ("<!--", "-->"),
+    "doctype": ("<!DOCTYPE ", ">\n"),
+    "cdata": ("<![CDATA[", "]]>"),
+    "declaration": ("<?", "?>"),
+    "pi": ("<?", ">"),
+}
+
+
+def _dereference(reference: str) -> str:
+    """
+    returns the text of the numeric character `reference`, as read by
+    BeautifulSoup: references to the C1 controls are read as windows-1252, invalid
+    references as the replacement character, and the text after the number of a
+    reference without semicolon as is.
+
+    >>> _dereference("8217"), _dereference("x2019"), _dereference("146")
+    ('’', '’', '’')
+    >>> _dereference("0"), _dereference("xd800"), _dereference("65bc")
+    ('�', '�', 'Abc')
+    """
+    match = _NUMERIC_REFERENCE.match(reference)
+    if not match:
+        return reference
+    number, extra = match.groups()
+    if number[0] in "xX":
+        numeric = int(number[1:], 16)
+    else:
+        numeric = int(number)
+    if numeric == 0 or numeric > 0x10FFFF or 0xD800 <= numeric <= 0xDFFF:
+        return _REPLACEMENT_CHARACTER + extra
+    if 0x80 <= numeric <= 0x9F:
+        try:
+            return bytes([numeric]).decode("cp1252") + extra
+        except UnicodeDecodeError:
+            pass
+    return chr(numeric) + extra
+
+
+class _Element(object):
+    """
+    an open element, with the serialized children.
+    """
+
+    __slots__ = (
+        "name",
+        "attrs",
+        "pieces",
+        "block",
+        "list",
+        "pre",
+        "figure",
+        "code",
+        "audio",
+        "reparsed",
+        "run",
+    )
+
+    def __init__(self, name: Optional[str], attrs: dict, parent: Optional["_Element"]):
+        self.name = name
+        self.attrs = attrs
+        self.pieces: List[str] = []
+        self.block: Optional[str] = None
+        # the enclosing list block, the pre block and the audio figure block
+        self.list = parent.list if parent else False
+        self.pre = parent.pre if parent else None
+        self.figure = parent.figure if parent else None
+        # whether html_to_gutenberg parses the html of the element again
+        self.reparsed = parent.reparsed if parent else False
+        # the index of the first of the adjacent strings at the end of the pieces
+        self.run: Optional[int] = None
+        # of a pre block: whether its first code element was found
+        self.code = False
+        # of an audio figure block: its first audio element, and later its html
+        self.audio = None
+
+    def serialize(self) -> str:
+        attributes = []
+        for name, value in sorted(self.attrs.items()):
+            if isinstance(value, list):
+                value = " ".join(value)
+            value = EntitySubstitution.quoted_attribute_value(
+                EntitySubstitution.substitute_xml(value)
+            )
+            attributes.append(f" {name}={value}")
+        start = f"<{self.name}{''.join(attributes)}"
+        if self.name in _VOID_ELEMENTS and not self.pieces:
+            return start + "/>"
+        return f"{start}>{''.join(self.pieces)}</{self.name}>"
+
+
+class GutenbergStreamParser(HTMLParser):
+    """
+    converts html to Gutenberg blocks while it is parsed, without building a tree.
+
+    The output is identical to that of html_to_gutenberg.convert, which builds a
+    BeautifulSoup tree with html.parser: the parser events are handled as
+    BeautifulSoup handles them, and the elements are serialized as BeautifulSoup
+    serializes them. Every element is serialized once, when it ends, and a block is
+    wrapped in its comments from its serialization. Where html_to_gutenberg parses
+    the html of a list or a quoted block again, the effect on adjacent strings is
+    reproduced. Only a body inside a pre or textarea is converted differently.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.root = _Element(None, {}, None)
+        self.stack = [self.root]
+        self.open_elements = {}
+        self.preserve_whitespace = 0
+        self.already_closed_empty_element = []
+        self.data = []
+        # the element whose children are the blocks
+        self.container: Optional[_Element] = self.root
+        self.body_seen = False
+        self.blocks: List[str] = []
+
+    @property
+    def current(self) -> _Element:
+        return self.stack[-1]
+
+    def end_data(self, kind: str = "text"):
+        if not self.data:
+            return
+        data = "".join(self.data)
+        self.data = []
+        if not self.preserve_whitespace and all(c in _ASCII_SPACES for c in data):
+            data = "\n" if "\n" in data else " "
+
+        parent = self.current
+        if parent is self.container:
+            # a string block is converted without its prefix, suffix or escapes
+            self.blocks.append(data)
+            return
+        if kind == "text":
+            if parent.run is None and parent.reparsed:
+                parent.run = len(parent.pieces)
+            if parent.name not in _CDATA_CONTAINING:
+                data = EntitySubstitution.substitute_xml(data)
+        else:
+            self._end_run(parent)
+        prefix, suffix = _STRINGS[kind]
+        parent.pieces.append(prefix + data + suffix)
+
+    def _end_run(self, element: _Element):
+        """
+        collapses the adjacent strings at the end of the `element` as html_to_gutenberg
+        does when it parses the html of the element again: they become one string,
+        which is replaced by a single space or newline if it is whitespace only.
+        """
+        run, element.run = element.run, None
+        if run is None or len(element.pieces) - run < 2 or self.preserve_whitespace:
+            return
+        data = "".join(element.pieces[run:])
+        if all(c in _ASCII_SPACES for c in data):
+            element.pieces[run:] = ["\n" if "\n" in data else " "]
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self.end_data()
+        attributes = {}
+        list_attributes = _LIST_ATTRIBUTES.get("*", set()) | _LIST_ATTRIBUTES.get(tag, set())
+        for name, value in attrs:
+            value = "" if value is None else value
+            attributes[name] = (
+                _NON_WHITESPACE.findall(value) if name in list_attributes else value
+            )
+
+        parent = self.current
+        element = _Element(tag, attributes, parent)
+        if tag == "body" and not self.body_seen:
+            self.body_seen = True
+            self.container = element
+            self.blocks = []
+            element.list, element.pre, element.figure, element.reparsed = (
+                False, None, None, False
+            )
+        elif parent is self.container or parent.block == "quote":
+            self._start_block(element)
+            if parent.block == "quote":
+                element.reparsed = True
+        if tag == "code" and element.pre and not element.pre.code:
+            element.pre.code = True
+            attributes.pop("class", None)
+        if tag == "audio" and element.figure and element.figure.audio is None:
+            element.figure.audio = element
+
+        self.stack.append(element)
+        self.open_elements[tag] = self.open_elements.get(tag, 0) + 1
+        if tag in _PRESERVE_WHITESPACE:
+            self.preserve_whitespace += 1
+
+        if tag in _VOID_ELEMENTS and handle_empty_element:
+            self.handle_endtag(tag, check_already_closed=False)
+            self.already_closed_empty_element.append(tag)
+
+    def _start_block(self, element: _Element):
+        name, attrs = element.name, element.attrs
+        if name == "p":
+            element.block = "paragraph"
+        elif name.startswith("h"):
+            element.block = "heading"
+            attrs["class"] = ["wp-block-heading"]
+        elif name == "pre":
+            element.block = "code"
+            element.pre = element
+            if "wp-block-code" in attrs.get("class", []):
+                attrs["class"] = ["wp-block-code"]
+            else:
+                attrs.pop("class", None)
+        elif name in ("ul", "ol"):
+            element.block = "list"
+            element.list = element.reparsed = True
+        elif name == "img":
+            element.block = "image"
+        elif name == "figure" and "wp-block-audio" in attrs.get("class", []):
+            element.block = "audio"
+            element.figure = element
+        elif name == "audio":
+            element.block = "audio"
+        elif name == "blockquote":
+            element.block = "quote"
+            attrs["class"] = [QUOTE_CLASS]
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self.already_closed_empty_element:
+            self.already_closed_empty_element.remove(tag)
+            return
+        self.end_data()
+        if not self.open_elements.get(tag):
+            return
+        while len(self.stack) > 1:
+            element = self._pop()
+            if element.name == tag:
+                break
+
+    def _pop(self) -> _Element:
+        self._end_run(self.current)
+        element = self.stack.pop()
+        self.open_elements[element.name] -= 1
+        if element.name in _PRESERVE_WHITESPACE:
+            self.preserve_whitespace -= 1
+
+        html = element.serialize()
+        if element.name == "li" and element.list:
+            html = f"<!-- wp:list-item -->{html}<!-- /wp:list-item -->"
+        if element.figure and element.figure.audio is element:
+            element.figure.audio = html
+        if element.block:
+            html = self._wrap(element, html)
+
+        if element is self.container:
+            self.container = None
+        elif self.current is self.container:
+            self.blocks.append(html)
+        elif self.current is not self.root or self.container is self.root:
+            self._end_run(self.current)
+            self.current.pieces.append(html)
+        return element
+
+    @staticmethod
+    def _wrap(element: _Element, html: str) -> str:
+        block = element.block
+        if block == "list":
+            params = ['"ordered":true'] if element.name == "ol" else []
+            if classes := element.attrs.get("class"):
+                params.append(f'"className":"{classes[0]}"')
+            block = f"list {{ {', '.join(params)} }}" if params else "list"
+        elif block == "audio":
+            if element.name == "audio":
+                html = f'<figure class="wp-block-audio">{html}</figure>'
+            elif isinstance(element.audio, str):
+                html = f'<figure class="wp-block-audio">{element.audio}</figure>'
+        return f"<!-- wp:{block} -->\n{html}\n<!-- /wp:{block.split()[0]} -->"
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_charref(self, name):
+        self.handle_data(_dereference(name))
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def _handle_string(self, data: str, kind: str):
+        self.end_data()
+        self.handle_data(data)
+        self.end_data(kind)
+
+    def handle_comment(self, data):
+        self._handle_string(data, "comment")
+
+    def handle_decl(self, decl):
+        self._handle_string(decl[len("DOCTYPE ") :], "doctype")
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self._handle_string(data[len("CDATA[") :], "cdata")
+        else:
+            self._handle_string(data, "declaration")
+
+    def handle_pi(self, data):
+        self._handle_string(data, "pi")
+
+    def close(self):
+        super().close()
+        self.end_data()
+        while len(self.stack) > 1:
+            self._pop()
+
+
+def convert_blocks(html_body: str) -> str:
+    """
+    returns the `html_body` as Gutenberg blocks.
+
+    >>> print(convert_blocks('<h2 id="a">Title</h2>\\n<ul><li>one</li></ul>'))
+    <!-- wp:heading -->
+    <h2 class="wp-block-heading" id="a">Title</h2>
+    <!-- /wp:heading -->
+    <BLANKLINE>
+    <BLANKLINE>
+    <!-- wp:list -->
+    <ul><!-- wp:list-item --><li>one</li><!-- /wp:list-item --></ul>
+    <!-- /wp:list -->
+    """
+    parser = GutenbergStreamParser()
+    parser.feed(html_body)
+    parser.close()
+    return "\n".join(parser.blocks)
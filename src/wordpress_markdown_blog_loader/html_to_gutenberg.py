@@ -1,5 +1,7 @@
 from bs4 import BeautifulSoup, NavigableString, Comment
 
+QUOTE_CLASS = "wp-block-quote is-layout-flow wp-block-quote-is-layout-flow"
+
 
 def _wrap_in_gutenberg_comments(element):
     if isinstance(element, (NavigableString, Comment)):
@@ -28,7 +30,7 @@ def _wrap_paragraph(element):
 
 
 def _wrap_quote(element):
-    element["class"] = ["wp-block-quote is-layout-flow wp-block-quote-is-layout-flow"]
+    element["class"] = [QUOTE_CLASS]
     # Wrap nested elements
     for child in list(element.contents):
         if isinstance(child, (NavigableString, Comment)):
@@ -108,20 +110,37 @@ def _wrap_audio(element):
     return f"<!-- wp:audio -->\n{figure}\n<!-- /wp:audio -->"
 
 
-def convert(title, html_body):
+def convert(title, html_body, engine="soup"):
+    """
+    converts the `html_body` to a Gutenberg blog with `title`. The "soup" engine
+    converts a BeautifulSoup tree, the "stream" engine converts the html while it is
+    parsed, with identical output.
+    """
+    if engine == "stream":
+        from wordpress_markdown_blog_loader.gutenberg_stream import convert_blocks
+
+        return document(title, convert_blocks(html_body))
+    if engine != "soup":
+        raise ValueError(f"unknown engine {engine}, use soup or stream")
+
     soup = BeautifulSoup(html_body, "html.parser")
     blocks = []
 
     for element in soup.body.contents if soup.body else soup.contents:
         blocks.append(_wrap_in_gutenberg_comments(element))
 
+    return document(title, "\n".join(blocks))
+
+
+def document(title, blocks):
+    """
+    returns the Gutenberg `blocks` as the content section of a blog with `title`.
+    """
     title = title.replace('"', '\\"')
     hero_block = f'<!-- wp:xebia/blog-hero {{"blogHeroTitle":"{title}","lock":{{"move":true,"remove":true}}}} /-->\n\n'
     content_section_start = "<!-- wp:xebia/content-section -->\n"
     content_section_end = "\n<!-- /wp:xebia/content-section -->"
-    content_section = (
-        '<div class="wp-block-xebia-content-section">' + "\n".join(blocks) + "</div>"
-    )
+    content_section = '<div class="wp-block-xebia-content-section">' + blocks + "</div>"
 
     return hero_block + content_section_start + content_section + content_section_end
 
@@ -0,0 +1,98 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+
+from wordpress_markdown_blog_loader.cache import read_json, write_json
+from wordpress_markdown_blog_loader.stored_response import stored_headers, stored_response
+
+CHUNK_SIZE = 64 * 1024
+
+
+class CachingAdapter(BaseAdapter):
+    """
+    transport adapter which caches the bodies of GET responses with an ETag or
+    Last-Modified validator in `directory`. Subsequent requests for the same url are
+    made conditional, and a 304 Not Modified is answered with the cached body.
+
+    Bodies are streamed to disk, and cached responses are read from disk, so
+    responses of any size can be cached.
+    """
+
+    def __init__(self, adapter: BaseAdapter, directory: Path):
+        super().__init__()
+        self.adapter = adapter
+        self.directory = Path(directory)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET" or "Range" in request.headers:
+            return self.adapter.send(request, **kwargs)
+
+        key = hashlib.sha256(
+            f"{request.url} {request.headers.get('Authorization', '')}".encode("utf-8")
+        ).hexdigest()
+        meta_path = self.directory.joinpath(key[:2], f"{key}.json")
+        body_path = meta_path.with_suffix(".body")
+
+        entry = read_json(meta_path)
+        if entry and body_path.exists():
+            if entry.get("etag"):
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            entry = None
+
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == 304 and entry:
+            logging.debug("%s not modified, serving from cache", request.url)
+            response.content
+            response.close()
+            return self._cached_response(request, entry, body_path)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code != 200 or not (etag or last_modified):
+            return response
+
+        entry = {
+            "url": request.url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": stored_headers(response),
+        }
+        os.makedirs(body_path.parent, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=body_path.parent, prefix=f".{body_path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    file.write(chunk)
+            os.replace(name, body_path)
+        except BaseException:
+            os.unlink(name)
+            raise
+        finally:
+            response.close()
+
+        write_json(meta_path, entry)
+        return self._cached_response(request, entry, body_path)
+
+    def _cached_response(
+        self, request: requests.PreparedRequest, entry: dict, body_path: Path
+    ) -> requests.Response:
+        return stored_response(
+            request,
+            self,
+            200,
+            "OK",
+            entry["headers"],
+            open(body_path, "rb"),
+            body_path.stat().st_size,
+        )
+
+    def close(self):
+        self.adapter.close()
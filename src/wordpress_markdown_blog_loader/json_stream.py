@@ -0,0 +1,81 @@
+import codecs
+import json
+import re
+from typing import Iterable, Iterator
+
+# the characters which change the nesting outside of strings
+_STRUCTURE = re.compile(r'[\[\]{}",]')
+# the characters which end or escape inside strings
+_STRING = re.compile(r'["\\]')
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[object]:
+    """
+    yields the elements of the json array in the utf-8 encoded `chunks`, as soon as
+    each element is complete. Only the text of the current element is kept, so the
+    memory use is bounded by the largest element, not by the array.
+
+    >>> list(iter_json_array([b'[{"a": [1, "]"]', b'}, 2 ,', b' "x", {}]']))
+    [{'a': [1, ']']}, 2, 'x', {}]
+    >>> list(iter_json_array([b" [ ] "]))
+    []
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0  # where scanning continues
+    start = None  # where the current element starts
+    depth = 0
+    in_string = False
+    finished = False
+
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        while True:
+            if in_string:
+                match = _STRING.search(buffer, position)
+                if not match:
+                    position = len(buffer)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        # the escaped character is in the next chunk
+                        position = match.start()
+                        break
+                    position = match.end() + 1
+                    continue
+                in_string = False
+                position = match.end()
+                continue
+
+            match = _STRUCTURE.search(buffer, position)
+            if not match:
+                position = len(buffer)
+                break
+            token = match.group()
+            position = match.end()
+            if finished:
+                raise ValueError(f"unexpected {token!r} after the end of the json array")
+
+            if token == '"':
+                in_string = True
+            elif token in "[{":
+                if depth == 0:
+                    if token != "[" or buffer[: match.start()].strip():
+                        raise ValueError("the json document is not an array")
+                    start = position
+                depth += 1
+            elif token in "]}":
+                depth -= 1
+                if depth == 0:
+                    element = buffer[start : match.start()]
+                    if element.strip():
+                        yield json.loads(element)
+                    buffer, position, start = buffer[position:], 0, None
+                    finished = True
+            elif token == "," and depth == 1:
+                yield json.loads(buffer[start : match.start()])
+                buffer, position, start = buffer[position:], 0, 0
+
+    buffer += decoder.decode(b"", final=True)
+    if not finished or buffer.strip():
+        raise ValueError("incomplete or invalid json array")
@@ -0,0 +1,175 @@
+import threading
+from typing import Optional
+from xml.etree.ElementTree import Comment, Element
+
+import bs4
+from bs4 import BeautifulSoup
+from markdown import Extension, Markdown
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import HTML_PLACEHOLDER_RE
+
+from wordpress_markdown_blog_loader import html_to_gutenberg
+from wordpress_markdown_blog_loader.remove_newlines import (
+    remove_newlines_from_paragraphs,
+)
+
+EXTENSIONS = ["fenced_code", "attr_list", "tables", "footnotes"]
+
+_local = threading.local()
+
+
+class GutenbergTreeprocessor(Treeprocessor):
+    """
+    turns the top level elements of the document into Gutenberg blocks, and removes
+    the newlines from the text of the paragraphs, in a single walk over the tree.
+
+    The blocks are the same as those of html_to_gutenberg.convert, apart from the
+    serialization: void elements end in ` />`, character references are not
+    decoded, raw html blocks are surrounded by extra blank lines, and the newlines
+    in inline html are removed as well. Raw html blocks are only known as text, and
+    are converted by html_to_gutenberg.
+    """
+
+    def run(self, root: Element):
+        for child in self._wrap_children(root):
+            # html_to_gutenberg.convert joins the blocks and the text between them
+            # with newlines
+            child.tail = f"\n{child.tail}\n" if child.tail else "\n"
+
+    def _wrap_children(self, parent: Element) -> list[Element]:
+        """
+        wraps the children of `parent` in block comments, and returns the last
+        element of every child.
+        """
+        children = list(parent)
+        del parent[:]
+        lasts = []
+        for child in children:
+            self._remove_newlines(child)
+            name = self._block(child)
+            if name is None:
+                parent.append(child)
+                lasts.append(child)
+                continue
+            opening, closing = Comment(f" {name} "), Comment(f" /{name.split()[0]} ")
+            opening.tail, closing.tail, child.tail = "\n", child.tail, "\n"
+            parent.extend([opening, child, closing])
+            lasts.append(closing)
+        return lasts
+
+    @staticmethod
+    def _remove_newlines(element: Element):
+        for paragraph in element.iter("p"):
+            if paragraph.text:
+                paragraph.text = paragraph.text.replace("\n", " ")
+            for child in paragraph:
+                if child.tail:
+                    child.tail = child.tail.replace("\n", " ")
+
+    def _block(self, element: Element) -> Optional[str]:
+        """
+        prepares the `element` as a Gutenberg block, and returns the name of the
+        block, or None if it is not wrapped.
+        """
+        tag = element.tag
+        if not isinstance(tag, str):
+            return None
+        if tag == "p":
+            return None if self._is_raw_html(element) else "wp:paragraph"
+        if tag.startswith("h"):
+            element.set("class", "wp-block-heading")
+            return "wp:heading"
+        if tag == "pre":
+            if "wp-block-code" in element.get("class", "").split():
+                element.set("class", "wp-block-code")
+            else:
+                element.attrib.pop("class", None)
+            if (code := element.find("code")) is not None:
+                code.attrib.pop("class", None)
+            return "wp:code"
+        if tag in ("ul", "ol"):
+            return self._list(element)
+        if tag == "img":
+            return "wp:image"
+        if tag == "blockquote":
+            element.set("class", html_to_gutenberg.QUOTE_CLASS)
+            self._wrap_children(element)
+            return "wp:quote"
+        return None
+
+    def _list(self, element: Element) -> str:
+        params = ['"ordered":true'] if element.tag == "ol" else []
+        if classes := element.get("class", "").split():
+            params.append(f'"className":"{classes[0]}"')
+
+        for parent in list(element.iter()):
+            for index in reversed(range(len(parent))):
+                item = parent[index]
+                if item.tag == "li":
+                    opening, closing = Comment(" wp:list-item "), Comment(" /wp:list-item ")
+                    closing.tail, item.tail = item.tail, None
+                    parent[index : index + 1] = [opening, item, closing]
+        return f"wp:list {{ {', '.join(params)} }}" if params else "wp:list"
+
+    def _is_raw_html(self, paragraph: Element) -> bool:
+        """
+        returns True if the `paragraph` is the placeholder of a raw html block, after
+        converting the stashed html to Gutenberg blocks.
+        """
+        match = HTML_PLACEHOLDER_RE.fullmatch(paragraph.text or "")
+        if not match or len(paragraph):
+            return False
+        stash = self.md.htmlStash.rawHtmlBlocks
+        index = int(match.group(1))
+        if index >= len(stash) or not isinstance(stash[index], str):
+            return False
+        if not self.md.postprocessors["raw_html"].isblocklevel(stash[index]):
+            return False
+        html = remove_newlines_from_paragraphs(stash[index])
+        # unlike html_to_gutenberg.convert, html comments are kept as comments
+        stash[index] = "\n".join(
+            f"<!--{element}-->"
+            if isinstance(element, bs4.Comment)
+            else html_to_gutenberg._wrap_in_gutenberg_comments(element)
+            for element in BeautifulSoup(html, "html.parser").contents
+        )
+        return True
+
+
+class GutenbergExtension(Extension):
+    """
+    renders the markdown as Gutenberg blocks.
+    """
+
+    def extendMarkdown(self, md: Markdown):
+        # after the inline patterns, footnotes and prettify treeprocessors
+        md.treeprocessors.register(GutenbergTreeprocessor(md), "gutenberg", 5)
+
+
+def _markdown() -> Markdown:
+    """
+    returns the Markdown instance of the current thread.
+    """
+    md = getattr(_local, "markdown", None)
+    if md is None:
+        md = _local.markdown = Markdown(extensions=[*EXTENSIONS, GutenbergExtension()])
+    return md
+
+
+def render(title: str, content: str) -> str:
+    """
+    returns the markdown `content` as a Gutenberg blog with `title`.
+
+    >>> print(render("Hello", "Some\\ntext"))  # doctest: +NORMALIZE_WHITESPACE
+    <!-- wp:xebia/blog-hero {"blogHeroTitle":"Hello","lock":{"move":true,"remove":true}} /-->
+    <!-- wp:xebia/content-section -->
+    <div class="wp-block-xebia-content-section"><!-- wp:paragraph -->
+    <p>Some text</p>
+    <!-- /wp:paragraph --></div>
+    <!-- /wp:xebia/content-section -->
+    """
+    md = _markdown()
+    try:
+        return html_to_gutenberg.document(title, md.convert(content))
+    finally:
+        md.reset()
@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from wordpress_markdown_blog_loader.cache import read_json, write_json
+from wordpress_markdown_blog_loader.sync_state import WATERMARK_MARGIN
+
+# the number of changes appended to the journal before the index is rewritten
+JOURNAL_LIMIT = 1000
+
+
+def compact(medium: dict) -> dict:
+    """
+    returns the properties of the `medium` used by the lookups of the index.
+
+    >>> compact({"id": 1, "slug": "a", "link": "l", "title": {"rendered": "A"},
+    ...          "media_details": {"filesize": 3, "sizes": {"thumbnail": {}}}})
+    {'id': 1, 'slug': 'a', 'title': {'rendered': 'A'}, 'media_details': {'filesize': 3}}
+    """
+    result = {k: medium[k] for k in ("id", "slug") if k in medium}
+    for name in ("title", "guid"):
+        if (value := (medium.get(name) or {}).get("rendered")) is not None:
+            result[name] = {"rendered": value}
+    for name in ("source_url", "modified_gmt"):
+        if name in medium:
+            result[name] = medium[name]
+    if (filesize := (medium.get("media_details") or {}).get("filesize")) is not None:
+        result["media_details"] = {"filesize": filesize}
+    return result
+
+
+class MediaIndex(object):
+    """
+    an index of the media library of a host by url, slug, title and id, stored as
+    json in `path`.
+
+    The index is kept up to date incrementally: `modified_after` returns the moment
+    from which changes have to be read, and `update` merges the changed media.
+    Deleted media are not listed as changes; they are dropped by `retain`, with the
+    ids of all media on the server. Only the properties used by the lookups are
+    stored, see `compact`.
+
+    Single changes by `add` and `remove` are appended to a journal next to `path`,
+    which is merged into the index by `save`, at the latest after JOURNAL_LIMIT
+    changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.journal = self.path.with_name(self.path.name + ".log")
+        self._lock = threading.RLock()
+        content = read_json(self.path)
+        content = content if isinstance(content, dict) else {}
+        self.watermark: Optional[str] = content.get("watermark")
+        # the time of the last complete listing of the media
+        self.reconciled: Optional[float] = content.get("reconciled")
+        self._media = {}
+        self._by_url = {}
+        self._by_slug = {}
+        self._by_title = {}
+        for medium in content.get("media", []):
+            self._put(medium)
+        self._journal_entries = self._replay()
+
+    def __len__(self) -> int:
+        return len(self._media)
+
+    def _replay(self) -> int:
+        """
+        applies the changes in the journal, and returns their number.
+        """
+        entries = 0
+        try:
+            with open(self.journal, "r") as file:
+                for line in file:
+                    entry = json.loads(line)
+                    if "put" in entry:
+                        self._put(entry["put"])
+                    elif medium := self._media.pop(entry.get("remove"), None):
+                        self._remove_keys(medium)
+                    entries += 1
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as error:
+            logging.debug("ignoring the rest of journal %s, %s", self.journal, error)
+        return entries
+
+    def _append(self, entry: dict):
+        with self._lock:
+            os.makedirs(self.path.parent, exist_ok=True)
+            with open(self.journal, "a") as file:
+                file.write(json.dumps(entry) + "\n")
+            self._journal_entries += 1
+            if self._journal_entries >= JOURNAL_LIMIT:
+                self.save()
+
+    def _keys(self, medium: dict):
+        for url in [medium.get("guid", {}).get("rendered"), medium.get("source_url")]:
+            yield self._by_url, url
+        yield self._by_slug, medium.get("slug")
+        yield self._by_title, medium.get("title", {}).get("rendered")
+
+    def _add_keys(self, medium: dict):
+        for keys, key in self._keys(medium):
+            if key:
+                keys[key] = medium
+
+    def _remove_keys(self, medium: dict):
+        for keys, key in self._keys(medium):
+            if key and keys.get(key) is medium:
+                del keys[key]
+
+    def modified_after(self) -> Optional[str]:
+        """
+        returns the value for the modified_after query parameter to read the changes
+        since the last update, or None if the index is empty.
+        """
+        if not self.watermark:
+            return None
+        return (datetime.fromisoformat(self.watermark) - WATERMARK_MARGIN).isoformat()
+
+    def update(self, media: Iterable[dict], complete: bool = False):
+        """
+        merges the `media` into the index, and moves the watermark to the latest
+        modification. If the media are `complete`, the media which are not listed
+        are dropped.
+        """
+        with self._lock:
+            ids = set()
+            for medium in media:
+                self._put(medium)
+                ids.add(medium["id"])
+                modified = medium.get("modified_gmt")
+                if modified and (not self.watermark or modified > self.watermark):
+                    self.watermark = modified
+            if complete:
+                self.retain(ids)
+            elif ids or self._journal_entries:
+                self.save()
+
+    def retain(self, ids: Iterable[int]):
+        """
+        drops the media of which the id is not in `ids`, the ids of all media on the
+        server.
+        """
+        with self._lock:
+            ids = set(ids)
+            for medium_id in [i for i in self._media if i not in ids]:
+                self._remove_keys(self._media.pop(medium_id))
+            self.reconciled = time.time()
+            self.save()
+
+    def reconciled_within(self, seconds: float) -> bool:
+        """
+        returns True if the deleted media were dropped less than `seconds` ago.
+        """
+        return self.reconciled is not None and time.time() - self.reconciled < seconds
+
+    def add(self, medium: dict):
+        with self._lock:
+            medium = self._put(medium)
+            self._append({"put": medium})
+
+    def remove(self, medium_id: int):
+        with self._lock:
+            if medium := self._media.pop(medium_id, None):
+                self._remove_keys(medium)
+                self._append({"remove": medium_id})
+
+    def _put(self, medium: dict) -> dict:
+        medium = compact(medium)
+        if previous := self._media.get(medium["id"]):
+            self._remove_keys(previous)
+        self._media[medium["id"]] = medium
+        self._add_keys(medium)
+        return medium
+
+    def get(self, medium_id: int) -> Optional[dict]:
+        return self._media.get(medium_id)
+
+    def find_by_url(self, url: str) -> Optional[dict]:
+        return self._by_url.get(url)
+
+    def find_by_slug(self, slug: str) -> Optional[dict]:
+        """
+        returns the medium with the `slug`, or else with `slug` as title.
+        """
+        return self._by_slug.get(slug) or self._by_title.get(slug)
+
+    def save(self):
+        """
+        writes the index, including the changes in the journal.
+        """
+        with self._lock:
+            write_json(
+                self.path,
+                {
+                    "watermark": self.watermark,
+                    "reconciled": self.reconciled,
+                    "media": list(self._media.values()),
+                },
+            )
+            self.journal.unlink(missing_ok=True)
+            self._journal_entries = 0
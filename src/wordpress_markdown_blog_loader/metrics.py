@@ -0,0 +1,176 @@
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from wordpress_markdown_blog_loader.cache import write_text
+
+
+class RequestEvent(object):
+    """
+    a completed attempt of a request: the `status` of the response or the `error`
+    which prevented it, its `duration` in seconds and the number of bytes of the
+    response body, if known. `attempt` counts the retries of the same request.
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "resource",
+        "status",
+        "duration",
+        "bytes",
+        "attempt",
+        "error",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        status: Optional[int],
+        duration: float,
+        bytes: Optional[int] = None,
+        attempt: int = 0,
+        error: Optional[str] = None,
+    ):
+        self.method = method.upper()
+        self.url = url
+        self.resource = resource_of(url)
+        self.status = status
+        self.duration = duration
+        self.bytes = bytes
+        self.attempt = attempt
+        self.error = error
+
+
+def resource_of(url: str) -> str:
+    """
+    returns the resource of the `url`, with the ids replaced, to aggregate requests.
+
+    >>> resource_of("https://xebia.com/wp-json/wp/v2/posts/123?context=edit")
+    'wp/v2/posts/{id}'
+    >>> resource_of("https://xebia.com/wp-json/batch/v1")
+    'batch/v1'
+    >>> resource_of("https://xebia.com/wp-content/uploads/2023/01/banner.png")
+    'uploads'
+    """
+    path = urlparse(url).path
+    if "/wp-json/" in path:
+        parts = path.split("/wp-json/", 1)[1].strip("/").split("/")
+        return "/".join("{id}" if p.isdigit() or p == "me" else p for p in parts)
+    if "/wp-content/uploads/" in path:
+        return "uploads"
+    return path.strip("/") or "/"
+
+
+RequestHook = Callable[[RequestEvent], None]
+
+_hooks: List[RequestHook] = []
+
+
+def add_hook(hook: RequestHook):
+    """
+    registers the `hook` to be called with every request of every Wordpress client.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: RequestHook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def fire(event: RequestEvent, hooks: List[RequestHook] = ()):
+    """
+    calls the `hooks` and the registered hooks with the `event`. A failing hook is
+    logged, and does not fail the request.
+    """
+    for hook in [*hooks, *_hooks]:
+        try:
+            hook(event)
+        except Exception as error:
+            logging.warning("request hook %s failed, %s", hook, error)
+
+
+class Metrics(object):
+    """
+    a request hook which aggregates the number of requests, retries, their duration
+    and bytes per method, resource and status.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, dict] = {}
+
+    def __call__(self, event: RequestEvent):
+        status = str(event.status) if event.status else (event.error or "error")
+        key = (event.method, event.resource, status)
+        with self._lock:
+            series = self._series.setdefault(
+                key, {"count": 0, "retries": 0, "duration_seconds": 0.0, "bytes": 0}
+            )
+            series["count"] += 1
+            series["retries"] += 1 if event.attempt else 0
+            series["duration_seconds"] += event.duration
+            series["bytes"] += event.bytes or 0
+
+    def summary(self) -> dict:
+        """
+        returns the aggregated requests, and their totals.
+        """
+        with self._lock:
+            requests = [
+                {"method": method, "resource": resource, "status": status} | series
+                for (method, resource, status), series in sorted(self._series.items())
+            ]
+        total = {"count": 0, "retries": 0, "duration_seconds": 0.0, "bytes": 0}
+        for series in requests:
+            for name in total:
+                total[name] += series[name]
+        return {"requests": requests, "total": total}
+
+    def to_prometheus(self, prefix: str = "wp_md") -> str:
+        """
+        returns the metrics in the Prometheus text exposition format.
+        """
+        metrics = [
+            ("requests_total", "count", "Wordpress API requests"),
+            ("request_retries_total", "retries", "retried Wordpress API requests"),
+            ("request_duration_seconds_total", "duration_seconds", "time in requests"),
+            ("response_bytes_total", "bytes", "bytes of the response bodies"),
+        ]
+        requests = self.summary()["requests"]
+        lines = []
+        for name, field, description in metrics:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for series in requests:
+                labels = ",".join(
+                    f'{label}="{_escape(series[label])}"'
+                    for label in ["method", "resource", "status"]
+                )
+                lines.append(f"{prefix}_{name}{{{labels}}} {series[field]}")
+        return "\n".join(lines) + "\n"
+
+    def write(
+        self, json_path: Optional[Path] = None, prometheus_path: Optional[Path] = None
+    ):
+        """
+        writes the summary as json to `json_path`, and the metrics as Prometheus
+        textfile to `prometheus_path`.
+        """
+        if json_path:
+            write_text(Path(json_path), json.dumps(self.summary(), indent=2))
+        if prometheus_path:
+            write_text(Path(prometheus_path), self.to_prometheus())
+
+
+def _escape(value: str) -> str:
+    """
+    escapes the label `value` for the Prometheus text format.
+    """
+    return re.sub(r'(["\\])', r"\\\1", str(value)).replace("\n", "\\n")
@@ -0,0 +1,277 @@
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from urllib.parse import ParseResult, urlparse
+
+# the fields of a post read into a PostRecord, besides the content and excerpt
+POST_RECORD_FIELDS = [
+    "id",
+    "slug",
+    "generated_slug",
+    "link",
+    "_links",
+    "title",
+    "status",
+    "author",
+    "date_gmt",
+    "modified_gmt",
+    "featured_media",
+    "categories",
+    "tags",
+    "industries_taxonomy",
+    "partners_taxonomy",
+    "capabilities",
+    "meta",
+    "acf",
+    "permalink_template",
+]
+
+# the fields of a post which are loaded on first use, if they were not read
+POST_CONTENT_FIELDS = ["content", "excerpt"]
+
+_UNLOADED = object()
+
+
+def _parse_gmt(value: Optional[str]) -> Optional[datetime]:
+    """
+    returns the local time of the gmt timestamp `value`.
+
+    >>> _parse_gmt("2023-01-10T12:00:00").astimezone(timezone.utc).isoformat()
+    '2023-01-10T12:00:00+00:00'
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).astimezone()
+
+
+def _format_gmt(value: Optional[datetime]) -> Optional[str]:
+    """
+    returns the gmt timestamp of the time `value`, as in the REST API.
+
+    >>> _format_gmt(_parse_gmt("2023-01-10T12:00:00"))
+    '2023-01-10T12:00:00'
+    """
+    if value is None:
+        return None
+    return value.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _object(**fields) -> Optional[dict]:
+    """
+    returns the `fields` which are set as REST API object, or None if none is set.
+
+    >>> _object(rendered="<p>hi</p>", raw=None)
+    {'rendered': '<p>hi</p>'}
+    """
+    return {k: v for k, v in fields.items() if v is not None} or None
+
+
+class _Record(object):
+    """
+    a compact record of a REST API object. The fields are available as attributes,
+    and the stored fields through `get` by their name and in their shape in the REST
+    API, like `{"rendered": ...}` for a title. Fields which are not stored in the
+    record, like the guid of a post, are not available through `get`.
+    """
+
+    __slots__ = ()
+
+    # REST API names of fields stored under another attribute name
+    _aliases = {}
+
+    # REST API names of fields stored in another shape, with the function which
+    # returns the field in the shape of the REST API
+    _shapes = {}
+
+    def get(self, key: str, default=None):
+        if key in self._shapes:
+            value = self._shapes[key](self)
+            return default if value is None else value
+        attribute = self._aliases.get(key, key)
+        if attribute not in self.__slots__ and not hasattr(type(self), attribute):
+            return default
+        value = getattr(self, attribute)
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.get('id')!r}, slug={self.get('slug')!r})"
+
+
+class PostRecord(_Record):
+    """
+    a compact, slotted representation of a post, with the properties of `Post`.
+
+    The date is parsed once. If the content and excerpt were not read with the
+    post, they are read by the `loader` on first use.
+    """
+
+    __slots__ = (
+        "post_id",
+        "_slug",
+        "generated_slug",
+        "link",
+        "guid",
+        "_title",
+        "status",
+        "author",
+        "date",
+        "modified_gmt",
+        "featured_media",
+        "categories",
+        "tags",
+        "industries_taxonomy",
+        "partners_taxonomy",
+        "capabilities",
+        "meta",
+        "acf",
+        "permalink_template",
+        "_excerpt",
+        "_content",
+        "_raw_content",
+        "_loader",
+    )
+
+    _aliases = {"id": "post_id"}
+
+    _shapes = {
+        "guid": lambda record: None,
+        "_links": lambda record: {"self": [{"href": record.guid}]} if record.guid else None,
+        "title": lambda record: _object(rendered=record._title),
+        "date_gmt": lambda record: _format_gmt(record.date),
+        "content": lambda record: _object(rendered=record.content, raw=record.raw_content),
+        "excerpt": lambda record: _object(rendered=record.excerpt),
+    }
+
+    def __init__(
+        self, properties: dict, loader: Optional[Callable[[int], Optional[dict]]] = None
+    ):
+        self.post_id = int(properties["id"])
+        self._slug = properties.get("slug")
+        self.generated_slug = properties.get("generated_slug")
+        self.link = properties.get("link")
+        self.guid = properties.get("_links", {}).get("self", [{}])[0].get("href")
+        self._title = properties.get("title", {}).get("rendered")
+        self.status = properties.get("status")
+        self.author = properties.get("author")
+        self.date = _parse_gmt(properties.get("date_gmt"))
+        self.modified_gmt = properties.get("modified_gmt")
+        self.featured_media = properties.get("featured_media")
+        self.categories = properties.get("categories", [])
+        self.tags = properties.get("tags", [])
+        self.industries_taxonomy = properties.get("industries_taxonomy", [])
+        self.partners_taxonomy = properties.get("partners_taxonomy", [])
+        self.capabilities = properties.get("capabilities", [])
+        self.meta = properties.get("meta") or {}
+        self.acf = properties.get("acf")
+        self.permalink_template = properties.get("permalink_template")
+        self._loader = None
+        self._excerpt = self._content = self._raw_content = _UNLOADED
+        if "content" in properties:
+            self._set_content(properties)
+        else:
+            self._loader = loader
+
+    def _set_content(self, properties: dict):
+        content = properties.get("content") or {}
+        self._content = content.get("rendered")
+        self._raw_content = content.get("raw")
+        self._excerpt = (properties.get("excerpt") or {}).get("rendered")
+        self._loader = None
+
+    def _load(self):
+        if self._content is _UNLOADED:
+            self._set_content((self._loader(self.post_id) if self._loader else None) or {})
+
+    @property
+    def slug(self) -> Optional[str]:
+        return self._slug if self._slug else self.generated_slug
+
+    @property
+    def title(self) -> Optional[str]:
+        return self._title.replace("&#8211;", "-") if self._title is not None else None
+
+    @property
+    def content(self) -> Optional[str]:
+        self._load()
+        return self._content
+
+    @property
+    def raw_content(self) -> Optional[str]:
+        self._load()
+        return self._raw_content
+
+    @property
+    def excerpt(self) -> Optional[str]:
+        self._load()
+        return self._excerpt
+
+    @excerpt.setter
+    def excerpt(self, excerpt: Optional[str]):
+        self._load()
+        self._excerpt = excerpt
+
+    @property
+    def og_images(self) -> list[ParseResult]:
+        """
+        returns urls to the og:image links
+        """
+        result = []
+        for name in ["rank_math_twitter_image", "rank_math_facebook_image"]:
+            if image := self.meta.get(name):
+                result.append(urlparse(image))
+        return result
+
+    @property
+    def og_description(self) -> Optional[str]:
+        return self.meta.get("rank_math_facebook_description")
+
+
+class MediumRecord(_Record):
+    """
+    a compact, slotted representation of a medium, with the properties of `Medium`.
+    """
+
+    __slots__ = (
+        "medium_id",
+        "slug",
+        "link",
+        "url",
+        "title",
+        "source_url",
+        "mime_type",
+        "filesize",
+    )
+
+    _aliases = {"id": "medium_id"}
+
+    _shapes = {
+        "guid": lambda record: _object(rendered=record.url),
+        "title": lambda record: _object(rendered=record.title),
+        "media_details": lambda record: _object(filesize=record.filesize),
+    }
+
+    def __init__(self, properties: dict):
+        self.medium_id = int(properties["id"])
+        self.slug = properties.get("slug")
+        self.link = properties.get("link")
+        self.url = (properties.get("guid") or {}).get("rendered")
+        self.title = (properties.get("title") or {}).get("rendered")
+        self.source_url = properties.get("source_url")
+        self.mime_type = properties.get("mime_type")
+        self.filesize = (properties.get("media_details") or {}).get("filesize")
+
+
+class UserRecord(_Record):
+    """
+    a compact, slotted representation of a user, with the properties of `User`.
+    """
+
+    __slots__ = ("id", "name", "slug", "email")
+
+    def __init__(self, properties: dict):
+        self.id = properties.get("id")
+        self.name = properties.get("name")
+        self.slug = properties.get("slug")
+        self.email = properties.get("email")
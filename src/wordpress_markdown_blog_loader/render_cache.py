@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Callable, Optional
+
+import markdown
+
+from wordpress_markdown_blog_loader.cache import write_text
+
+MAX_ENTRIES = 256
+
+
+def _library_version() -> str:
+    try:
+        return version("wordpress-markdown-blog-loader")
+    except PackageNotFoundError:
+        return "0.0.0"
+
+
+# the format of the renderings: increment it on every change of the output of
+# Blog._render or markdown_to_gutenberg, as the library version is not changed
+# by unreleased or editable builds
+RENDER_FORMAT = 1
+
+# renderings of another format, version of wp-md or python-markdown are never reused
+VERSION = f"{RENDER_FORMAT}/{_library_version()}/{markdown.__version__}"
+
+
+def render_key(title: str, content: str, images: dict, audio: dict) -> str:
+    """
+    returns the key of the rendering of the markdown `content` with `title`, and
+    the urls of the uploaded `images` and `audio` by local reference.
+
+    >>> render_key("t", "# hi", {}, {}) == render_key("t", "# hi", {}, {})
+    True
+    >>> render_key("t", "# hi", {}, {}) == render_key("t", "# hi", {"a.png": "x"}, {})
+    False
+    """
+    document = json.dumps(
+        [VERSION, title, content, sorted(images.items()), sorted(audio.items())]
+    )
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class RenderCache(object):
+    """
+    a content addressed cache of rendered blogs, holding the `max_entries` most
+    recently used renderings in memory, and all renderings in `directory`, if set.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_entries: int = MAX_ENTRIES):
+        self.directory = Path(directory) if directory else None
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory.joinpath(key[:2], f"{key}.html")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if not self.directory:
+            return None
+        try:
+            html = self._path(key).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            logging.debug("ignoring rendering %s, %s", key, error)
+            return None
+        self._remember(key, html)
+        return html
+
+    def put(self, key: str, html: str):
+        self._remember(key, html)
+        if self.directory:
+            write_text(self._path(key), html)
+
+    def _remember(self, key: str, html: str):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def render(self, key: str, render: Callable[[], str]) -> str:
+        """
+        returns the rendering cached under `key`, or calls `render` and caches it.
+        """
+        html = self.get(key)
+        if html is None:
+            html = render()
+            self.put(key, html)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = RenderCache()
+
+
+def render_cache() -> RenderCache:
+    """
+    returns the render cache used by Blog.rendered.
+    """
+    return _cache
+
+
+def use_directory(directory: Optional[Path]):
+    """
+    stores the renderings of Blog.rendered in `directory` too, or in memory only
+    if None.
+    """
+    _cache.directory = Path(directory) if directory else None
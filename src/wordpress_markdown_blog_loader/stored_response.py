@@ -0,0 +1,46 @@
+from typing import BinaryIO, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# headers describing the transfer of the original response, not the stored body
+TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def stored_headers(response: requests.Response) -> dict:
+    """
+    returns the headers of the `response` which describe its body, to store with it.
+    """
+    return {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower() not in TRANSFER_HEADERS
+    }
+
+
+def stored_response(
+    request: requests.PreparedRequest,
+    adapter: BaseAdapter,
+    status: int,
+    reason: Optional[str],
+    headers: dict,
+    body: BinaryIO,
+    length: int,
+) -> requests.Response:
+    """
+    returns the response to the `request` with the stored `headers` and the `body`
+    of `length` bytes, as sent by the `adapter`.
+    """
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.headers["Content-Length"] = str(length)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.raw = body
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    return response
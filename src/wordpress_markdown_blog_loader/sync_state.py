@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from wordpress_markdown_blog_loader.cache import read_json, write_json
+
+SYNC_STATE_FILE = ".wp-md-sync.json"
+
+# modified_after is compared with the local modification time of the site, so the
+# watermark is moved back far enough to cover any timezone of the site.
+WATERMARK_MARGIN = timedelta(days=1)
+
+
+class SyncState(object):
+    """
+    the state of the download of the posts of `host` into `directory`: the
+    watermark, ie. the latest modified_gmt seen, and per post its modified_gmt and
+    the path of the markdown file it was written to.
+
+    The state is stored in .wp-md-sync.json in the directory, per host.
+    """
+
+    def __init__(self, directory: Path, host: str):
+        self.directory = Path(directory)
+        self.host = host
+        self.path = self.directory.joinpath(SYNC_STATE_FILE)
+        content = read_json(self.path)
+        self._content = content if isinstance(content, dict) else {}
+        state = self._content.get(host, {})
+        self.watermark: Optional[str] = state.get("watermark")
+        self.posts: dict = state.get("posts", {})
+
+    def modified_after(self) -> Optional[str]:
+        """
+        returns the value for the modified_after query parameter, or None if all
+        posts have to be read.
+
+        >>> state = SyncState(Path("/nonexistent"), "xebia.com")
+        >>> state.modified_after() is None
+        True
+        >>> state.watermark = "2023-01-10T12:00:00"
+        >>> state.modified_after()
+        '2023-01-09T12:00:00'
+        """
+        if not self.watermark:
+            return None
+        return (datetime.fromisoformat(self.watermark) - WATERMARK_MARGIN).isoformat()
+
+    def is_unchanged(self, post_id: int, modified_gmt: Optional[str]) -> bool:
+        """
+        returns True if the post was downloaded at `modified_gmt` and its markdown
+        file still exists.
+        """
+        synced = self.posts.get(str(post_id))
+        return bool(
+            modified_gmt
+            and synced
+            and synced.get("modified_gmt") == modified_gmt
+            and self.directory.joinpath(synced.get("path", "")).is_file()
+        )
+
+    def synced(self, post_id: int, modified_gmt: Optional[str], path: Path):
+        """
+        records that the post was downloaded at `modified_gmt` to `path`.
+        """
+        self.posts[str(post_id)] = {
+            "modified_gmt": modified_gmt,
+            "path": Path(path).relative_to(self.directory).as_posix(),
+        }
+
+    def advance(self, modified_gmt: Optional[str]):
+        """
+        moves the watermark to `modified_gmt`, if it is later.
+        """
+        if modified_gmt and (not self.watermark or modified_gmt > self.watermark):
+            self.watermark = modified_gmt
+
+    def save(self):
+        self._content[self.host] = {"watermark": self.watermark, "posts": self.posts}
+        write_json(self.path, self._content)
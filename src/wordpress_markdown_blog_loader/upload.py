@@ -1,16 +1,45 @@
 import logging
 import os
+from contextlib import contextmanager
 from difflib import diff_bytes, unified_diff
+from typing import Dict, Optional
 
 import click
 
-from wordpress_markdown_blog_loader.api import Wordpress, Post
+from wordpress_markdown_blog_loader.api import (
+    DEFAULT_CONCURRENCY,
+    Post,
+    Wordpress,
+    WordpressError,
+)
 from wordpress_markdown_blog_loader.blog import Blog
+from wordpress_markdown_blog_loader import render_cache
+from wordpress_markdown_blog_loader.cache import cache_directory
 from wordpress_markdown_blog_loader.check_links import check_links
 import sys
 
 
-def upsert_post(wp: Wordpress, blog: Blog) -> int:
+@contextmanager
+def forget_author_on_error(wp: Wordpress, blog: Blog):
+    """
+    forgets the user resolved for the author of the `blog` if the post cannot be
+    written, as the cached user may no longer be valid.
+    """
+    try:
+        yield
+    except WordpressError:
+        wp.forget_author(blog.author, blog.email, blog.author_id)
+        raise
+
+
+def upsert_post(
+    wp: Wordpress, blog: Blog, existing_posts: Optional[Dict[str, Post]] = None
+) -> int:
+    """
+    creates or updates the post of the `blog`. The `existing_posts` by slug may be
+    passed in, when they were resolved for a batch of blogs; a created post is added
+    to them.
+    """
 
     if blog.guid:
         if not wp.is_host_for(blog.guid):
@@ -23,22 +52,29 @@ def upsert_post(wp: Wordpress, blog: Blog) -> int:
             )
         wp_post = blog.to_wordpress(wp)
         logging.info("updating blog '%s' %s", blog.title, post.link)
-        post = wp.update_post(blog.guid, wp_post)
+        with forget_author_on_error(wp, blog):
+            post = wp.update_post(blog.guid, wp_post)
     else:
-        existing_post = wp.get_post_by_slug(blog.slug)
+        if existing_posts is None:
+            existing_post = wp.get_post_by_slug(blog.slug)
+        else:
+            existing_post = existing_posts.get(blog.slug)
         if existing_post:
             logging.error(
                 "a post with the same slug already exists, %s", existing_post.guid
             )
             return 1
 
-        post = wp.create_post(blog.to_wordpress(wp))
+        wp_post = blog.to_wordpress(wp)
+        with forget_author_on_error(wp, blog):
+            post = wp.create_post(wp_post)
+        if existing_posts is not None:
+            existing_posts[blog.slug] = post
         blog.guid = post.guid
         blog.save()
         logging.info("uploaded blog '%s' as post %s", blog.title, post.link)
 
-    if blog.og_image:
-        og_image = wp.upload_media(f"{blog.slug}-og-banner", blog.og_image_path)
+    if og_image := blog.uploaded_og_banner:
         post_og_images = set()
         for name in ["rank_math_twitter_image","rank_math_facebook_image"]:
             post_og_images.add(post.get("meta", {}).get(name))
@@ -54,8 +90,7 @@ def upsert_post(wp: Wordpress, blog: Blog) -> int:
                 },
             )
 
-    if blog.image:
-        banner = wp.upload_media(f"{blog.slug}-banner", blog.image_path)
+    if banner := blog.uploaded_banner:
         if post.featured_media != banner.medium_id:
             wp.update_post(blog.guid, {"featured_media": banner.medium_id})
 
@@ -77,36 +112,87 @@ def upsert_post(wp: Wordpress, blog: Blog) -> int:
     default=False,
     help="regenerates the og image for the targeted host",
 )
+@click.option(
+    "--refresh-cache",
+    is_flag=True,
+    default=False,
+    help="refetches the locally cached categories, tags, other taxonomies and authors",
+)
+@click.option(
+    "--concurrency",
+    type=int,
+    default=DEFAULT_CONCURRENCY,
+    show_default=True,
+    help="maximum number of media uploaded in parallel",
+)
+@click.option(
+    "--media-index",
+    is_flag=True,
+    default=False,
+    help="looks up the images in a local index of the media library, built on first use",
+)
 @click.argument(
-    "blog", type=click.Path(exists=True, file_okay=False, readable=True), required=True
+    "blog",
+    type=click.Path(exists=True, file_okay=False, readable=True),
+    required=True,
+    nargs=-1,
 )
-def command(host: str, blog: str, regenerate_og_image: bool):
+def command(
+    host: str,
+    blog: tuple[str],
+    regenerate_og_image: bool,
+    refresh_cache: bool,
+    concurrency: int,
+    media_index: bool,
+):
     """
-    the blog to Wordpress
+    the blogs to Wordpress
 
-    Reads the frontmatter describing the blog from the file index.md in the `blog` directory.
+    Reads the frontmatter describing the blog from the file index.md in each `blog` directory.
     """
-    blog = Blog.load(os.path.join(blog, "index.md"))
-    if not blog.slug:
-        logging.error("slug is required for the blog in %s", blog)
-        exit(1)
-
-    if blog.image and (regenerate_og_image or not blog.og_image):
-        logging.info("generating og:image based on %s", blog.image)
-        if not blog.brand:
-            logging.info("blog brand set to %s", host)
-        elif blog.brand != host:
-            logging.warning("change brand from %s to %s", blog.brand, host)
-
-        blog.brand = host
-        blog.generate_og_image()
-        blog.save()
-
-    wordpress = Wordpress(host)
+    blogs = [Blog.load(os.path.join(b, "index.md")) for b in blog]
+    for blog in blogs:
+        if not blog.slug:
+            logging.error("slug is required for the blog in %s", blog.dir)
+            exit(1)
+
+    directories = {}
+    for blog in blogs:
+        directories.setdefault(blog.slug, []).append(str(blog.dir))
+    for slug, dirs in directories.items():
+        if len(dirs) > 1:
+            logging.error("blogs in %s have the same slug %s", ", ".join(dirs), slug)
+            exit(1)
+
+    for blog in blogs:
+        if blog.image and (regenerate_og_image or not blog.og_image):
+            logging.info("generating og:image based on %s", blog.image)
+            if not blog.brand:
+                logging.info("blog brand set to %s", host)
+            elif blog.brand != host:
+                logging.warning("change brand from %s to %s", blog.brand, host)
+
+            blog.brand = host
+            blog.generate_og_image()
+            blog.save()
+
+    wordpress = Wordpress(
+        host,
+        concurrency=concurrency,
+        refresh_cache=refresh_cache,
+        persist_authors=True,
+        use_media_index=media_index,
+    )
+    render_cache.use_directory(cache_directory("render"))
     wordpress.connect()
+    wordpress.prefetch_taxonomies()
+
+    # resolve the slugs of all new blogs at once, instead of one request per blog
+    existing_posts = wordpress.get_posts_by_slugs([b.slug for b in blogs if not b.guid])
 
     try:
-        upsert_post(wordpress, blog)
+        for blog in blogs:
+            upsert_post(wordpress, blog, existing_posts)
     except ValueError as exception:
         logging.error(exception)
         sys.exit(1)
@@ -0,0 +1,357 @@
+"""
+a local stand-in for the subset of the Wordpress REST API used by wp-md.
+"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from wordpress_markdown_blog_loader.api import TAXONOMIES, WordpressEndpoint
+
+MAX_PER_PAGE = 100
+
+# a 1x1 transparent png
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+
+class FakeWordpress(object):
+    """
+    a threaded http server on localhost answering the posts, media, users and
+    taxonomy resources, with pagination headers, _fields, and the filters used by
+    wp-md. Every request is delayed by `latency` seconds, and a fraction
+    `error_rate` of the GET requests fails with a 503.
+
+    The corpus consists of `posts` posts, each with an image and `paragraphs`
+    paragraphs with links to pages on the server. Use it as a context manager:
+
+        with FakeWordpress(posts=100) as fake:
+            wordpress = Wordpress(endpoint=fake.endpoint())
+    """
+
+    def __init__(
+        self,
+        posts: int = 0,
+        paragraphs: int = 10,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("localhost", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.thread = None
+
+        self.users = {
+            1: {"id": 1, "name": "Admin", "slug": "admin", "email": "admin@localhost"},
+            2: {"id": 2, "name": "Jane Doe", "slug": "jane", "email": "jane@localhost"},
+        }
+        self.terms = {
+            name: {
+                i: {"id": i, "slug": f"{name}-{i}", "name": f"{name} {i}"}
+                for i in range(1, 6)
+            }
+            for name in TAXONOMIES
+        }
+        self.posts = {}
+        self.media = {}
+        self.bodies = {}
+        self.next_id = 100
+        for i in range(posts):
+            self.add_post(i, paragraphs)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://localhost:{self.server.server_port}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/wp-json/wp/v2"
+
+    def endpoint(self) -> WordpressEndpoint:
+        return WordpressEndpoint(
+            host="localhost",
+            api_host="localhost",
+            url=self.url,
+            username="admin",
+            password="password",
+        )
+
+    def write_config(self, directory: Path):
+        """
+        writes a .wordpress.ini for the server to `directory`, for the commands.
+        """
+        Path(directory).joinpath(".wordpress.ini").write_text(
+            "[DEFAULT]\nhost = localhost\n\n"
+            f"[localhost]\nurl = {self.url}\nusername = admin\npassword = password\n"
+        )
+
+    def start(self) -> "FakeWordpress":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeWordpress":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _new_id(self) -> int:
+        with self.lock:
+            self.next_id += 1
+            return self.next_id
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+
+    def add_post(self, i: int, paragraphs: int):
+        slug = f"post-{i}"
+        image = self.add_medium(f"{slug}-image", PNG, "image/png")
+        content = "".join(
+            f'<p>Paragraph {p} of post {i}, see <a href="{self.base_url}/page-{p}/">'
+            f"page {p}</a> for more on this subject.</p>\n"
+            for p in range(paragraphs)
+        )
+        content += f'<figure><img src="{image["source_url"]}" alt="image"/></figure>\n'
+        date = datetime(2023, 1, 1) + timedelta(hours=i)
+        self._save_post(
+            {
+                "title": f"Post {i}",
+                "slug": slug,
+                "status": "publish",
+                "author": 2,
+                "date_gmt": date.isoformat(),
+                "content": content,
+                "excerpt": f"<p>the excerpt of post {i}</p>",
+                "categories": [1 + i % 5],
+                "tags": [1 + i % 3, 4],
+            },
+            modified_gmt=date.isoformat(),
+        )
+
+    def add_medium(self, slug: str, body: bytes, mime_type: str, suffix=".png") -> dict:
+        id = self._new_id()
+        url = f"{self.base_url}/wp-content/uploads/2023/01/{slug}{suffix}"
+        medium = {
+            "id": id,
+            "slug": slug,
+            "title": {"rendered": slug},
+            "link": f"{self.base_url}/{slug}/",
+            "guid": {"rendered": url},
+            "source_url": url,
+            "mime_type": mime_type,
+            "media_details": {"filesize": len(body)},
+            "modified_gmt": self._now(),
+        }
+        with self.lock:
+            self.media[id] = medium
+            self.bodies[urlparse(url).path] = (body, mime_type)
+        return medium
+
+    def _save_post(self, properties: dict, id: Optional[int] = None, modified_gmt=None):
+        with self.lock:
+            post = self.posts.get(id, {}) if id else {}
+        if not post:
+            id = self._new_id()
+            post = {
+                "id": id,
+                "slug": "",
+                "generated_slug": f"post-{id}",
+                "status": "draft",
+                "author": 1,
+                "date_gmt": self._now(),
+                "featured_media": 0,
+                "meta": {},
+                "acf": {},
+                "permalink_template": f"{self.base_url}/%postname%/",
+                "_links": {"self": [{"href": f"{self.url}/posts/{id}"}]},
+                **{name: [] for name in TAXONOMIES},
+            }
+        for name, value in properties.items():
+            if name in ["title", "content", "excerpt"]:
+                value = {"rendered": value, "raw": value}
+            elif name == "meta":
+                value = post.get("meta", {}) | value
+            elif name == "date_gmt":
+                value = value.split("+")[0]
+            post[name] = value
+        post["date"] = post["date_gmt"]
+        post["link"] = f"{self.base_url}/{post['slug'] or post['generated_slug']}/"
+        post["modified_gmt"] = modified_gmt or self._now()
+        with self.lock:
+            self.posts[id] = post
+        return post
+
+    def dispatch(self, method: str, path: str, query: dict, body: bytes, headers) -> tuple:
+        """
+        returns the status, headers and body of the response to the request.
+        """
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if method == "GET" and self.error_rate and self.random.random() < self.error_rate:
+            return 503, {"Retry-After": "0"}, {"code": "unavailable"}
+
+        if path.startswith("/wp-content/uploads/"):
+            if stored := self.bodies.get(path):
+                return 200, {"Content-Type": stored[1]}, stored[0]
+            return 404, {}, {"code": "not_found"}
+        if path == "/wp-json/batch/v1" and method == "POST":
+            return self.batch(json.loads(body))
+        if not path.startswith("/wp-json/wp/v2/"):
+            return 200, {"Content-Type": "text/html"}, b"<html><body>page</body></html>"
+
+        parts = path.removeprefix("/wp-json/wp/v2/").strip("/").split("/")
+        resource, id = parts[0], parts[1] if len(parts) > 1 else None
+        store = self.store(resource)
+        if store is None:
+            return 404, {}, {"code": "rest_no_route"}
+
+        if method == "GET" and id is None:
+            return self.list(resource, store, query)
+        if method == "GET":
+            id = 1 if resource == "users" and id == "me" else int(id)
+            if id not in store:
+                return 404, {}, {"code": "rest_invalid_id"}
+            return 200, {}, self.project(store[id], query)
+        if resource == "posts" and method in ["POST", "PUT", "PATCH"]:
+            if id and int(id) not in store:
+                return 404, {}, {"code": "rest_post_invalid_id"}
+            post = self._save_post(json.loads(body or b"{}"), int(id) if id else None)
+            return (200 if id else 201), {}, post
+        if resource == "media" and method == "POST" and id is None:
+            filename = re.search(r'filename="([^"]+)"', headers.get("Content-Disposition", ""))
+            suffix = Path(filename.group(1)).suffix if filename else ""
+            slug = query.get("slug", [f"medium-{self.next_id}"])[0]
+            medium = self.add_medium(slug, body, headers.get("Content-Type"), suffix)
+            return 201, {}, medium
+        if resource == "media" and method == "POST":
+            return 200, {}, store[int(id)]
+        if resource == "media" and method == "DELETE":
+            with self.lock:
+                medium = self.media.pop(int(id), None)
+            if not medium:
+                return 404, {}, {"code": "rest_post_invalid_id"}
+            return 200, {}, {"deleted": True, "previous": medium}
+        return 405, {}, {"code": "rest_no_route"}
+
+    def store(self, resource: str) -> Optional[dict]:
+        if resource == "posts":
+            return self.posts
+        if resource == "media":
+            return self.media
+        if resource == "users":
+            return self.users
+        return self.terms.get(resource)
+
+    def list(self, resource: str, store: dict, query: dict) -> tuple:
+        with self.lock:
+            objects = sorted(store.values(), key=lambda o: o["id"])
+
+        if resource == "posts":
+            statuses = query.get("status", ["publish"])[0].split(",")
+            objects = [o for o in objects if o["status"] in statuses]
+        if slugs := query.get("slug"):
+            wanted = set(slugs[0].split(","))
+            objects = [o for o in objects if o["slug"] in wanted]
+        if search := query.get("search"):
+            objects = [
+                o for o in objects if search[0] in o.get("slug", "") + o.get("name", "")
+            ]
+        if after := query.get("modified_after"):
+            objects = [o for o in objects if o.get("modified_gmt", "") > after[0]]
+
+        per_page = int(query.get("per_page", ["10"])[0])
+        if per_page > MAX_PER_PAGE:
+            return 400, {}, {"code": "rest_invalid_param"}
+        if "offset" in query:
+            offset = int(query["offset"][0])
+        else:
+            page = int(query.get("page", ["1"])[0])
+            if page > 1 and (page - 1) * per_page >= len(objects):
+                return 400, {}, {"code": "rest_post_invalid_page_number"}
+            offset = (page - 1) * per_page
+
+        headers = {
+            "X-WP-Total": str(len(objects)),
+            "X-WP-TotalPages": str((len(objects) + per_page - 1) // per_page),
+        }
+        page = objects[offset : offset + per_page]
+        return 200, headers, [self.project(o, query) for o in page]
+
+    @staticmethod
+    def project(o: dict, query: dict) -> dict:
+        if query.get("context", ["view"])[0] != "edit":
+            o = {
+                k: ({"rendered": v["rendered"]} if isinstance(v, dict) and "raw" in v else v)
+                for k, v in o.items()
+                if k != "email"
+            }
+        if fields := query.get("_fields"):
+            wanted = {}
+            for field in fields[0].split(","):
+                name, _, nested = field.partition(".")
+                wanted.setdefault(name, set()).add(nested)
+            o = {
+                k: v if "" in wanted[k] or not isinstance(v, dict)
+                else {n: w for n, w in v.items() if n in wanted[k]}
+                for k, v in o.items()
+                if k in wanted
+            }
+        return o
+
+    def batch(self, request: dict) -> tuple:
+        responses = []
+        for r in request["requests"]:
+            path = "/wp-json" + r["path"]
+            status, _, body = self.dispatch(
+                r.get("method", "POST"), path, {}, json.dumps(r.get("body", {})), {}
+            )
+            responses.append({"status": status, "body": body})
+        return 207, {}, {"responses": responses}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_request(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        status, headers, content = self.server.fake.dispatch(
+            self.command, unquote(url.path), parse_qs(url.query), body, self.headers
+        )
+        if not isinstance(content, bytes):
+            content = json.dumps(content).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json; charset=UTF-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
@@ -0,0 +1,773 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from wordpress_markdown_blog_loader import api
+from wordpress_markdown_blog_loader.api import (
+    Wordpress,
+    WordpressEndpoint,
+    WordpressError,
+)
+from wordpress_markdown_blog_loader.http_cache import CachingAdapter
+from wordpress_markdown_blog_loader.media_index import MediaIndex
+from wordpress_markdown_blog_loader.metrics import Metrics
+
+
+def setUpModule():
+    global cache_dir
+    cache_dir = tempfile.TemporaryDirectory()
+    os.environ["WP_MD_CACHE_DIR"] = cache_dir.name
+
+
+def tearDownModule():
+    os.environ.pop("WP_MD_CACHE_DIR", None)
+    cache_dir.cleanup()
+
+
+class StubAdapter(BaseAdapter):
+    """
+    answers requests with the `handler`, which receives the prepared request and
+    returns a tuple (status, headers, body).
+    """
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        if hasattr(request.body, "read"):
+            # a streamed body, as transmitted
+            request.body = request.body.read()
+        with self.lock:
+            self.requests.append(request)
+        status, headers, body = self.handler(request)
+        if not isinstance(body, bytes) and not hasattr(body, "read"):
+            body = json.dumps(body).encode("utf-8")
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = body if hasattr(body, "read") else io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_wordpress(handler, **kwargs) -> (Wordpress, StubAdapter):
+    endpoint = WordpressEndpoint(
+        host="example.com",
+        api_host="example.com",
+        url="https://example.com/wp-json/wp/v2",
+        username="user",
+        password="password",
+    )
+    with mock.patch.object(WordpressEndpoint, "load", return_value=endpoint):
+        wordpress = Wordpress("example.com", **kwargs)
+    adapter = StubAdapter(handler)
+    wordpress.session.mount("https://", adapter)
+    return wordpress, adapter
+
+
+def paged(items: list, delay=lambda offset: 0):
+    def handler(request):
+        query = parse_qs(urlparse(request.url).query)
+        offset, per_page = int(query["offset"][0]), int(query["per_page"][0])
+        time.sleep(delay(offset))
+        body = items[offset : offset + per_page]
+        return 200, {"X-WP-Total": str(len(items))}, body
+
+    return handler
+
+
+def per_page(request) -> int:
+    return int(parse_qs(urlparse(request.url).query)["per_page"][0])
+
+
+class Test_GetAll(unittest.TestCase):
+    def test_single_page(self):
+        wordpress, adapter = stub_wordpress(paged([{"id": 1}, {"id": 2}]))
+        self.assertEqual([{"id": 1}, {"id": 2}], list(wordpress.get_all("posts")))
+        self.assertEqual(1, len(adapter.requests))
+
+    def test_pages_are_returned_in_order(self):
+        items = [{"id": i} for i in range(950)]
+        # later pages answer faster, so they complete out of order
+        handler = paged(items, delay=lambda offset: 0.05 / (1 + offset // 100))
+        wordpress, adapter = stub_wordpress(handler, concurrency=4)
+        self.assertEqual(items, list(wordpress.get_all("posts")))
+        self.assertEqual(10, len(adapter.requests))
+
+    def test_stops_fetching_when_closed(self):
+        items = [{"id": i} for i in range(2000)]
+        wordpress, adapter = stub_wordpress(paged(items), concurrency=2)
+        objects = wordpress.get_all("posts")
+        self.assertEqual({"id": 150}, next(o for o in objects if o["id"] == 150))
+        objects.close()
+        self.assertLessEqual(len(adapter.requests), 4)
+
+    def test_incremental_objects_are_returned_in_order(self):
+        items = [{"id": i, "content": "x" * i} for i in range(950)]
+        wordpress, adapter = stub_wordpress(paged(items), concurrency=3)
+        self.assertEqual(items, list(wordpress.get_all("posts", incremental=True)))
+
+    def test_incremental_objects_are_returned_while_streaming(self):
+        items = [{"id": i, "content": "x" * 100_000} for i in range(3)]
+
+        def handler(request):
+            offset = int(parse_qs(urlparse(request.url).query)["offset"][0])
+            body = json.dumps(items[offset:]).encode("utf-8")
+            # the connection is dropped in the middle of the second object
+            if len(body) > 150_000:
+                body = BrokenStream(body, 150_000)
+            return 200, {"X-WP-Total": "3"}, body
+
+        wordpress, adapter = stub_wordpress(handler)
+        wordpress.session.scheduler.backoff = 0.001
+        objects = wordpress.get_all("posts", incremental=True)
+        self.assertEqual(items[0], next(objects))
+        self.assertEqual(1, len(adapter.requests))
+
+        # the rest of the page is requested again from the first missing object
+        self.assertEqual(items[1:], list(objects))
+        offsets = [parse_qs(urlparse(r.url).query)["offset"][0] for r in adapter.requests]
+        self.assertEqual(["0", "1", "2"], offsets)
+        self.assertEqual(["100", "99", "98"], [str(per_page(r)) for r in adapter.requests])
+
+    def test_incremental_page_size_excludes_consumption(self):
+        items = [{"id": i} for i in range(300)]
+        wordpress, adapter = stub_wordpress(paged(items), concurrency=2)
+        with mock.patch.object(api, "TARGET_PAGE_SECONDS", 0.05):
+            for _ in wordpress.get_all("posts", incremental=True):
+                time.sleep(0.002)
+        self.assertEqual([100, 100, 100], [per_page(r) for r in adapter.requests])
+
+    def test_fields_are_projected(self):
+        wordpress, adapter = stub_wordpress(paged([{"id": 1}]))
+        list(wordpress.get_all("posts", {"context": "edit"}, fields=["id", "link"]))
+        query = parse_qs(urlparse(adapter.requests[0].url).query)
+        self.assertEqual(["id,link"], query["_fields"])
+        self.assertEqual(["edit"], query["context"])
+
+    def test_page_size_follows_response_size(self):
+        items = [{"id": i, "content": "x" * 50_000} for i in range(300)]
+        wordpress, adapter = stub_wordpress(paged(items), concurrency=1)
+        self.assertEqual(items, list(wordpress.get_all("posts")))
+
+        sizes = [per_page(r) for r in adapter.requests]
+        self.assertEqual(100, sizes[0])
+        self.assertTrue(all(size < 100 for size in sizes[1:]), sizes)
+
+        # the learned page size is used by the next query of the same fields
+        adapter.requests.clear()
+        list(wordpress.get_all("posts"))
+        self.assertLess(per_page(adapter.requests[0]), 100)
+
+    def test_cached_pages_are_requested_again(self):
+        items = [{"id": i, "content": "x" * 50_000} for i in range(300)]
+        pages = paged(items)
+
+        def handler(request):
+            etag = f'"{urlparse(request.url).query}"'
+            if request.headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, b""
+            status, headers, body = pages(request)
+            return status, headers | {"ETag": etag}, body
+
+        with tempfile.TemporaryDirectory() as directory:
+            wordpress, adapter = stub_wordpress(handler, concurrency=2, http_cache=True)
+            wordpress.session.mount("https://", CachingAdapter(adapter, directory))
+            self.assertEqual(items, list(wordpress.get_all("posts")))
+            self.assertEqual(items, list(wordpress.get_all("posts")))
+
+        self.assertEqual(6, len(adapter.requests))
+        self.assertTrue(all(per_page(r) == 100 for r in adapter.requests))
+        self.assertTrue(all("If-None-Match" in r.headers for r in adapter.requests[3:]))
+
+
+class Test_RequestScheduler(unittest.TestCase):
+    def failing(self, statuses: list, headers: dict = {}):
+        def handler(request):
+            if statuses:
+                return statuses.pop(0), headers, {"code": "error"}
+            if request.method == "POST":
+                return 201, {}, {"id": 1}
+            return 200, {"X-WP-TotalPages": "1"}, [{"id": 1}]
+
+        wordpress, adapter = stub_wordpress(handler)
+        wordpress.session.scheduler.backoff = 0.001
+        return wordpress, adapter
+
+    def test_throttled_request_is_retried(self):
+        wordpress, adapter = self.failing([429, 429], {"Retry-After": "0"})
+        self.assertEqual(1, wordpress.create_post({"title": "x"}).post_id)
+        self.assertEqual(3, len(adapter.requests))
+
+    def test_server_errors_are_retried_for_idempotent_requests(self):
+        wordpress, adapter = self.failing([502, 503])
+        self.assertEqual([{"id": 1}], list(wordpress.get_all("posts")))
+        self.assertEqual(3, len(adapter.requests))
+
+        wordpress, adapter = self.failing([502])
+        with self.assertRaises(WordpressError) as error:
+            wordpress.create_post({"title": "x"})
+        self.assertEqual(502, error.exception.status_code)
+        self.assertEqual(1, len(adapter.requests))
+
+    def test_gives_up_after_retries(self):
+        wordpress, adapter = self.failing([503] * 10)
+        with self.assertRaises(WordpressError):
+            list(wordpress.get_all("posts"))
+        self.assertEqual(6, len(adapter.requests))
+
+    def test_retry_after_pauses_host(self):
+        wordpress, adapter = self.failing([429], {"Retry-After": "0.2"})
+        started = time.monotonic()
+        wordpress.get("posts", 1)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+
+class Test_Metrics(unittest.TestCase):
+    def test_requests_are_aggregated(self):
+        statuses = [503]
+
+        def handler(request):
+            if statuses:
+                return statuses.pop(), {}, {"code": "error"}
+            if urlparse(request.url).path.endswith("/posts/1"):
+                return 200, {}, {"id": 1}
+            return paged([{"id": 1}, {"id": 2}])(request)
+
+        metrics, events = Metrics(), []
+        wordpress, _ = stub_wordpress(handler, request_hooks=[metrics, events.append])
+        wordpress.session.scheduler.backoff = 0.001
+        list(wordpress.get_all("posts"))
+        wordpress.get("posts", 1)
+
+        self.assertEqual([503, 200, 200], [e.status for e in events])
+        self.assertEqual([0, 1, 0], [e.attempt for e in events])
+        self.assertEqual(len(json.dumps({"id": 1})), events[-1].bytes)
+        summary = metrics.summary()
+        self.assertEqual(
+            [
+                ("GET", "wp/v2/posts", "200", 1, 1),
+                ("GET", "wp/v2/posts", "503", 1, 0),
+                ("GET", "wp/v2/posts/{id}", "200", 1, 0),
+            ],
+            [
+                (r["method"], r["resource"], r["status"], r["count"], r["retries"])
+                for r in summary["requests"]
+            ],
+        )
+        self.assertEqual(3, summary["total"]["count"])
+        self.assertIn(
+            'wp_md_requests_total{method="GET",resource="wp/v2/posts",status="503"} 1',
+            metrics.to_prometheus(),
+        )
+
+    def test_bytes_of_streamed_responses_are_counted(self):
+        items = [{"id": i, "content": "x" * 1000} for i in range(250)]
+        events = []
+        wordpress, _ = stub_wordpress(paged(items), request_hooks=[events.append])
+        objects = wordpress.get_all("posts", incremental=True)
+        self.assertEqual(items[0], next(objects))
+        # the events of the pages are fired once they have been read
+        self.assertEqual([], [e for e in events if e.bytes])
+        self.assertEqual(items[1:], list(objects))
+
+        self.assertEqual(3, len(events))
+        pages = [items[0:100], items[100:200], items[200:250]]
+        self.assertEqual([len(json.dumps(p)) for p in pages], [e.bytes for e in events])
+
+
+class Test_PostsBySlugs(unittest.TestCase):
+    def test_slugs_are_resolved_in_batches(self):
+        posts = [{"id": i, "slug": f"post-{i}"} for i in range(120)]
+
+        def handler(request):
+            slugs = parse_qs(urlparse(request.url).query)["slug"][0].split(",")
+            body = [p for p in posts if p["slug"] in slugs]
+            return 200, {"X-WP-TotalPages": "1"}, body
+
+        wordpress, adapter = stub_wordpress(handler)
+        slugs = [f"post-{i}" for i in range(0, 240, 2)]
+        result = wordpress.get_posts_by_slugs(slugs)
+        self.assertEqual({f"post-{i}" for i in range(0, 120, 2)}, set(result.keys()))
+        self.assertEqual(10, result["post-10"].post_id)
+        self.assertEqual(3, len(adapter.requests))
+        fields = parse_qs(urlparse(adapter.requests[0].url).query)["_fields"][0]
+        self.assertIn("slug", fields.split(","))
+
+        self.assertIsNone(wordpress.get_post_by_slug("post-121"))
+
+
+class Test_BatchWriter(unittest.TestCase):
+    def handler(self, request):
+        self.assertEqual("/wp-json/batch/v1", urlparse(request.url).path)
+        responses = []
+        for r in json.loads(request.body)["requests"]:
+            if r["body"].get("status") == "invalid":
+                responses.append({"status": 400, "body": {"message": "invalid status"}})
+            else:
+                id = int(r["path"].rsplit("/", 1)[-1]) if r["path"] != "/wp/v2/posts" else 999
+                responses.append({"status": 200, "body": {"id": id} | r["body"]})
+        return 207, {}, {"responses": responses}
+
+    def test_writes_are_sent_in_batches(self):
+        wordpress, adapter = stub_wordpress(self.handler)
+        with wordpress.batch() as batch:
+            items = [
+                batch.update_post(
+                    f"https://example.com/wp-json/wp/v2/posts/{i}", {"status": "publish"}
+                )
+                for i in range(60)
+            ]
+            created = batch.create_post({"title": "new"})
+            invalid = batch.update_post(
+                "https://example.com/wp-json/wp/v2/posts/1", {"status": "invalid"}
+            )
+
+        self.assertEqual(3, len(adapter.requests))
+        self.assertEqual(list(range(60)), [i.post.post_id for i in items])
+        self.assertEqual("publish", items[0].post.status)
+        self.assertEqual(999, created.post.post_id)
+        self.assertEqual(400, invalid.error.status_code)
+        self.assertIsNone(invalid.post)
+
+    def test_falls_back_to_single_writes(self):
+        def handler(request):
+            if urlparse(request.url).path == "/wp-json/batch/v1":
+                return 404, {}, {"code": "rest_no_route"}
+            return 200, {}, {"id": 1, "status": "publish"}
+
+        wordpress, adapter = stub_wordpress(handler)
+        with wordpress.batch() as batch:
+            item = batch.update_post(
+                "https://example.com/wp-json/wp/v2/posts/1", {"status": "publish"}
+            )
+        self.assertEqual("publish", item.post.status)
+        self.assertEqual("PATCH", adapter.requests[-1].method)
+
+
+class Test_TaxonomyCache(unittest.TestCase):
+    def setUp(self):
+        self.tags = [{"slug": "aws", "id": 1}, {"slug": "gcp", "id": 2}]
+        self.handler = paged(self.tags)
+
+    def test_taxonomy_is_cached_across_instances(self):
+        wordpress, adapter = stub_wordpress(self.handler, refresh_cache=True)
+        self.assertEqual(2, wordpress.get_tag_id_by_name("gcp"))
+        self.assertEqual("aws", wordpress.tags_by_id[1])
+        self.assertEqual(1, len(adapter.requests))
+
+        wordpress, adapter = stub_wordpress(self.handler)
+        self.assertEqual(2, wordpress.get_tag_id_by_name("gcp"))
+        self.assertEqual(0, len(adapter.requests))
+
+    def test_unknown_slug_is_fetched_once(self):
+        stub_wordpress(self.handler, refresh_cache=True)[0].tags
+        self.tags.append({"slug": "azure", "id": 3})
+
+        wordpress, adapter = stub_wordpress(self.handler)
+        self.assertEqual(3, wordpress.get_tag_id_by_name("azure"))
+        self.assertEqual("azure", wordpress.get_taxonomy_slug("tags", 3))
+        with self.assertRaises(ValueError):
+            wordpress.get_tag_id_by_name("oracle")
+        self.assertEqual(1, len(adapter.requests))
+
+    def test_expired_cache_is_refetched(self):
+        stub_wordpress(self.handler, refresh_cache=True)[0].tags
+        wordpress, adapter = stub_wordpress(self.handler, cache_ttl=-1)
+        self.assertEqual(1, wordpress.get_tag_id_by_name("aws"))
+        self.assertEqual(1, len(adapter.requests))
+
+    def test_taxonomies_are_prefetched_concurrently(self):
+        handler = paged(self.tags, delay=lambda offset: 0.2)
+        wordpress, adapter = stub_wordpress(handler, refresh_cache=True)
+        wordpress.connect()
+        self.assertEqual(0, len(adapter.requests))
+
+        started = time.monotonic()
+        wordpress.prefetch_taxonomies()
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(5, len(adapter.requests))
+
+        self.assertEqual(2, wordpress.get_capability_by_name("gcp"))
+        self.assertEqual(5, len(adapter.requests))
+
+
+class Test_AuthorCache(unittest.TestCase):
+    def setUp(self):
+        api._authors.clear()
+        self.users = [
+            {"id": 7, "name": "Jane Doe", "slug": "jane", "email": "jane@example.com"},
+            {"id": 8, "name": "Jane Doe", "slug": "jdoe", "email": "jd@example.com"},
+        ]
+
+    def handler(self, request):
+        if urlparse(request.url).path.endswith("/users/me"):
+            return 200, {}, {"id": 1, "name": "Uploader"}
+        if "search=unknown" in request.url:
+            return 200, {"X-WP-Total": "0"}, []
+        return 200, {"X-WP-Total": "2"}, self.users
+
+    def test_authors_are_resolved_once(self):
+        wordpress, adapter = stub_wordpress(self.handler)
+        for _ in range(3):
+            user = wordpress.get_unique_user_by_name("Jane Doe", "JD@example.com", None)
+            self.assertEqual(8, user.id)
+        self.assertEqual(2, len(adapter.requests))
+
+        wordpress, adapter = stub_wordpress(self.handler)
+        # resolved by another instance in the process
+        user = wordpress.get_unique_user_by_name("Jane Doe", "jd@example.com", None)
+        self.assertEqual(8, user.id)
+        self.assertEqual(0, len(adapter.requests))
+
+        self.assertEqual(7, wordpress.get_unique_user_by_name("Jane Doe", None, "jane").id)
+        self.assertEqual(2, len(adapter.requests))
+
+        wordpress.forget_author("Jane Doe", None, "jane")
+        wordpress.get_unique_user_by_name("Jane Doe", None, "jane")
+        self.assertEqual(4, len(adapter.requests))
+
+    def test_authors_are_persisted(self):
+        wordpress, adapter = stub_wordpress(self.handler, persist_authors=True)
+        wordpress.get_unique_user_by_name("Jane Doe", None, "jdoe")
+        api._authors.clear()
+
+        wordpress, adapter = stub_wordpress(self.handler, persist_authors=True)
+        self.assertEqual(8, wordpress.get_unique_user_by_name("Jane Doe", None, "jdoe").id)
+        self.assertEqual(0, len(adapter.requests))
+
+        wordpress.forget_author("Jane Doe", None, "jdoe")
+        api._authors.clear()
+        wordpress.get_unique_user_by_name("Jane Doe", None, "jdoe")
+        self.assertEqual(2, len(adapter.requests))
+
+    def test_failed_lookup_is_not_cached(self):
+        wordpress, adapter = stub_wordpress(self.handler)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                wordpress.get_unique_user_by_name("unknown", None, None)
+        self.assertEqual(4, len(adapter.requests))
+
+
+class Test_CachingAdapter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.etag = '"v1"'
+        self.body = [{"id": 1, "title": "unchanged"}]
+
+        def handler(request):
+            if request.headers.get("If-None-Match") == self.etag:
+                return 304, {"ETag": self.etag}, b""
+            return 200, {"ETag": self.etag, "X-WP-TotalPages": "1"}, self.body
+
+        self.stub = StubAdapter(handler)
+        self.session = requests.Session()
+        self.session.mount("https://", CachingAdapter(self.stub, self.directory.name))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_not_modified_is_served_from_cache(self):
+        url = "https://example.com/wp-json/wp/v2/posts"
+        self.assertEqual(self.body, self.session.get(url).json())
+        response = self.session.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.body, response.json())
+        self.assertEqual("1", response.headers["X-WP-TotalPages"])
+        self.assertEqual(self.etag, self.stub.requests[1].headers["If-None-Match"])
+
+    def test_modified_is_refreshed(self):
+        url = "https://example.com/wp-json/wp/v2/posts"
+        self.session.get(url)
+        self.etag, self.body = '"v2"', [{"id": 1, "title": "changed"}]
+        self.assertEqual(self.body, self.session.get(url).json())
+        self.assertEqual(self.body, self.session.get(url).json())
+
+    def test_other_methods_are_not_cached(self):
+        url = "https://example.com/wp-json/wp/v2/posts"
+        self.session.post(url)
+        self.session.post(url)
+        self.assertNotIn("If-None-Match", self.stub.requests[1].headers)
+
+
+class Test_MediaIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        os.environ["WP_MD_CACHE_DIR"] = self.directory.name
+        self.media = [self.medium(i, "2023-01-01T00:00:00") for i in range(1, 4)]
+
+    def tearDown(self):
+        os.environ["WP_MD_CACHE_DIR"] = cache_dir.name
+        self.directory.cleanup()
+
+    @staticmethod
+    def medium(id: int, modified_gmt: str) -> dict:
+        url = f"https://example.com/wp-content/uploads/image-{id}.png"
+        return {
+            "id": id,
+            "slug": f"image-{id}",
+            "guid": {"rendered": url},
+            "source_url": url,
+            "modified_gmt": modified_gmt,
+        }
+
+    def handler(self, request):
+        query = parse_qs(urlparse(request.url).query)
+        if "search" in query:
+            found = [m for m in self.media if query["search"][0] in m["slug"]]
+            return 200, {"X-WP-Total": str(len(found))}, found
+        after = query.get("modified_after", [""])[0]
+        changed = [m for m in self.media if m["modified_gmt"] > after]
+        return 200, {"X-WP-Total": str(len(changed))}, changed
+
+    def test_lookups_are_local(self):
+        wordpress, adapter = stub_wordpress(self.handler, use_media_index=True)
+        link = "https://example.com/wp-content/uploads/image-2.png"
+        self.assertEqual(2, wordpress.find_image_by_link(link).medium_id)
+        self.assertEqual(3, wordpress.search_for_image_by_slug("image-3").medium_id)
+        self.assertEqual(1, len(adapter.requests))
+
+    def test_index_is_not_used_by_default(self):
+        wordpress, adapter = stub_wordpress(self.handler)
+        self.assertIsNone(wordpress.media_index)
+        self.assertEqual(3, wordpress.search_for_image_by_slug("image-3").medium_id)
+        query = parse_qs(urlparse(adapter.requests[0].url).query)
+        self.assertEqual(["image-3"], query["search"])
+        self.assertEqual(1, len(adapter.requests))
+
+    def test_index_is_updated_incrementally(self):
+        stub_wordpress(self.handler, use_media_index=True)[0].media_index
+        self.media.append(self.medium(4, "2023-02-01T00:00:00"))
+
+        wordpress, adapter = stub_wordpress(self.handler, use_media_index=True)
+        self.assertEqual(4, wordpress.search_for_image_by_slug("image-4").medium_id)
+        self.assertEqual(1, len(adapter.requests))
+        query = parse_qs(urlparse(adapter.requests[0].url).query)
+        self.assertEqual(["2022-12-31T00:00:00"], query["modified_after"])
+
+    def test_miss_is_searched_on_the_server(self):
+        wordpress, adapter = stub_wordpress(self.handler, use_media_index=True)
+        wordpress.media_index
+        self.media.append(self.medium(5, "2022-01-01T00:00:00"))
+
+        self.assertEqual(5, wordpress.search_for_image_by_slug("image-5").medium_id)
+        self.assertEqual(5, wordpress.search_for_image_by_slug("image-5").medium_id)
+        self.assertIsNone(wordpress.search_for_image_by_slug("image-6"))
+        self.assertEqual(3, len(adapter.requests))
+
+    def test_changes_are_journaled(self):
+        path = Path(self.directory.name, "media-index.json")
+        index = MediaIndex(path)
+        index.update(self.media, complete=True)
+        written = path.stat().st_mtime_ns
+
+        medium = self.medium(4, "2023-02-01T00:00:00")
+        medium["media_details"] = {"filesize": 10, "sizes": {"thumbnail": {}}}
+        index.add(medium)
+        index.remove(1)
+        self.assertEqual(written, path.stat().st_mtime_ns)
+        self.assertEqual(2, len(index.journal.read_text().splitlines()))
+
+        index = MediaIndex(path)
+        self.assertIsNone(index.get(1))
+        self.assertEqual({"filesize": 10}, index.find_by_slug("image-4")["media_details"])
+        index.save()
+        self.assertFalse(index.journal.exists())
+        self.assertEqual(3, len(MediaIndex(path)))
+
+    def test_deleted_media_are_dropped(self):
+        stub_wordpress(self.handler, use_media_index=True)[0].media_index
+        del self.media[1]
+
+        wordpress, adapter = stub_wordpress(self.handler, use_media_index=True, cache_ttl=0)
+        link = "https://example.com/wp-content/uploads/image-2.png"
+        self.assertIsNone(wordpress.find_image_by_link(link))
+        fields = [parse_qs(urlparse(r.url).query).get("_fields") for r in adapter.requests]
+        self.assertIn(["id"], fields)
+
+
+class Test_UploadMedia(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name).joinpath("banner.png")
+        self.path.write_bytes(b"image v1")
+        self.medium, self.body = None, None
+        os.environ["WP_MD_CACHE_DIR"] = self.directory.name
+
+        def handler(request):
+            url = urlparse(request.url)
+            if request.method == "GET" and url.path == "/wp-json/wp/v2/media":
+                return 200, {"X-WP-TotalPages": "1"}, [self.medium] if self.medium else []
+            if request.method == "GET" and url.path.startswith("/wp-content/uploads/"):
+                return (200, {}, self.body) if self.body else (404, {}, {})
+            if request.method == "POST":
+                self.body = request.body
+                self.medium = {
+                    "id": 7,
+                    "slug": "blog-banner",
+                    "guid": {"rendered": "https://example.com/wp-content/uploads/blog-banner.png"},
+                }
+                return 201, {}, self.medium
+            if request.method == "DELETE":
+                self.medium, self.body = None, None
+            return 200, {}, {}
+
+        self.handler = handler
+
+    def tearDown(self):
+        os.environ["WP_MD_CACHE_DIR"] = cache_dir.name
+        self.directory.cleanup()
+
+    def test_unchanged_medium_is_not_transferred(self):
+        wordpress, adapter = stub_wordpress(self.handler)
+        medium = wordpress.upload_media("blog-banner", self.path)
+        self.assertEqual(7, medium.medium_id)
+        self.assertIn("POST", [r.method for r in adapter.requests])
+
+        wordpress, adapter = stub_wordpress(self.handler)
+        medium = wordpress.upload_media("blog-banner", self.path)
+        self.assertEqual(7, medium.medium_id)
+        self.assertEqual(0, len(adapter.requests))
+
+    def test_changed_medium_is_replaced(self):
+        wordpress, _ = stub_wordpress(self.handler)
+        wordpress.upload_media("blog-banner", self.path)
+
+        self.path.write_bytes(b"image v2")
+        wordpress, adapter = stub_wordpress(self.handler)
+        wordpress.upload_media("blog-banner", self.path)
+        self.assertEqual(
+            ["GET", "GET", "DELETE", "POST"], [r.method for r in adapter.requests][:4]
+        )
+        self.assertEqual(b"image v2", self.body)
+
+    def test_unrecorded_medium_is_compared_by_digest(self):
+        wordpress, _ = stub_wordpress(self.handler)
+        wordpress.upload_media("blog-banner", self.path)
+        wordpress.media_manifest.remove("blog-banner")
+
+        wordpress, adapter = stub_wordpress(self.handler)
+        wordpress.upload_media("blog-banner", self.path)
+        self.assertEqual(["GET", "GET"], [r.method for r in adapter.requests])
+
+    def test_deleted_medium_is_uploaded_again(self):
+        wordpress, _ = stub_wordpress(self.handler, use_media_index=True)
+        wordpress.upload_media("blog-banner", self.path)
+        self.medium, self.body = None, None
+        self.path.write_bytes(b"image v2")
+
+        wordpress, adapter = stub_wordpress(self.handler, use_media_index=True)
+        self.assertEqual(7, wordpress.upload_media("blog-banner", self.path).medium_id)
+        self.assertEqual(b"image v2", self.body)
+        self.assertNotIn("DELETE", [r.method for r in adapter.requests])
+
+    def test_recorded_medium_is_checked_against_the_index(self):
+        wordpress, _ = stub_wordpress(self.handler, use_media_index=True)
+        wordpress.upload_media("blog-banner", self.path)
+        self.medium, self.body = None, None
+
+        wordpress, adapter = stub_wordpress(self.handler, use_media_index=True, cache_ttl=0)
+        self.assertEqual(7, wordpress.upload_media("blog-banner", self.path).medium_id)
+        self.assertEqual(b"image v1", self.body)
+        self.assertIn("POST", [r.method for r in adapter.requests])
+
+    def test_failed_upload_is_retried(self):
+        failures = [requests.ConnectionError("connection reset")]
+
+        def handler(request):
+            if request.method == "POST" and failures:
+                raise failures.pop()
+            return self.handler(request)
+
+        wordpress, adapter = stub_wordpress(handler)
+        wordpress.session.scheduler.backoff = 0.001
+        self.assertEqual(7, wordpress.upload_media("blog-banner", self.path).medium_id)
+        self.assertEqual(b"image v1", self.body)
+
+
+class BrokenStream(io.BytesIO):
+    """
+    a response body of which the connection fails after `limit` bytes.
+    """
+
+    def __init__(self, content: bytes, limit: int):
+        super().__init__(content[:limit])
+
+    def read(self, size=-1):
+        if chunk := super().read(size):
+            return chunk
+        raise requests.ConnectionError("connection reset")
+
+
+class Test_DownloadMedia(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name).joinpath("images", "banner.png")
+        self.content = bytes(range(256)) * 4096
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_interrupted_download_is_resumed(self):
+        def handler(request):
+            if "Range" not in request.headers:
+                return 200, {"ETag": '"v1"'}, BrokenStream(self.content, 300000)
+            self.assertEqual('"v1"', request.headers["If-Range"])
+            offset = int(request.headers["Range"].removeprefix("bytes=").rstrip("-"))
+            return 206, {}, self.content[offset:]
+
+        wordpress, adapter = stub_wordpress(handler)
+        wordpress.session.scheduler.backoff = 0.001
+        wordpress.download_media("https://example.com/wp-content/uploads/banner.png", self.path)
+        self.assertEqual(self.content, self.path.read_bytes())
+        self.assertEqual(2, len(adapter.requests))
+        self.assertEqual(["banner.png"], os.listdir(self.path.parent))
+
+    def test_changed_medium_is_downloaded_from_start(self):
+        def handler(request):
+            if "Range" not in request.headers:
+                return 200, {"ETag": '"v1"'}, BrokenStream(b"old", 2)
+            return 200, {"ETag": '"v2"'}, self.content
+
+        wordpress, adapter = stub_wordpress(handler)
+        wordpress.session.scheduler.backoff = 0.001
+        wordpress.download_media("https://example.com/wp-content/uploads/banner.png", self.path)
+        self.assertEqual(self.content, self.path.read_bytes())
+
+    def test_unsatisfiable_range_is_downloaded_from_start(self):
+        self.path.parent.mkdir()
+        self.path.with_name("banner.png.part").write_bytes(self.content + b"extra")
+        self.path.with_name("banner.png.part.validator").write_text('"v1"')
+
+        def handler(request):
+            if "Range" in request.headers:
+                return 416, {}, b""
+            return 200, {"ETag": '"v1"'}, self.content
+
+        wordpress, adapter = stub_wordpress(handler)
+        wordpress.download_media("https://example.com/wp-content/uploads/banner.png", self.path)
+        self.assertEqual(self.content, self.path.read_bytes())
+        self.assertEqual(2, len(adapter.requests))
+        self.assertEqual(["banner.png"], os.listdir(self.path.parent))
+
+
+if __name__ == "__main__":
+    unittest.main()
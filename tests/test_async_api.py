@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    from wordpress_markdown_blog_loader.async_api import AsyncWordpress
+except ImportError:
+    web = None
+
+from wordpress_markdown_blog_loader.api import WordpressEndpoint
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class Test_AsyncWordpress(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.posts = [{"id": i, "slug": f"post-{i}"} for i in range(250)]
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def posts(request):
+            self.in_flight += 1
+            self.max_in_flight = max(self.in_flight, self.max_in_flight)
+            try:
+                page = int(request.query["page"])
+                if "slug" in request.query:
+                    body = [p for p in self.posts if p["slug"] == request.query["slug"]]
+                else:
+                    body = self.posts[(page - 1) * 100 : page * 100]
+                total_pages = (len(self.posts) + 99) // 100
+                return web.json_response(body, headers={"X-WP-TotalPages": str(total_pages)})
+            finally:
+                self.in_flight -= 1
+
+        async def categories(request):
+            body = [{"slug": "cloud", "id": 3}]
+            return web.json_response(body, headers={"X-WP-TotalPages": "1"})
+
+        self.medium, self.body, self.throttle = None, None, 0
+        self.uploads = 0
+
+        async def media(request):
+            return web.json_response([self.medium] if self.medium else [])
+
+        async def upload(request):
+            if self.throttle:
+                self.throttle -= 1
+                return web.Response(status=429, headers={"Retry-After": "0"})
+            self.uploads += 1
+            self.body = await request.read()
+            self.medium = {
+                "id": 7,
+                "slug": request.query["slug"],
+                "guid": {"rendered": str(self.server.make_url("/wp-content/uploads/banner.png"))},
+            }
+            return web.json_response(self.medium, status=201)
+
+        async def uploaded(request):
+            return web.Response(body=self.body) if self.body else web.Response(status=404)
+
+        app = web.Application()
+        app.router.add_get("/wp-json/wp/v2/posts", posts)
+        app.router.add_get("/wp-json/wp/v2/categories", categories)
+        app.router.add_get("/wp-json/wp/v2/media", media)
+        app.router.add_post("/wp-json/wp/v2/media/", upload)
+        app.router.add_get("/wp-content/uploads/banner.png", uploaded)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+        endpoint = WordpressEndpoint(
+            host="127.0.0.1",
+            api_host="127.0.0.1",
+            url=str(self.server.make_url("/wp-json/wp/v2")),
+            username="user",
+            password="password",
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name, "banner.png")
+        self.path.write_bytes(b"image v1")
+        patcher = mock.patch.dict(os.environ, {"WP_MD_CACHE_DIR": self.directory.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.load = mock.patch.object(WordpressEndpoint, "load", return_value=endpoint)
+        with self.load:
+            self.wordpress = AsyncWordpress("127.0.0.1", concurrency=2)
+
+    async def asyncTearDown(self):
+        await self.wordpress.close()
+        await self.server.close()
+        self.directory.cleanup()
+
+    async def test_get_all_in_page_order(self):
+        posts = [p async for p in self.wordpress.get_all("posts")]
+        self.assertEqual(self.posts, posts)
+        self.assertLessEqual(self.max_in_flight, 2)
+
+    async def test_get_post_by_slug(self):
+        post = await self.wordpress.get_post_by_slug("post-42")
+        self.assertEqual(42, post.post_id)
+        self.assertIsNone(await self.wordpress.get_post_by_slug("missing"))
+
+    async def test_taxonomy_lookup(self):
+        self.assertEqual(3, await self.wordpress.get_category_id_by_name("cloud"))
+        with self.assertRaises(ValueError):
+            await self.wordpress.get_category_id_by_name("unknown")
+
+    async def test_unchanged_medium_is_not_transferred(self):
+        medium = await self.wordpress.upload_media("blog-banner", self.path)
+        self.assertEqual(7, medium.medium_id)
+        self.assertEqual(b"image v1", self.body)
+
+        with self.load:
+            wordpress = AsyncWordpress("127.0.0.1")
+        async with wordpress:
+            self.assertEqual(7, (await wordpress.upload_media("blog-banner", self.path)).medium_id)
+        self.assertEqual(1, self.uploads)
+
+    async def test_unrecorded_medium_is_compared_by_digest(self):
+        await self.wordpress.upload_media("blog-banner", self.path)
+        self.wordpress.media_manifest.remove("blog-banner")
+        await self.wordpress.upload_media("blog-banner", self.path)
+        self.assertEqual(1, self.uploads)
+
+    async def test_throttled_upload_is_retried(self):
+        self.throttle = 2
+        self.wordpress.scheduler.backoff = 0.001
+        await self.wordpress.upload_media("blog-banner", self.path)
+        self.assertEqual(b"image v1", self.body)
+        self.assertEqual(0, self.throttle)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,14 @@
 
 import os
+import tempfile
 import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
 
+from wordpress_markdown_blog_loader import render_cache
+from wordpress_markdown_blog_loader.api import Medium
 from wordpress_markdown_blog_loader.blog import Blog
+from wordpress_markdown_blog_loader.render_cache import RenderCache
 
 class Test_BlogRender(unittest.TestCase):
     def test_tables(self):
@@ -48,5 +54,120 @@ class Test_AudioDirective(unittest.TestCase):
         self.assertNotIn("::: audio", rendered)
 
 
+class Test_UploadLocalMedia(unittest.TestCase):
+    def test_same_slug_fails_before_upload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "images").mkdir()
+            for name in ["foo.png", "foo.jpg"]:
+                Path(directory, "images", name).write_bytes(b"image")
+            blog = Blog()
+            blog.dir = Path(directory)
+            blog.slug = "post"
+            blog.content = "![a](images/foo.png)\n\n![b](images/foo.jpg)\n"
+            wp = Mock()
+            with self.assertRaisesRegex(ValueError, "post-foo"):
+                blog.upload_local_media(wp)
+            wp.upload_media_files.assert_not_called()
+
+    def test_upload_local_images(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "images").mkdir()
+            for name in ["foo.png", "banner.png"]:
+                Path(directory, "images", name).write_bytes(b"image")
+            blog = Blog()
+            blog.dir = Path(directory)
+            blog.slug = "post"
+            blog.image = "images/banner.png"
+            blog.content = "![a](images/foo.png)\n"
+            banner = Medium({"id": 1})
+            blog.uploaded_banner = banner
+            wp = Mock()
+            wp.upload_media_files.side_effect = lambda files: (
+                {key: Medium({"id": 2}) for key in files},
+                {},
+            )
+            blog.upload_local_images(wp)
+
+            (files,), _ = wp.upload_media_files.call_args
+            self.assertEqual([("image", "images/foo.png")], list(files))
+            self.assertEqual(["images/foo.png"], list(blog.uploaded_images))
+            self.assertIs(banner, blog.uploaded_banner)
+
+
+class Test_DownloadRemoteImages(unittest.TestCase):
+    def test_same_name_at_different_urls(self):
+        blog = Blog()
+        blog.dir = Path("/tmp/post")
+        blog.content = (
+            "![a](https://example.com/wp-content/uploads/2023/01/foo.png)\n\n"
+            "![b](https://example.com/wp-content/uploads/2024/02/foo.png)\n"
+        )
+        wp = Mock()
+        wp.download_media_files.side_effect = lambda files: (
+            {key: path for key, (url, path) in files.items()},
+            {},
+        )
+        blog.download_remote_images(wp)
+
+        paths = [str(path) for path in blog.downloaded_images.values()]
+        self.assertEqual(["images/foo.png", "images/foo-2.png"], paths)
+        self.assertIn("![a](images/foo.png)", blog.content)
+        self.assertIn("![b](images/foo-2.png)", blog.content)
+
+
+class Test_RenderCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(self.directory.name)
+        patcher = patch.object(render_cache, "_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def _blog(self):
+        blog = Blog()
+        blog.title = "Cached post"
+        blog.content = "## Section\n\n![a banner](images/banner.png)\n"
+        return blog
+
+    def test_rendered_once(self):
+        blog = self._blog()
+        with patch.object(Blog, "_render", autospec=True, side_effect=Blog._render) as render:
+            first = blog.rendered
+            self.assertEqual(first, blog.rendered)
+            self.assertEqual(first, self._blog().rendered)
+            self.assertEqual(1, render.call_count)
+
+            blog.content += "\nmore\n"
+            self.assertIn("more", blog.rendered)
+            self.assertEqual(2, render.call_count)
+
+    def test_uploaded_images_change_the_rendering(self):
+        blog = self._blog()
+        self.assertIn('src="images/banner.png"', blog.rendered)
+        blog.uploaded_images["images/banner.png"] = Medium(
+            {"id": 1, "guid": {"rendered": "https://example.com/banner.png"}}
+        )
+        self.assertIn('src="https://example.com/banner.png"', blog.rendered)
+
+    def test_disk(self):
+        rendered = self._blog().rendered
+        self.cache.clear()
+        with patch.object(Blog, "_render") as render:
+            self.assertEqual(rendered, self._blog().rendered)
+            render.assert_not_called()
+
+    def test_new_format_is_rendered_again(self):
+        rendered = self._blog().rendered
+        self.cache.clear()
+        version = render_cache.VERSION.replace(
+            f"{render_cache.RENDER_FORMAT}/", f"{render_cache.RENDER_FORMAT + 1}/", 1
+        )
+        with patch.object(render_cache, "VERSION", version):
+            with patch.object(Blog, "_render", return_value=rendered) as render:
+                self._blog().rendered
+                render.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main()
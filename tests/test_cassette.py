@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+from tests.fake_wordpress import FakeWordpress
+from wordpress_markdown_blog_loader import api
+from wordpress_markdown_blog_loader.api import Wordpress, WordpressEndpoint
+from wordpress_markdown_blog_loader.cassette import NoRecordedResponse, read_cassette
+from wordpress_markdown_blog_loader.download import download_post
+
+
+class Test_Cassette(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cassette = Path(self.directory.name, "run.jsonl.gz")
+        os.environ["WP_MD_CACHE_DIR"] = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        os.environ.pop("WP_MD_CACHE_DIR")
+        self.directory.cleanup()
+
+    def download(self, wordpress: Wordpress, name: str) -> dict:
+        directory = Path(self.directory.name, name)
+        for post in wordpress.post_records():
+            download_post(post, directory, wordpress)
+        return {
+            path.relative_to(directory).as_posix(): path.read_bytes()
+            for path in directory.rglob("*")
+            if path.is_file()
+        }
+
+    def test_replay(self):
+        with FakeWordpress(posts=3, paragraphs=2) as fake:
+            endpoint = fake.endpoint()
+            wordpress = Wordpress(endpoint=endpoint, record=self.cassette)
+            recorded = self.download(wordpress, "recorded")
+            requests = fake.requests
+
+        entries = read_cassette(self.cassette)
+        self.assertEqual(requests, len(entries))
+        image = next(e for e in entries if e["url"].endswith(".png"))
+        self.assertIn("body_base64", image)
+
+        # the server is gone, and the refetch of the taxonomies must come from the cassette
+        os.environ["WP_MD_CACHE_DIR"] = os.path.join(self.directory.name, "empty")
+        wordpress = Wordpress(endpoint=endpoint, replay=self.cassette)
+        replayed = self.download(wordpress, "replayed")
+        self.assertTrue(any(name.endswith("index.md") for name in recorded))
+        self.assertEqual(recorded, replayed)
+
+        with self.assertRaises(NoRecordedResponse):
+            wordpress.get("posts", 12345)
+
+    @mock.patch.object(api, "TARGET_PAGE_BYTES", 64 * 1024)
+    def test_replay_with_concurrency(self):
+        with FakeWordpress(posts=250, paragraphs=40) as fake:
+            endpoint = fake.endpoint()
+            wordpress = Wordpress(endpoint=endpoint, concurrency=4, record=self.cassette)
+            recorded = [p["id"] for p in wordpress.get_all("posts", incremental=True)]
+
+        for _ in range(2):
+            wordpress = Wordpress(endpoint=endpoint, concurrency=4, replay=self.cassette)
+            self.assertEqual(
+                recorded, [p["id"] for p in wordpress.get_all("posts", incremental=True)]
+            )
+        urls = [entry["url"] for entry in read_cassette(self.cassette)]
+        self.assertEqual(3, len(urls))
+        self.assertTrue(all("per_page=100" in url for url in urls), urls)
+
+    def test_record_and_replay(self):
+        with self.assertRaises(ValueError):
+            Wordpress(
+                endpoint=WordpressEndpoint(
+                    host="localhost",
+                    api_host="localhost",
+                    url="http://localhost/wp-json/wp/v2",
+                    username="admin",
+                    password="password",
+                ),
+                record=self.cassette,
+                replay=self.cassette,
+            )
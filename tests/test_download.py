@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from click.testing import CliRunner
+
+from wordpress_markdown_blog_loader import download
+from wordpress_markdown_blog_loader.records import PostRecord
+from wordpress_markdown_blog_loader.sync_state import SyncState
+
+
+class FakeWordpress(object):
+    def __init__(self, posts: list):
+        self.endpoint = SimpleNamespace(host="example.com")
+        self._posts = posts
+        self.queries = []
+
+    def connect(self):
+        pass
+
+    def post_records(self, query: dict = None, incremental: bool = False):
+        self.queries.append(query)
+        after = query.get("modified_after")
+        return [
+            PostRecord(p) for p in self._posts if not after or p["modified_gmt"] > after
+        ]
+
+
+class Test_IncrementalDownload(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.posts = [
+            {"id": 1, "link": "/one", "modified_gmt": "2023-01-01T10:00:00"},
+            {"id": 2, "link": "/two", "modified_gmt": "2023-03-01T10:00:00"},
+        ]
+        self.wordpress = FakeWordpress(self.posts)
+        self.downloaded = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def download_post(self, post, directory, wordpress):
+        self.downloaded.append(post.post_id)
+        path = Path(directory, str(post.post_id), "index.md")
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("")
+        return SimpleNamespace(path=path)
+
+    def run_download(self, *args):
+        with mock.patch.object(download, "Wordpress", return_value=self.wordpress):
+            with mock.patch.object(download, "download_post", self.download_post):
+                result = CliRunner().invoke(
+                    download.command,
+                    ["--host", "example.com", "--directory", self.directory.name, *args],
+                )
+        self.assertEqual(0, result.exit_code, result.output)
+
+    def test_only_changed_posts_are_downloaded(self):
+        self.run_download()
+        self.assertEqual([1, 2], self.downloaded)
+        self.assertNotIn("modified_after", self.wordpress.queries[0])
+
+        state = SyncState(Path(self.directory.name), "example.com")
+        self.assertEqual("2023-03-01T10:00:00", state.watermark)
+
+        self.downloaded.clear()
+        self.run_download()
+        self.assertEqual("2023-02-28T10:00:00", self.wordpress.queries[1]["modified_after"])
+        self.assertEqual([], self.downloaded)
+
+        self.posts[0]["modified_gmt"] = "2023-03-02T08:00:00"
+        self.run_download()
+        self.assertEqual([1], self.downloaded)
+
+    def test_full_download_converts_all_posts(self):
+        self.run_download()
+        self.downloaded.clear()
+        self.run_download("--full")
+        self.assertNotIn("modified_after", self.wordpress.queries[1])
+        self.assertEqual([1, 2], self.downloaded)
+
+    def test_missing_markdown_is_downloaded_again(self):
+        self.run_download()
+        Path(self.directory.name, "2", "index.md").unlink()
+        self.downloaded.clear()
+        self.run_download()
+        self.assertEqual([2], self.downloaded)
@@ -0,0 +1,155 @@
+import logging
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from urllib.parse import urlparse
+
+from click.testing import CliRunner
+
+from tests.fake_wordpress import FakeWordpress
+from wordpress_markdown_blog_loader import download, upload
+from wordpress_markdown_blog_loader.api import TAXONOMIES, Wordpress
+from wordpress_markdown_blog_loader.blog import Blog
+from wordpress_markdown_blog_loader.download import download_post
+from wordpress_markdown_blog_loader.upload import upsert_post
+
+
+class Test_FakeWordpress(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.environ["WP_MD_CACHE_DIR"] = os.path.join(self.directory.name, "cache")
+        self.fake = FakeWordpress(posts=5, paragraphs=2).start()
+
+    def tearDown(self):
+        self.fake.stop()
+        os.chdir(self.cwd)
+        os.environ.pop("WP_MD_CACHE_DIR")
+        self.directory.cleanup()
+
+    def test_download(self):
+        self.fake.write_config(Path(self.directory.name))
+        os.chdir(self.directory.name)
+        result = CliRunner().invoke(
+            download.command, ["--host", "localhost", "--directory", "."]
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+
+        blog = Blog.load("2023/01/post-3/index.md")
+        self.assertEqual("Post 3", blog.title)
+        self.assertEqual("Jane Doe", blog.author)
+        self.assertEqual(["categories-4"], blog.categories)
+        self.assertTrue(Path("2023/01/post-3/images/image.png").exists())
+
+    def test_download_images(self):
+        post = next(p for p in self.fake.posts.values() if p["slug"] == "post-3")
+        banner = self.fake.add_medium("post-3-banner", b"banner", "image/png")
+        missing = self.fake.add_medium("post-3-missing", b"missing", "image/png")
+        self.fake.bodies.pop(urlparse(missing["source_url"]).path)
+        post["featured_media"] = banner["id"]
+        for content in ["rendered", "raw"]:
+            post["content"][content] += f'<p><img src="{missing["source_url"]}"/></p>\n'
+
+        wordpress = Wordpress(endpoint=self.fake.endpoint())
+        post = next(p for p in wordpress.post_records() if p.slug == "post-3")
+        blog = download_post(post, self.directory.name, wordpress)
+
+        self.assertEqual("images/banner.png", blog.image)
+        self.assertEqual(b"banner", blog.image_path.read_bytes())
+        self.assertIn("](images/image.png)", blog.content)
+        self.assertTrue(Path(blog.dir, "images/image.png").exists())
+        # the image which failed to download keeps its url
+        self.assertIn(f"]({missing['source_url']})", blog.content)
+
+    def test_nested_workers_keep_their_connections(self):
+        for name in TAXONOMIES:
+            self.fake.terms[name] = {
+                i: {"id": i, "slug": f"{name}-{i}", "name": f"{name} {i}"}
+                for i in range(1, 1001)
+            }
+        self.fake.latency = 0.02
+        wordpress = Wordpress(endpoint=self.fake.endpoint(), concurrency=4)
+        with self.assertNoLogs("urllib3.connectionpool", logging.WARNING):
+            wordpress.prefetch_taxonomies()
+        self.assertEqual(1000, len(wordpress.tags))
+
+    def test_upload(self):
+        path = Path(self.directory.name, "blog", "index.md")
+        path.parent.mkdir()
+        path.write_text(
+            "---\ntitle: A blog\nauthor: Jane Doe\nslug: a-blog\n"
+            "date: 2023-01-01 10:00:00+00:00\ncategories:\n- categories-2\n---\n\n"
+            "Hello world\n"
+        )
+        wordpress = Wordpress(endpoint=self.fake.endpoint())
+        blog = Blog.load(path)
+        self.assertEqual(0, upsert_post(wordpress, blog))
+
+        post = wordpress.get_post_by_slug("a-blog", fields=None)
+        self.assertEqual(blog.guid, post.guid)
+        self.assertEqual(2, post.author)
+        self.assertEqual([2], post.categories)
+        self.assertIn("Hello world", post.content)
+
+    def write_blog(self, name: str, slug: str) -> Path:
+        path = Path(self.directory.name, name, "index.md")
+        path.parent.mkdir()
+        path.write_text(
+            f"---\ntitle: A blog\nauthor: Jane Doe\nslug: {slug}\n"
+            "date: 2023-01-01 10:00:00+00:00\n---\n\nHello world\n"
+        )
+        return path
+
+    def test_upload_command(self):
+        self.fake.write_config(Path(self.directory.name))
+        os.chdir(self.directory.name)
+        self.write_blog("one", "a-blog")
+        result = CliRunner().invoke(
+            upload.command, ["--host", "localhost", "--concurrency", "2", "one"]
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn("a-blog", [p["slug"] for p in self.fake.posts.values()])
+
+    def test_upload_same_slug(self):
+        self.fake.write_config(Path(self.directory.name))
+        os.chdir(self.directory.name)
+        self.write_blog("one", "a-blog")
+        self.write_blog("two", "a-blog")
+        result = CliRunner().invoke(upload.command, ["--host", "localhost", "one", "two"])
+        self.assertEqual(1, result.exit_code, result.output)
+
+        wordpress = Wordpress(endpoint=self.fake.endpoint())
+        self.assertIsNone(wordpress.get_post_by_slug("a-blog"))
+
+        existing_posts = {}
+        for name in ["one", "two"]:
+            blog = Blog.load(Path(self.directory.name, name, "index.md"))
+            upsert_post(wordpress, blog, existing_posts)
+        slugs = [p["slug"] for p in self.fake.posts.values()]
+        self.assertEqual(1, slugs.count("a-blog"))
+
+    def test_upload_media(self):
+        path = Path(self.directory.name, "blog", "index.md")
+        path.parent.joinpath("images").mkdir(parents=True)
+        for name in ["one.png", "two.png", "banner.png"]:
+            path.parent.joinpath("images", name).write_bytes(name.encode("ascii"))
+        # a directory cannot be uploaded
+        path.parent.joinpath("images", "broken.png").mkdir()
+        path.write_text(
+            "---\ntitle: A blog\nauthor: Jane Doe\nslug: a-blog\n"
+            "date: 2023-01-01 10:00:00+00:00\nimage: images/banner.png\n---\n\n"
+            "![one](images/one.png)\n\n![two](images/two.png)\n\n"
+            "![broken](images/broken.png)\n"
+        )
+        wordpress = Wordpress(endpoint=self.fake.endpoint())
+        blog = Blog.load(path)
+        with self.assertRaises(ValueError) as context:
+            upsert_post(wordpress, blog)
+        self.assertIn("broken.png", str(context.exception))
+
+        slugs = {m["slug"] for m in self.fake.media.values()}
+        self.assertTrue({"a-blog-one", "a-blog-two", "a-blog-banner"} <= slugs)
+        self.assertEqual({"images/one.png", "images/two.png"}, set(blog.uploaded_images))
+        self.assertIsNotNone(blog.uploaded_banner)
+        self.assertIsNone(wordpress.get_post_by_slug("a-blog"))
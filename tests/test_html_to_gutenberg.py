@@ -196,5 +196,45 @@ class TestConvertFunction(unittest.TestCase):
         self.assertIn('<figure class="wp-block-audio">', result)
 
 
+class TestStreamEngine(unittest.TestCase):
+    CASES = [
+        "<p>This is a paragraph.</p>",
+        "<h2>Heading</h2>",
+        '<pre class="wp-block-code hljs"><code class="language-hcl">terraform code</code></pre>',
+        "<pre><code>no class code</code></pre>",
+        '<ul class="wp-block-list"><li>item1</li><li>item2</li></ul>',
+        "<ol><li>first</li><li>second<ul><li>nested</li></ul></li></ol>",
+        '<img src="img.png" alt="desc"/>',
+        '<audio controls src="https://x/c.mp3"></audio>',
+        '<figure class="wp-block-audio"><audio controls src="https://x/c.mp3"></audio></figure>',
+        "<span>custom</span>",
+        "just text & more",
+        "<!-- a comment -->",
+        "<blockquote>quotie quote</blockquote>",
+        "<blockquote><p>Quote line 1</p><p>Quote line 2</p></blockquote>",
+        "<blockquote>\n<blockquote><ul><li>x</li></ul></blockquote>\n</blockquote>",
+        '<ul><li>One</li></ul><img src="a.png" />',
+        "<p>First</p><h2>Second</h2><pre><code>Code</code></pre>",
+        '<h2>Section</h2><figure class="wp-block-audio">'
+        '<audio controls src="https://x/c.mp3"></audio></figure>',
+        "<html><body><p>a &amp; b &copy; &#8217; &bogus; &lt;</p>\n\n  <hr>x</body></html>",
+        '<p class="  a   b ">x</p><a href="?a=1&b=\'2\'" title=\'say "hi"\'>l</a>',
+        "<script>if (a < b && c) {}</script><div><!----><![CDATA[x]]></div>",
+        "<ul><li>unclosed<li>two</ul><p><b>bold <i>it</b> x</i></p></div>stray",
+    ]
+
+    def test_identical_output(self):
+        for html_body in self.CASES:
+            with self.subTest(html_body=html_body):
+                self.assertEqual(
+                    convert('A "title"', html_body),
+                    convert('A "title"', html_body, engine="stream"),
+                )
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            convert("title", "<p>x</p>", engine="lxml")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,99 @@
+import html
+import os
+import re
+import threading
+import unittest
+
+from markdown import markdown
+
+from wordpress_markdown_blog_loader import html_to_gutenberg
+from wordpress_markdown_blog_loader.markdown_to_gutenberg import EXTENSIONS, render
+from wordpress_markdown_blog_loader.remove_newlines import (
+    remove_newlines_from_paragraphs,
+)
+
+
+def render_with_soup(title: str, content: str) -> str:
+    body = markdown(content, extensions=EXTENSIONS)
+    body = remove_newlines_from_paragraphs(body)
+    return html_to_gutenberg.convert(title, body)
+
+
+# the accepted differences between the output of render and of
+# html_to_gutenberg.convert, which serializes the html with BeautifulSoup:
+ACCEPTED_DEVIATIONS = [
+    # void elements are closed as `<br />` instead of `<br/>`
+    (re.compile(r" />"), "/>"),
+    # character references like `&copy;`, `&#8217;`, and the `&#160;&#8617;` of the
+    # footnotes are kept instead of decoded
+    (
+        re.compile(r"&(#\d+|#x[0-9a-fA-F]+|(?!amp;|lt;|gt;)[a-zA-Z]+\d*);"),
+        lambda match: html.unescape(match[0]),
+    ),
+    # raw html blocks are surrounded by two extra blank lines
+    (re.compile(r"\n{5}"), "\n\n\n"),
+]
+
+
+def normalize(text: str) -> str:
+    """
+    removes the accepted deviations from `text`, leaving `&amp;`, `&lt;` and `&gt;`.
+    """
+    for pattern, replacement in ACCEPTED_DEVIATIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class Test_MarkdownToGutenberg(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(os.path.dirname(__file__), "resources", "gutenberg.md")
+        with open(path) as file:
+            self.content = file.read()
+
+    def test_same_blocks_as_html_to_gutenberg(self):
+        self.assertEqual(
+            render_with_soup('A "title"', self.content),
+            normalize(render('A "title"', self.content)),
+        )
+
+    def test_newlines_in_inline_html(self):
+        # html_to_gutenberg keeps the newlines inside inline html elements
+        content = "a <span>x\ny</span> b"
+        self.assertIn("<p>a <span>x y</span> b</p>", render("t", content))
+        self.assertIn("<p>a <span>x\ny</span> b</p>", render_with_soup("t", content))
+
+    def test_blocks(self):
+        rendered = render("title", self.content)
+        self.assertIn("<p>Some <em>text</em> with a", rendered)
+        self.assertIn('<!-- wp:list { "ordered":true } -->\n<ol>', rendered)
+        self.assertIn("<!-- wp:list-item --><li>first</li><!-- /wp:list-item -->", rendered)
+        self.assertIn('<pre><code>print("hi")', rendered)
+        self.assertIn(
+            '<!-- wp:audio -->\n<figure class="wp-block-audio">'
+            '<audio controls="" src="a.mp3"></audio></figure>\n<!-- /wp:audio -->',
+            rendered,
+        )
+
+    def test_reuse(self):
+        first = render("title", self.content)
+        self.assertEqual(first, render("title", self.content))
+        # footnotes and raw html of the previous blog do not leak into the next
+        self.assertNotIn("footnote", render("title", "Plain text"))
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(render("title", self.content)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([first] * 4, results)
+
+    def test_html_comment(self):
+        self.assertIn("<!-- more -->", render("title", "text\n\n<!-- more -->\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
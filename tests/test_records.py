@@ -0,0 +1,78 @@
+import unittest
+
+from wordpress_markdown_blog_loader.api import Medium, Post
+from wordpress_markdown_blog_loader.records import MediumRecord, PostRecord
+
+POST = {
+    "id": 42,
+    "slug": "",
+    "generated_slug": "hello-world",
+    "link": "https://example.com/hello-world",
+    "_links": {"self": [{"href": "https://example.com/wp-json/wp/v2/posts/42"}]},
+    "title": {"rendered": "Hello &#8211; world"},
+    "status": "draft",
+    "author": 3,
+    "date_gmt": "2023-01-10T12:00:00",
+    "modified_gmt": "2023-01-11T12:00:00",
+    "featured_media": 7,
+    "categories": [1],
+    "tags": [2, 3],
+    "meta": {
+        "rank_math_facebook_image": "https://example.com/og.png",
+        "rank_math_facebook_description": "a greeting",
+    },
+    "acf": {"show_header_image": True},
+    "content": {"rendered": "<p>hello</p>", "raw": "hello"},
+    "excerpt": {"rendered": "<p>hi</p>"},
+}
+
+
+class Test_PostRecord(unittest.TestCase):
+    def test_properties_match_post(self):
+        post, record = Post(POST), PostRecord(POST)
+        for name in [
+            "slug", "post_id", "link", "guid", "title", "status", "author", "date",
+            "modified_gmt", "featured_media", "categories", "tags", "capabilities",
+            "content", "raw_content", "excerpt", "og_images", "og_description",
+            "permalink_template",
+        ]:
+            self.assertEqual(getattr(post, name), getattr(record, name), name)
+
+        for key in ["meta", "title", "content", "excerpt", "date_gmt", "_links"]:
+            self.assertEqual(post.get(key), record.get(key), key)
+        self.assertIsNone(record.get("guid"))
+        self.assertEqual(42, record.get("id"))
+        self.assertIn("acf", record)
+        self.assertNotIn("unknown", record)
+        self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_content_is_loaded_on_first_use(self):
+        loaded = []
+
+        def loader(post_id):
+            loaded.append(post_id)
+            return {"content": POST["content"], "excerpt": POST["excerpt"]}
+
+        properties = {k: v for k, v in POST.items() if k not in ["content", "excerpt"]}
+        record = PostRecord(properties, loader)
+        self.assertEqual([], loaded)
+        self.assertEqual("<p>hello</p>", record.content)
+        self.assertEqual("<p>hi</p>", record.excerpt)
+        self.assertEqual([42], loaded)
+
+
+class Test_MediumRecord(unittest.TestCase):
+    def test_properties_match_medium(self):
+        properties = {
+            "id": "7",
+            "slug": "banner",
+            "link": "https://example.com/banner",
+            "guid": {"rendered": "https://example.com/wp-content/uploads/banner.png"},
+            "title": {"rendered": "banner"},
+            "media_details": {"filesize": 1024},
+        }
+        medium, record = Medium(properties), MediumRecord(properties)
+        for name in ["medium_id", "url", "link", "slug", "title", "filesize"]:
+            self.assertEqual(getattr(medium, name), getattr(record, name), name)
+        for key in ["guid", "title", "media_details"]:
+            self.assertEqual(medium.get(key), record.get(key), key)